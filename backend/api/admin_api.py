@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from backend.services.expiry_service import get_expiry_sweep_stats, run_expiry_sweep
+from backend.services.export_service import get_export_manager
+from backend.services.logs_service import rebuild_activity_rollups
+from backend.services.qr_gc_service import run_qr_image_gc
+from backend.services.visitor_qr_pool_service import get_visitor_qr_pool_stats
+from backend.services.retention_service import PARTITIONED_TABLES, list_partitions, run_partition_maintenance
+from backend.utils.auth_dependency import require_role
+from backend.utils.auth_state import get_denylist_stats
+from backend.utils.db_logger import log_action, get_audit_writer_stats
+from backend.utils.jwt_utils import get_token_cache_stats
+from backend.utils.mailer import get_mailer_stats
+from backend.utils.password_hasher import get_hasher_stats
+from backend.utils.qr_download_index import get_download_index
+from backend.utils.qr_images import get_qr_image_cache_stats
+from backend.utils.rate_limit import get_login_throttle
+from backend.utils.settings import reload_settings
+from backend.utils.timing import get_stage_stats, reset_stage_stats
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/metrics/scan-timings")
+def get_scan_timings_endpoint(
+    prefix: Optional[str] = Query(None, description="Only stages whose name starts with this prefix (e.g. scan_employee)"),
+    current_user: dict = Depends(require_role("admin")),
+):
+    """
+    Per-stage latency histograms for the scan pipeline. Admin only.
+    Stages are named <pipeline>.<stage>, e.g. scan_employee.insert or verify_qr.lookup.
+    """
+    stages = get_stage_stats(prefix)
+    return {"stages": stages, "count": len(stages)}
+
+
+@router.delete("/metrics/scan-timings")
+def reset_scan_timings_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Reset the scan pipeline latency histograms. Admin only."""
+    reset_stage_stats()
+    return {"message": "Scan timing histograms reset"}
+
+
+@router.get("/metrics/token-cache")
+def get_token_cache_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Hit/miss/eviction counters for the verified-token cache. Admin only."""
+    return get_token_cache_stats()
+
+
+@router.get("/metrics/auth-denylist")
+def get_auth_denylist_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Size and sync status of the per-user token denylist. Admin only."""
+    return get_denylist_stats()
+
+
+@router.get("/metrics/password-hasher")
+def get_password_hasher_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Throughput and saturation of the password hashing pool. Admin only."""
+    return get_hasher_stats()
+
+
+@router.get("/metrics/login-throttle")
+def get_login_throttle_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Allowed and rejected login attempts per throttle bucket type. Admin only."""
+    return get_login_throttle().stats()
+
+
+@router.get("/metrics/audit-writer")
+def get_audit_writer_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Queue depth and batch counters for the background audit writer. Admin only."""
+    return get_audit_writer_stats()
+
+
+@router.get("/metrics/export-jobs")
+def get_export_jobs_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Queued, running and finished background export jobs in this worker. Admin only."""
+    return get_export_manager().stats()
+
+
+@router.get("/metrics/qr-images")
+def get_qr_image_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Hit, render and eviction counters for the QR image cache and download index. Admin only."""
+    return {"images": get_qr_image_cache_stats(), "download_index": get_download_index().stats()}
+
+
+@router.get("/metrics/visitor-qr-pool")
+def get_visitor_qr_pool_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Pre-minted visitor QR codes available, and claims that found the pool empty. Admin only."""
+    return get_visitor_qr_pool_stats()
+
+
+@router.get("/metrics/expiry-sweep")
+def get_expiry_sweep_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Schedule and last result of the QR code and visit expiry sweep in this worker. Admin only."""
+    return get_expiry_sweep_stats()
+
+
+@router.get("/metrics/mailer")
+def get_mailer_metrics_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Queue depth and sent/failed/retried counters for the background mailer. Admin only."""
+    return get_mailer_stats()
+
+
+@router.get("/partitions")
+def list_partitions_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Month partitions of the append-only log tables, with approximate row counts. Admin only."""
+    return {table: list_partitions(table) for table in PARTITIONED_TABLES}
+
+
+@router.post("/partitions/maintenance")
+def run_partition_maintenance_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Create upcoming partitions and archive expired ones now. Admin only."""
+    summary = run_partition_maintenance()
+    if summary is None:
+        raise HTTPException(status_code=409, detail="Partition maintenance is already running")
+    archived = ", ".join(f"{item['table']}.{item['partition']}" for item in summary["archived"]) or "none"
+    log_action(current_user["user_id"], "partition_maintenance", f"Ran partition maintenance (archived: {archived})", sync=True)
+    return summary
+
+
+@router.post("/expiry/sweep")
+def run_expiry_sweep_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Expire overdue QR codes and stale pending visits now. Admin only."""
+    summary = run_expiry_sweep()
+    if summary is None:
+        raise HTTPException(status_code=409, detail="Expiry sweep is already running")
+    expired_codes = sum(summary["qr_codes"].values())
+    log_action(
+        current_user["user_id"], "expiry_sweep",
+        f"Ran expiry sweep ({expired_codes} QR codes, {summary['visits']} visits expired)", sync=True,
+    )
+    return summary
+
+
+@router.post("/qr-images/gc")
+def run_qr_image_gc_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """Delete cached images of expired and revoked QR codes now. Admin only."""
+    summary = run_qr_image_gc()
+    if summary is None:
+        raise HTTPException(status_code=409, detail="QR image GC is already running")
+    log_action(current_user["user_id"], "qr_image_gc", f"Ran QR image GC (removed {summary['files_removed']} files)", sync=True)
+    return summary
+
+
+@router.post("/rollups/rebuild")
+def rebuild_rollups_endpoint(
+    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="End date inclusive (YYYY-MM-DD)"),
+    current_user: dict = Depends(require_role("admin")),
+):
+    """
+    Recompute the hourly audit rollup for a date range from AccessLogs. Admin only.
+    Only hours that ended more than a minute ago are rebuilt: the range is cut off at the
+    start of the current hour (the previous one during its first minute), because rows
+    still being written would otherwise be counted twice. A range with no finished hour
+    returns 409. The response gives the hours actually rebuilt. The rebuild is one
+    transaction, so /logs/activity never sees the range empty.
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid date format. Use YYYY-MM-DD")
+    if start >= end:
+        raise HTTPException(status_code=422, detail="start_date must not be after end_date")
+
+    try:
+        rebuilt = rebuild_activity_rollups(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if rebuilt is None:
+        raise HTTPException(status_code=500, detail="Failed to rebuild audit rollups")
+    rebuilt_start, rebuilt_end = rebuilt
+    log_action(
+        current_user["user_id"], "rebuild_rollups",
+        f"Rebuilt audit rollups {rebuilt_start.isoformat()} to {rebuilt_end.isoformat()}", sync=True,
+    )
+    return {
+        "message": f"Audit rollups rebuilt for {start_date} to {end_date}",
+        "rebuilt_from": rebuilt_start.isoformat(),
+        "rebuilt_until": rebuilt_end.isoformat(),
+    }
+
+
+@router.post("/settings/reload")
+def reload_settings_endpoint(current_user: dict = Depends(require_role("admin"))):
+    """
+    Re-read config.ini without restarting. Admin only.
+    Database connection settings only take effect after a restart.
+    """
+    try:
+        reload_settings()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to reload settings: {e}")
+    log_action(current_user["user_id"], "reload_settings", "Reloaded settings from config.ini", sync=True)
+    return {"message": "Settings reloaded"}
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from pydantic import BaseModel
+from typing import Optional
 
 from backend.services.auth_service import (
     login,
     register_user,
     deactivate_user,
-    get_user_role,
-    get_user_info,
 )
-from backend.utils.auth_dependency import get_current_user_id
+from backend.utils.auth_dependency import get_current_user_id, get_current_user, extract_bearer_token, require_role
+from backend.utils.jwt_utils import revoke_token
+from backend.utils.db_logger import log_action
+from backend.utils.password_hasher import HasherBusyError
+from backend.utils.rate_limit import get_login_throttle, get_client_ip
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -25,10 +28,23 @@ class RegisterRequest(BaseModel):
 
 
 @router.post("/login")
-def login_endpoint(payload: LoginRequest):
-    """Public login endpoint - no authentication required."""
+def login_endpoint(payload: LoginRequest, request: Request):
+    """
+    Public login endpoint - no authentication required.
+    Attempts are throttled per client IP and per username before any database access.
+    """
+    allowed, retry_after = get_login_throttle().check(get_client_ip(request), payload.username)
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
     try:
         user = login(payload.username, payload.password)
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Login service busy, please retry", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error during login: {e}")
 
@@ -45,17 +61,34 @@ def login_endpoint(payload: LoginRequest):
     }
 
 
+@router.post("/logout")
+def logout_endpoint(
+    authorization: Optional[str] = Header(default=None),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Revoke the caller's token so it cannot be used again before it expires. The token is
+    rejected by this worker at once and by the others after their next denylist sync
+    ([auth] denylist_sync_seconds).
+    """
+    if not revoke_token(extract_bearer_token(authorization)):
+        raise HTTPException(status_code=503, detail="Logout could not be recorded, please retry")
+    log_action(current_user_id, "logout", f"User {current_user_id} logged out", entity=("user", current_user_id))
+    return {"message": "Logged out successfully"}
+
+
 @router.post("/register-user")
 def register_user_endpoint(
     payload: RegisterRequest,
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """Admin-only endpoint to register new users."""
-    role = get_user_role(current_user_id)
-    if role != "admin":
-        raise HTTPException(status_code=403, detail="Admin role required")
+    try:
+        registered = register_user(payload.username, payload.password, payload.role_name, current_user["user_id"])
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Password hashing busy, please retry", headers={"Retry-After": "1"})
 
-    if not register_user(payload.username, payload.password, payload.role_name, current_user_id):
+    if not registered:
         raise HTTPException(status_code=400, detail="Unable to register user (duplicate or invalid data)")
 
     return {"message": f"User {payload.username} created successfully"}
@@ -64,28 +97,24 @@ def register_user_endpoint(
 @router.patch("/deactivate-user/{user_id}")
 def deactivate_user_endpoint(
     user_id: int,
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """
     Admin-only endpoint to deactivate users.
     This preserves all database records (Users and AccessLogs) for audit purposes.
     Revokes all related EmployeeQRCodes while maintaining data integrity.
     """
-    role = get_user_role(current_user_id)
-    if role != "admin":
-        raise HTTPException(status_code=403, detail="Admin role required")
-
-    if not deactivate_user(user_id, current_user_id):
+    if not deactivate_user(user_id, current_user["user_id"]):
         raise HTTPException(status_code=400, detail="Unable to deactivate user (user not found or self-deactivation attempted)")
 
     return {"message": f"User {user_id} deactivated successfully. All records preserved for audit."}
 
 
 @router.get("/me")
-def get_current_user_endpoint(current_user_id: int = Depends(get_current_user_id)):
-    """Get current authenticated user information."""
-    user_info = get_user_info(current_user_id)
-    if not user_info:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    return user_info
+def get_current_user_endpoint(current_user: dict = Depends(get_current_user)):
+    """Get current authenticated user information (from token claims, no DB lookup)."""
+    return {
+        "user_id": current_user["user_id"],
+        "username": current_user["username"],
+        "role": current_user["role"],
+    }
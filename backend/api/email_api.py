@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
 from backend.services.email_service import send_qr_code_email, check_and_send_late_alerts
 from backend.utils.auth_dependency import get_current_user_id
+from backend.utils.qr_images import DEFAULT_SCALE, MAX_SCALE
 
 router = APIRouter(prefix="/email", tags=["email"])
 
@@ -12,6 +13,8 @@ class SendQRRequest(BaseModel):
     email: EmailStr
     visitor_id: int
     qr_code_data: str
+    format: str = Field("png", pattern="^(png|svg)$")
+    scale: int = Field(DEFAULT_SCALE, ge=1, le=MAX_SCALE)  # pixels per QR module
 
 
 class AlertLateRequest(BaseModel):
@@ -24,14 +27,16 @@ def send_qr_email_endpoint(
     current_user_id: int = Depends(get_current_user_id),
 ):
     """
-    Send QR code as email attachment.
+    Send QR code as email attachment (1-bit PNG by default, or SVG).
     Requires JWT authentication.
     """
     result = send_qr_code_email(
         payload.email,
         payload.visitor_id,
         payload.qr_code_data,
-        current_user_id
+        current_user_id,
+        image_format=payload.format,
+        scale=payload.scale,
     )
     
     if not result['success']:
@@ -0,0 +1,96 @@
+import os
+import re
+from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel
+from typing import Optional
+
+from backend.services.export_service import ExportBusyError, get_export_manager, normalize_params
+from backend.utils.auth_dependency import get_current_user
+from backend.utils.db_logger import log_action
+from backend.utils.exporters import MEDIA_TYPES
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class CreateExportRequest(BaseModel):
+    kind: str  # "access_logs", "scan_history" or "salary"
+    format: Optional[str] = None  # xlsx, csv or ndjson; defaults to csv for scan_history, else xlsx
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    action: Optional[str] = None  # access_logs only
+    scan_type: Optional[str] = None  # scan_history only: employee or visitor
+    employee_id: Optional[int] = None  # salary only
+
+
+def _public(job: dict) -> dict:
+    """Job fields returned to clients."""
+    return {
+        key: job[key]
+        for key in ("job_id", "kind", "format", "params", "filename", "status", "rows", "bytes",
+                    "error", "created_at", "started_at", "finished_at", "expires_at")
+    }
+
+
+def _get_job_for(job_id: str, current_user: dict) -> dict:
+    if not _JOB_ID.match(job_id):
+        raise HTTPException(status_code=404, detail="Export job not found")
+    job = get_export_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if current_user.get("role") != "admin" and current_user["user_id"] not in job["requested_by"]:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+@router.post("", status_code=202)
+def create_export_endpoint(payload: CreateExportRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Start a background export and return its job. Poll GET /exports/{job_id} until status
+    is "done", then download from /exports/{job_id}/download.
+    An identical export already in progress is returned instead of starting a new one.
+    Salary exports are admin only.
+    """
+    if payload.kind == "salary" and current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+    try:
+        fmt, params = normalize_params(payload.kind, payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        job, deduplicated = get_export_manager().submit(payload.kind, fmt, params, current_user["user_id"])
+    except ExportBusyError:
+        raise HTTPException(status_code=503, detail="Too many exports in progress, please retry later", headers={"Retry-After": "30"})
+
+    if not deduplicated:
+        log_action(current_user["user_id"], "export_requested", f"Requested {job['filename']} (job {job['job_id']})")
+    return {**_public(job), "deduplicated": deduplicated}
+
+
+@router.get("/{job_id}")
+def get_export_endpoint(job_id: str = Path(...), current_user: dict = Depends(get_current_user)):
+    """Status and progress (rows written so far) of an export job."""
+    return _public(_get_job_for(job_id, current_user))
+
+
+@router.get("/{job_id}/download")
+def download_export_endpoint(job_id: str = Path(...), current_user: dict = Depends(get_current_user)):
+    """Download a finished export. 409 while it is still running, 410 once it has expired."""
+    job = _get_job_for(job_id, current_user)
+    if job["status"] in ("queued", "running"):
+        return JSONResponse(
+            status_code=409,
+            content={"detail": "Export is not finished yet", "status": job["status"], "rows": job["rows"]},
+            headers={"Retry-After": "5"},
+        )
+    if job["status"] == "failed":
+        raise HTTPException(status_code=409, detail=f"Export failed: {job['error']}")
+
+    path = get_export_manager().artifact_path(job)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=410, detail="Export has expired")
+    return FileResponse(path, media_type=MEDIA_TYPES[job["format"]], filename=job["filename"])
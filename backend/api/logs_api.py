@@ -1,8 +1,19 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Optional, List, Dict
 
-from backend.services.logs_service import get_access_logs, export_access_logs_to_excel
+from backend.services.logs_service import (
+    ACCESS_LOG_EXPORT_COLUMNS,
+    SCAN_HISTORY_EXPORT_COLUMNS,
+    get_access_logs_page,
+    get_entity_history,
+    get_activity,
+    iter_access_logs,
+    iter_scan_history,
+)
+from backend.database.connection import StreamsBusyError
+from backend.utils.db_logger import ENTITY_TYPES
+from backend.utils.exporters import accepts_gzip, export_response
 from backend.utils.auth_dependency import get_current_user_id
 
 router = APIRouter(prefix="/logs", tags=["logs"])
@@ -13,12 +24,14 @@ def get_access_logs_endpoint(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     action: Optional[str] = Query(None, description="Action type filter"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page_size: int = Query(1000, ge=1, le=1000, description="Logs per page"),
     current_user_id: int = Depends(get_current_user_id),
 ):
     """
-    Get access logs with optional filters.
+    Get access logs with optional filters, newest first.
     Requires JWT authentication.
-    Returns up to 1000 most recent logs.
+    Returns one page of logs; pass next_cursor back as cursor while has_more is true.
     """
     # Validate date formats if provided
     if start_date:
@@ -33,11 +46,17 @@ def get_access_logs_endpoint(
         except ValueError:
             raise HTTPException(status_code=422, detail="Invalid end_date format. Use YYYY-MM-DD")
     
-    logs = get_access_logs(start_date, end_date, action)
+    try:
+        page = get_access_logs_page(start_date, end_date, action, cursor, page_size)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid cursor")
     
     return {
-        "logs": logs,
-        "count": len(logs),
+        "logs": page["logs"],
+        "count": len(page["logs"]),
+        "has_more": page["has_more"],
+        "next_cursor": page["next_cursor"],
+        "page_size": page_size,
         "filters": {
             "start_date": start_date,
             "end_date": end_date,
@@ -46,17 +65,97 @@ def get_access_logs_endpoint(
     }
 
 
+@router.get("/entity/{entity_type}/{entity_id}")
+def get_entity_history_endpoint(
+    entity_type: str,
+    entity_id: int,
+    primary_only: bool = Query(False, description="Only logs where the entity is the main subject"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page_size: int = Query(100, ge=1, le=1000, description="Logs per page"),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Everything the audit log recorded about one entity (e.g. /logs/entity/visit/42), newest first.
+    Requires JWT authentication.
+    """
+    if entity_type not in ENTITY_TYPES:
+        raise HTTPException(status_code=422, detail=f"Unknown entity type. Use one of: {', '.join(ENTITY_TYPES)}")
+
+    try:
+        page = get_entity_history(entity_type, entity_id, primary_only, cursor, page_size)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+    return {
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "logs": page["logs"],
+        "count": len(page["logs"]),
+        "has_more": page["has_more"],
+        "next_cursor": page["next_cursor"],
+    }
+
+
+@router.get("/activity")
+def get_activity_endpoint(
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD), default 7 days ago"),
+    end_date: Optional[str] = Query(None, description="End date inclusive (YYYY-MM-DD), default today"),
+    bucket: str = Query("hour", pattern="^(hour|day)$", description="Bucket size: hour or day"),
+    action: Optional[str] = Query(None, description="Action type filter"),
+    user_id: Optional[int] = Query(None, description="Only actions by this user"),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Audit activity counts per hour or day plus per-action totals, served from the hourly rollup.
+    Requires JWT authentication.
+    """
+    try:
+        end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else end - timedelta(days=7)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid date format. Use YYYY-MM-DD")
+    end += timedelta(days=1)
+
+    if start >= end:
+        raise HTTPException(status_code=422, detail="start_date must not be after end_date")
+    if end - start > timedelta(days=366):
+        raise HTTPException(status_code=422, detail="Date range cannot exceed one year")
+
+    activity = get_activity(start, end, bucket, action, user_id)
+    activity["filters"] = {
+        "start_date": start.date().isoformat(),
+        "end_date": (end - timedelta(days=1)).date().isoformat(),
+        "bucket": bucket,
+        "action": action,
+        "user_id": user_id,
+    }
+    return activity
+
+
+def _export_filename(base: str, start_date: Optional[str], end_date: Optional[str]) -> str:
+    if start_date and end_date:
+        return f"{base}_{start_date}_to_{end_date}"
+    if start_date:
+        return f"{base}_from_{start_date}"
+    if end_date:
+        return f"{base}_until_{end_date}"
+    return base
+
+
 @router.get("/export")
 def export_access_logs_endpoint(
+    request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     action: Optional[str] = Query(None, description="Action type filter"),
+    format: str = Query("xlsx", pattern="^(xlsx|csv|ndjson)$", description="xlsx, csv or ndjson"),
     current_user_id: int = Depends(get_current_user_id),
 ):
     """
-    Export access logs to Excel format (.xlsx).
+    Export access logs as Excel (.xlsx, default), CSV or NDJSON.
     Requires JWT authentication.
-    Returns an Excel file with filtered logs.
+    CSV and NDJSON are streamed straight from the database and gzip-encoded when the
+    client accepts it.
     """
     # Validate date formats if provided
     if start_date:
@@ -71,24 +170,47 @@ def export_access_logs_endpoint(
         except ValueError:
             raise HTTPException(status_code=422, detail="Invalid end_date format. Use YYYY-MM-DD")
     
-    # Generate Excel file
-    excel_file = export_access_logs_to_excel(start_date, end_date, action)
-    
-    # Generate filename with date range
-    filename = "access_logs"
-    if start_date and end_date:
-        filename += f"_{start_date}_to_{end_date}"
-    elif start_date:
-        filename += f"_from_{start_date}"
-    elif end_date:
-        filename += f"_until_{end_date}"
-    filename += ".xlsx"
-    
-    return Response(
-        content=excel_file.read(),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
-    )
+    try:
+        return export_response(
+            format,
+            _export_filename("access_logs", start_date, end_date),
+            "Access Logs",
+            ACCESS_LOG_EXPORT_COLUMNS,
+            iter_access_logs(start_date, end_date, action),
+            gzip=accepts_gzip(request),
+        )
+    except StreamsBusyError:
+        raise HTTPException(status_code=503, detail="Too many exports in progress, please retry", headers={"Retry-After": "5"})
+
+
+@router.get("/scans/export")
+def export_scan_history_endpoint(
+    request: Request,
+    type: str = Query("employee", pattern="^(employee|visitor)$", description="employee or visitor scans"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    format: str = Query("csv", pattern="^(xlsx|csv|ndjson)$", description="csv (default), ndjson or xlsx"),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Export employee or visitor scan history, oldest first.
+    Requires JWT authentication.
+    """
+    for name, value in (("start_date", start_date), ("end_date", end_date)):
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise HTTPException(status_code=422, detail=f"Invalid {name} format. Use YYYY-MM-DD")
 
+    try:
+        return export_response(
+            format,
+            _export_filename(f"{type}_scans", start_date, end_date),
+            f"{type.capitalize()} Scans",
+            SCAN_HISTORY_EXPORT_COLUMNS[type],
+            iter_scan_history(type, start_date, end_date),
+            gzip=accepts_gzip(request),
+        )
+    except StreamsBusyError:
+        raise HTTPException(status_code=503, detail="Too many exports in progress, please retry", headers={"Retry-After": "5"})
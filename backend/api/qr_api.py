@@ -1,16 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional
+from typing import List, Optional
 
 from backend.services.qr_service import (
     generate_employee_qr,
+    generate_employee_qrs_bulk,
     generate_visitor_qr,
-    get_visitor_qr_file,
-    get_employee_qr_file,
+    get_visitor_qr_email_status,
+    resolve_qr_download,
     debug_visit_info,
 )
-from backend.utils.auth_dependency import get_current_user_id
+from backend.utils.exporters import iter_file
+from backend.utils.qr_bundles import iter_qr_zip, write_qr_sheet_pdf
+from backend.utils.qr_images import DEFAULT_SCALE, MAX_SCALE, MEDIA_TYPES, get_qr_image, qr_digest, render_many
+from backend.utils.settings import get_settings
+from backend.utils.auth_dependency import get_current_user_id, require_role
 from backend.utils.validator import validate_email, validate_id_format
 
 router = APIRouter(prefix="/qr", tags=["qr"])
@@ -27,6 +33,19 @@ class GenerateEmployeeQRRequest(BaseModel):
         return v
 
 
+class BulkEmployeeQRRequest(BaseModel):
+    department_id: Optional[int] = None
+    employee_ids: Optional[List[int]] = None
+    output: str = "zip"  # "zip" (PNGs + manifest.csv) or "pdf" (printable sheet)
+    
+    @field_validator('output')
+    @classmethod
+    def validate_output(cls, v: str) -> str:
+        if v not in ("zip", "pdf"):
+            raise ValueError("output must be 'zip' or 'pdf'")
+        return v
+
+
 class GenerateVisitorQRRequest(BaseModel):
     visit_id: int
     recipient_email: str
@@ -84,6 +103,57 @@ def generate_employee_qr_endpoint(
     }
 
 
+@router.post("/generate-employee/bulk")
+def generate_employee_qr_bulk_endpoint(
+    payload: BulkEmployeeQRRequest,
+    current_user: dict = Depends(require_role("admin")),
+):
+    """
+    Issue new QR codes to a whole department (department_id) or to a list of employees
+    (employee_ids) in one go. Admin only.
+    Returns a ZIP of PNGs with a manifest.csv, streamed as images are rendered, or a
+    printable PDF sheet with 12 badges per A4 page.
+    """
+    if (payload.department_id is None) == (not payload.employee_ids):
+        raise HTTPException(status_code=422, detail="Provide either department_id or employee_ids")
+    
+    try:
+        issued = generate_employee_qrs_bulk(current_user["user_id"], payload.department_id, payload.employee_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if issued is None:
+        raise HTTPException(status_code=500, detail="Failed to issue employee QR codes")
+    if not issued:
+        raise HTTPException(status_code=404, detail="No employees found in this department")
+    
+    pngs = render_many(item["code_value"] for item in issued)
+    name = f"employee_qr_department_{payload.department_id}" if payload.department_id is not None else "employee_qr_bulk"
+    headers = {"X-Issued-Count": str(len(issued))}
+    
+    if payload.output == "pdf":
+        sheet = write_qr_sheet_pdf(
+            (f"{item['employee_name']} (#{item['employee_id']})", png) for item, png in zip(issued, pngs)
+        )
+        headers["Content-Disposition"] = f'attachment; filename="{name}.pdf"'
+        return StreamingResponse(iter_file(sheet), media_type="application/pdf", headers=headers)
+    
+    entries = (
+        (f"employee_{item['employee_id']}_qr_{item['emp_qr_id']}.png", png) for item, png in zip(issued, pngs)
+    )
+    manifest = [
+        [item["emp_qr_id"], item["employee_id"], item["employee_name"], item["code_value"],
+         f"employee_{item['employee_id']}_qr_{item['emp_qr_id']}.png"]
+        for item in issued
+    ]
+    headers["Content-Disposition"] = f'attachment; filename="{name}.zip"'
+    return StreamingResponse(
+        iter_qr_zip(entries, ["emp_qr_id", "employee_id", "employee_name", "code_value", "file"], manifest),
+        media_type="application/zip",
+        headers=headers,
+    )
+
+
 @router.post("/generate-visitor")
 def generate_visitor_qr_endpoint(
     payload: GenerateVisitorQRRequest,
@@ -93,7 +163,8 @@ def generate_visitor_qr_endpoint(
     Generate a temporary QR code for a visitor visit.
     Requires JWT authentication.
     Maps to VisitorQRCodes table.
-    Emails the QR code as a downloadable link to the recipient.
+    Emails the QR code as a downloadable link to the recipient. The email is queued and
+    sent in the background; poll /qr/email-status/{visitor_qr_id} for delivery.
     Validates visit_id and recipient_email format before processing.
     """
     # Additional validation (Pydantic handles basic format, but we double-check)
@@ -133,10 +204,33 @@ def generate_visitor_qr_endpoint(
         "download_url": result["download_url"],
         "expiry_date": result["expiry_date"],
         "email_sent": result["email_sent"],
+        "email_status": result["email_status"],
         "message": "Visitor QR code generated successfully"
     }
 
 
+@router.get("/email-status/{visitor_qr_id}")
+def visitor_qr_email_status_endpoint(
+    visitor_qr_id: int,
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Delivery status of the download link email sent for a visitor QR code:
+    queued, sending, retrying, sent, failed, or unknown (no outcome recorded yet).
+    Requires JWT authentication.
+    """
+    if not validate_id_format(visitor_qr_id):
+        raise HTTPException(
+            status_code=422,
+            detail="Invalid visitor_qr_id format. Must be a positive integer."
+        )
+    
+    status = get_visitor_qr_email_status(visitor_qr_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="QR code not found")
+    return status
+
+
 @router.get("/debug/visit/{visit_id}")
 def debug_visit_endpoint(
     visit_id: int,
@@ -164,12 +258,50 @@ def debug_visit_endpoint(
     return result
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, as RFC 9110 requires for 304s)."""
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+
+def _qr_image_response(request: Request, record: dict, filename_base: str, fmt: str, scale: int) -> Response:
+    """
+    PNG or SVG response for a resolved QR code with a strong ETag (the image is a pure
+    function of the code value, format and scale) and a private max-age that ends when
+    the code expires. Conditional requests whose ETag still matches get a 304 without rendering.
+    """
+    digest = qr_digest(record["code_value"])[:32]
+    # The default PNG keeps the bare digest so ETags issued before formats existed still match
+    etag = f'"{digest}"' if (fmt, scale) == ("png", DEFAULT_SCALE) else f'"{digest}-{fmt}{scale}"'
+    if record["expiry_date"]:
+        max_age = max(0, int((record["expiry_date"] - datetime.now()).total_seconds()))
+    else:
+        max_age = get_settings().qr.employee_max_age_seconds
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    headers["Content-Disposition"] = f'attachment; filename="{filename_base}.{fmt}"'
+    return Response(content=get_qr_image(record["code_value"], fmt, scale), media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
 @router.get("/download/employee/{emp_qr_id}")
-def download_employee_qr_endpoint(emp_qr_id: int):
+def download_employee_qr_endpoint(
+    emp_qr_id: int,
+    request: Request,
+    format: str = Query("png", pattern="^(png|svg)$"),
+    scale: int = Query(DEFAULT_SCALE, ge=1, le=MAX_SCALE),
+):
     """
     Download an employee QR code image by emp_qr_id.
     Public endpoint (no authentication required).
     Validates emp_qr_id format and that the QR code is active.
+    Supports If-None-Match; repeat downloads are served from memory.
+    format is png (1-bit) or svg; scale is pixels per module (1-40, default 10).
     """
     # Validate ID format
     if not validate_id_format(emp_qr_id):
@@ -178,28 +310,31 @@ def download_employee_qr_endpoint(emp_qr_id: int):
             detail="Invalid emp_qr_id format. Must be a positive integer."
         )
     
-    file_path = get_employee_qr_file(emp_qr_id)
+    record = resolve_qr_download("employee", emp_qr_id)
     
-    if not file_path:
+    if not record:
         raise HTTPException(
             status_code=404,
             detail="QR code not found or revoked"
         )
     
-    return FileResponse(
-        file_path,
-        media_type="image/png",
-        filename=f"employee_qr_{emp_qr_id}.png"
-    )
+    return _qr_image_response(request, record, f"employee_qr_{emp_qr_id}", format, scale)
 
 
 @router.get("/download/{visitor_qr_id}")
-def download_visitor_qr_endpoint(visitor_qr_id: int):
+def download_visitor_qr_endpoint(
+    visitor_qr_id: int,
+    request: Request,
+    format: str = Query("png", pattern="^(png|svg)$"),
+    scale: int = Query(DEFAULT_SCALE, ge=1, le=MAX_SCALE),
+):
     """
     Download a visitor QR code image by visitor_qr_id.
     Also checks employee QR codes if visitor QR not found (backward compatibility).
     Public endpoint (no authentication required).
     Validates visitor_qr_id format and that the QR code is active and not expired.
+    Supports If-None-Match; repeat downloads are served from memory.
+    format is png (1-bit) or svg; scale is pixels per module (1-40, default 10).
     """
     # Validate ID format
     if not validate_id_format(visitor_qr_id):
@@ -208,28 +343,12 @@ def download_visitor_qr_endpoint(visitor_qr_id: int):
             detail="Invalid visitor_qr_id format. Must be a positive integer."
         )
     
-    # Try visitor QR code first
-    file_path = get_visitor_qr_file(visitor_qr_id)
-    
-    # If not found, try as employee QR code (backward compatibility)
-    if not file_path:
-        file_path = get_employee_qr_file(visitor_qr_id)
-        if file_path:
-            return FileResponse(
-                file_path,
-                media_type="image/png",
-                filename=f"employee_qr_{visitor_qr_id}.png"
-            )
+    record = resolve_qr_download("visitor", visitor_qr_id)
     
-    if not file_path:
+    if not record:
         raise HTTPException(
             status_code=404,
             detail="QR code not found, expired, or revoked"
         )
     
-    return FileResponse(
-        file_path,
-        media_type="image/png",
-        filename=f"visitor_qr_{visitor_qr_id}.png"
-    )
-
+    return _qr_image_response(request, record, f"{record['kind']}_qr_{visitor_qr_id}", format, scale)
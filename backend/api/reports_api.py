@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Query, Response, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, HTTPException
 from typing import Optional
 from datetime import datetime
 
-from backend.services.logs_service import export_access_logs_to_excel
+from backend.database.connection import StreamsBusyError
+from backend.services.logs_service import ACCESS_LOG_EXPORT_COLUMNS, iter_access_logs
+from backend.utils.exporters import accepts_gzip, export_response
 from backend.utils.auth_dependency import get_current_user_id
 
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -10,14 +12,16 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 
 @router.get("/export")
 def export_reports_endpoint(
+    request: Request,
     from_date: Optional[str] = Query(None, alias="from", description="Start date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, alias="to", description="End date (YYYY-MM-DD)"),
+    format: str = Query("xlsx", pattern="^(xlsx|csv|ndjson)$", description="xlsx, csv or ndjson"),
     current_user_id: int = Depends(get_current_user_id),
 ):
     """
-    Export access logs to Excel format.
+    Export access logs as Excel (.xlsx, default), CSV or NDJSON.
     Requires JWT authentication.
-    Returns an Excel file with filtered logs.
+    Returns a file with filtered logs.
     """
     # Validate date formats if provided
     if from_date:
@@ -32,9 +36,6 @@ def export_reports_endpoint(
         except ValueError:
             raise HTTPException(status_code=422, detail="Invalid 'to' date format. Use YYYY-MM-DD")
     
-    # Generate Excel file
-    excel_file = export_access_logs_to_excel(from_date, to_date, None)
-    
     # Generate filename with date range
     filename = "access_logs"
     if from_date and to_date:
@@ -43,13 +44,15 @@ def export_reports_endpoint(
         filename += f"_from_{from_date}"
     elif to_date:
         filename += f"_until_{to_date}"
-    filename += ".xlsx"
     
-    return Response(
-        content=excel_file.read(),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
-    )
-
+    try:
+        return export_response(
+            format,
+            filename,
+            "Access Logs",
+            ACCESS_LOG_EXPORT_COLUMNS,
+            iter_access_logs(from_date, to_date, None),
+            gzip=accepts_gzip(request),
+        )
+    except StreamsBusyError:
+        raise HTTPException(status_code=503, detail="Too many exports in progress, please retry", headers={"Retry-After": "5"})
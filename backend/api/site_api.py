@@ -15,8 +15,7 @@ from backend.services.site_service import (
     calculate_employee_salary,
     export_salary_report_to_excel
 )
-from backend.utils.auth_dependency import get_current_user_id
-from backend.services.auth_service import get_user_role
+from backend.utils.auth_dependency import get_current_user_id, require_role
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/site", tags=["site"])
@@ -39,18 +38,13 @@ class CreateSiteRequest(BaseModel):
 @router.post("/create-site")
 def create_site_endpoint(
     payload: CreateSiteRequest,
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """Create a new site. Admin only."""
-    # Check if current user is admin
-    role = get_user_role(current_user_id)
-    if role != "admin":
-        raise HTTPException(status_code=403, detail="Admin role required")
-    
     site_id = create_site(
         payload.site_name,
         payload.address,
-        current_user_id
+        current_user["user_id"]
     )
     
     if not site_id:
@@ -114,19 +108,14 @@ class CreateEmployeeRequest(BaseModel):
 @router.post("/employees/create")
 def create_employee_endpoint(
     payload: CreateEmployeeRequest,
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """Create a new employee. Admin only."""
-    # Check if current user is admin
-    role = get_user_role(current_user_id)
-    if role != "admin":
-        raise HTTPException(status_code=403, detail="Admin role required")
-    
     employee_id = create_employee(
         payload.name,
         payload.hourly_rate,
         payload.department_id,
-        current_user_id
+        current_user["user_id"]
     )
     
     if not employee_id:
@@ -140,14 +129,9 @@ def calculate_salary_endpoint(
     employee_id: int,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """Calculate employee salary for a date range. Admin only."""
-    # Check if current user is admin
-    role = get_user_role(current_user_id)
-    if role != "admin":
-        raise HTTPException(status_code=403, detail="Admin role required")
-    
     result = calculate_employee_salary(employee_id, start_date, end_date)
     
     if not result:
@@ -161,14 +145,9 @@ def export_salary_report_endpoint(
     employee_id: int,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """Export employee salary report to Excel. Admin only."""
-    # Check if current user is admin
-    role = get_user_role(current_user_id)
-    if role != "admin":
-        raise HTTPException(status_code=403, detail="Admin role required")
-    
     # Validate date formats if provided
     if start_date:
         try:
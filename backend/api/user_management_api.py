@@ -2,10 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict
 
-from backend.services.auth_service import register_user, get_user_role
+from backend.services.auth_service import register_user, deactivate_user
 from backend.database.connection import Database
-from backend.utils.auth_dependency import get_current_user_id
-from backend.utils.db_logger import log_action
+from backend.utils.auth_dependency import require_role
+from backend.utils.password_hasher import HasherBusyError
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -28,23 +28,21 @@ class UserResponse(BaseModel):
 @router.post("/create")
 def create_user_endpoint(
     payload: CreateUserRequest,
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """
     Create a new user. Admin only.
     Requires JWT authentication.
     """
-    # Check if current user is admin
-    current_role = get_user_role(current_user_id)
-    if current_role != 'admin':
-        raise HTTPException(status_code=403, detail="Only admins can create users")
-    
-    success = register_user(
-        payload.username,
-        payload.password,
-        payload.role_name,
-        current_user_id
-    )
+    try:
+        success = register_user(
+            payload.username,
+            payload.password,
+            payload.role_name,
+            current_user["user_id"]
+        )
+    except HasherBusyError:
+        raise HTTPException(status_code=503, detail="Password hashing busy, please retry", headers={"Retry-After": "1"})
     
     if not success:
         raise HTTPException(status_code=400, detail="Failed to create user (username may already exist)")
@@ -55,24 +53,18 @@ def create_user_endpoint(
 @router.delete("/{user_id}")
 def delete_user_endpoint(
     user_id: int,
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """
     Delete (deactivate) a user. Admin only.
     Note: Actually deactivates user, preserves audit trail.
     Requires JWT authentication.
     """
-    # Check if current user is admin
-    current_role = get_user_role(current_user_id)
-    if current_role != 'admin':
-        raise HTTPException(status_code=403, detail="Only admins can delete users")
-    
     # Prevent self-deletion
-    if user_id == current_user_id:
+    if user_id == current_user["user_id"]:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
     
-    from backend.services.auth_service import deactivate_user
-    success = deactivate_user(user_id, current_user_id)
+    success = deactivate_user(user_id, current_user["user_id"])
     
     if not success:
         raise HTTPException(status_code=400, detail="Failed to deactivate user")
@@ -82,22 +74,18 @@ def delete_user_endpoint(
 
 @router.get("/list")
 def list_users_endpoint(
-    current_user_id: int = Depends(get_current_user_id),
+    current_user: dict = Depends(require_role("admin")),
 ):
     """
     Get list of all users. Admin only.
     Requires JWT authentication.
     """
-    # Check if current user is admin
-    current_role = get_user_role(current_user_id)
-    if current_role != 'admin':
-        raise HTTPException(status_code=403, detail="Only admins can view user list")
-    
     users = db.fetchall("""
         SELECT 
             u.user_id,
             u.username,
             u.created_at,
+            u.is_active,
             r.role_name
         FROM Users u
         INNER JOIN Roles r ON u.role_id = r.role_id
@@ -1,27 +1,46 @@
 import mysql.connector
 from mysql.connector import Error
 from mysql.connector import pooling
-import configparser
-import os
 import logging
+import threading
+from contextlib import contextmanager
+
+from backend.utils.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+class StreamsBusyError(Exception):
+    """All [database] max_streams streaming connections of this process are in use."""
+
+
+# Streams use their own connections, so the pool stays free for ordinary queries; this
+# caps how many of those connections one process holds open at a time.
+_stream_slots = None
+_stream_slots_lock = threading.Lock()
+
+
+def _get_stream_slots() -> threading.BoundedSemaphore:
+    global _stream_slots
+    if _stream_slots is None:
+        with _stream_slots_lock:
+            if _stream_slots is None:
+                _stream_slots = threading.BoundedSemaphore(max(1, get_settings().database.max_streams))
+    return _stream_slots
+
+
 class Database:
     def __init__(self):
-        config = configparser.ConfigParser()
-        config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.ini')
-        config.read(config_path)
+        settings = get_settings()
 
         # Keep the absolute path for clearer diagnostics on failures
-        self.config_path = os.path.abspath(config_path)
+        self.config_path = settings.config_path
 
-        self.host = config.get('database', 'host')
-        self.port = config.getint('database', 'port')
-        self.user = config.get('database', 'user')
-        self.password = config.get('database', 'password')
-        self.database = config.get('database', 'database')
+        self.host = settings.database.host
+        self.port = settings.database.port
+        self.user = settings.database.user
+        self.password = settings.database.password
+        self.database = settings.database.database
 
         self.pool = None
         self.last_error = None
@@ -47,6 +66,9 @@ class Database:
                 connect_params['ssl_verify_cert'] = False
                 connect_params['ssl_verify_identity'] = False
 
+            # iter_rows opens dedicated connections with the same parameters
+            self.connect_params = connect_params
+
             # Use a connection pool rather than a single shared connection to avoid
             # concurrent access issues and random disconnects under load.
             pool_name = 'vms_pool'
@@ -83,6 +105,27 @@ class Database:
         cursor = conn.cursor(dictionary=True)
         return conn, cursor
 
+    @contextmanager
+    def named_lock(self, name, timeout=0):
+        """
+        Hold the MySQL named lock `name` (GET_LOCK) for the duration of the block, so only
+        one worker at a time runs it. Yields True if the lock was acquired within timeout
+        seconds, otherwise False. The lock lives on a pooled connection borrowed for the block.
+        """
+        conn, cursor = self._get_conn_cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, %s) AS acquired", (name, timeout))
+            acquired = bool(cursor.fetchone()["acquired"])
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                    cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
     def ensure_connected_or_raise(self):
         """Ensure we have a working connection from the pool or raise an informative error."""
         # Ensure the pool exists
@@ -146,6 +189,107 @@ class Database:
             except Exception:
                 logger.exception("Failed to close DB resources in execute")
 
+    def execute_transaction(self, statements):
+        """Run several (sql, params) statements on one connection and commit them together.
+        Returns False, with nothing applied, if any of them fails."""
+        conn = None
+        cursor = None
+        import time
+        try:
+            self._ensure_connection()
+            conn, cursor = self._get_conn_cursor()
+            start = time.time()
+            for sql, params in statements:
+                cursor.execute(sql, params or ())
+            duration = time.time() - start
+            if duration > 0.25:
+                logger.warning(f"Slow transaction detected ({duration:.3f}s, {len(statements)} statements)")
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.exception(f"Transaction error: {str(e)}")
+            try:
+                if conn:
+                    conn.rollback()
+            except Exception:
+                logger.exception("Failed to rollback transaction")
+            return False
+        finally:
+            try:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()
+            except Exception:
+                logger.exception("Failed to close DB resources in execute_transaction")
+
+    def execute_lastrowid(self, sql, params=None):
+        """Run one write and return the connection's last insert id, or None if no row
+        changed or the statement failed. For UPDATE ... SET id = LAST_INSERT_ID(id) this
+        is the id of the row the UPDATE claimed."""
+        conn = None
+        cursor = None
+        import time
+        try:
+            self._ensure_connection()
+            conn, cursor = self._get_conn_cursor()
+            start = time.time()
+            cursor.execute(sql, params or ())
+            duration = time.time() - start
+            if duration > 0.25:
+                logger.warning(f"Slow query detected ({duration:.3f}s): {sql}")
+            conn.commit()
+            return cursor.lastrowid if cursor.rowcount else None
+        except Exception as e:
+            logger.exception(f"Execute error: {str(e)}")
+            try:
+                if conn:
+                    conn.rollback()
+            except Exception:
+                logger.exception("Failed to rollback transaction")
+            return None
+        finally:
+            try:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()
+            except Exception:
+                logger.exception("Failed to close DB resources in execute_lastrowid")
+
+    def executemany(self, sql, seq_params):
+        """Run one statement for many parameter tuples in a single transaction.
+        For INSERT ... VALUES the connector rewrites this into a multi-row INSERT."""
+        conn = None
+        cursor = None
+        import time
+        try:
+            self._ensure_connection()
+            conn, cursor = self._get_conn_cursor()
+            start = time.time()
+            cursor.executemany(sql, seq_params)
+            duration = time.time() - start
+            if duration > 0.25:
+                logger.warning(f"Slow query detected ({duration:.3f}s, {len(seq_params)} rows): {sql}")
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.exception(f"Executemany error: {str(e)}")
+            try:
+                if conn:
+                    conn.rollback()
+            except Exception:
+                logger.exception("Failed to rollback transaction")
+            return False
+        finally:
+            try:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()
+            except Exception:
+                logger.exception("Failed to close DB resources in executemany")
+
     def fetchall(self, sql, params=None):
         conn = None
         cursor = None
@@ -198,6 +342,52 @@ class Database:
             except Exception:
                 logger.exception("Failed to close DB resources in fetchone")
 
+    def iter_rows(self, sql, params=None, batch_size=1000, wait_seconds=0.0):
+        """
+        Yield rows one at a time from an unbuffered cursor, fetching batch_size rows per
+        round trip, so large result sets are never held in memory at once.
+
+        Each stream gets its own connection rather than a pooled one, so a slow download
+        cannot starve ordinary queries, and at most [database] max_streams are open per
+        process. Waits up to wait_seconds for a free slot (None waits indefinitely), then
+        raises StreamsBusyError. If the generator is closed before the last row, the
+        connection is shut down instead of reading the rest of the result.
+        Errors propagate to the caller.
+        """
+        slots = _get_stream_slots()
+        if not slots.acquire(timeout=wait_seconds):
+            raise StreamsBusyError("Too many exports are streaming, please retry")
+        conn = None
+        cursor = None
+        finished = False
+        try:
+            self._ensure_connection()
+            if not self.pool:
+                raise Exception("Database pool not available")
+            conn = mysql.connector.connect(**self.connect_params)
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            cursor.execute(sql, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+            finished = True
+        finally:
+            try:
+                if conn is not None:
+                    if finished:
+                        cursor.close()
+                        conn.close()
+                    else:
+                        # Unread rows would have to be fetched before QUIT; drop the socket instead
+                        conn.shutdown()
+            except Exception:
+                logger.exception("Failed to close DB resources in iter_rows")
+            finally:
+                slots.release()
+
     def close(self):
         # Close pool (no direct close API; clear reference)
         self.pool = None
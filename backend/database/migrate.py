@@ -0,0 +1,166 @@
+"""Apply versioned schema migrations from backend/database/migrations.
+
+Migrations are NNNN_name.sql files (statements separated by ';') or NNNN_name.py
+modules defining upgrade(cursor). Applied versions are recorded in
+schema_migrations, so each one runs once per database. Databases created from
+schema.sql, or upgraded by hand, can be brought under the runner safely: "already
+exists" errors for tables, columns and indexes (and "doesn't exist" when dropping
+an index) are treated as applied.
+
+Usage:
+    python -m backend.database.migrate            # apply pending migrations
+    python -m backend.database.migrate --status   # list applied/pending
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import sys
+from typing import List, Tuple
+
+from mysql.connector import Error
+
+from backend.database.connection import Database
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+
+# ER_TABLE_EXISTS_ERROR, ER_DUP_FIELDNAME, ER_DUP_KEYNAME, ER_CANT_DROP_FIELD_OR_KEY
+_ALREADY_APPLIED_ERRNOS = {1050, 1060, 1061, 1091}
+
+_MIGRATION_FILE = re.compile(r'^(\d{4})_([a-z0-9_]+)\.(sql|py)$')
+
+_CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(16) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Tuple[str, str, str]]:
+    """Return (version, name, path) for every migration file, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(directory, filename)))
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration version numbers in {directory}")
+    return migrations
+
+
+def split_sql(script: str) -> List[str]:
+    """Split a migration script into statements, dropping '--' comment lines."""
+    lines = [line for line in script.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+def _checksum(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _execute_tolerant(cursor, statement: str):
+    """Run one DDL statement, treating "already exists" as success."""
+    try:
+        cursor.execute(statement)
+    except Error as e:
+        if e.errno not in _ALREADY_APPLIED_ERRNOS:
+            raise
+        logger.info("Already applied, skipping: %s", e.msg)
+
+
+def _run_migration(cursor, path: str):
+    if path.endswith('.sql'):
+        with open(path) as f:
+            for statement in split_sql(f.read()):
+                _execute_tolerant(cursor, statement)
+        return
+
+    spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(cursor)
+
+
+def applied_versions(cursor) -> dict:
+    cursor.execute(_CREATE_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {row['version']: row['checksum'] for row in cursor.fetchall()}
+
+
+def migrate(db: Database = None) -> List[str]:
+    """Apply all pending migrations in order. Returns the versions applied."""
+    db = db or Database()
+    db.ensure_connected_or_raise()
+    conn, cursor = db._get_conn_cursor()
+    applied = []
+    try:
+        done = applied_versions(cursor)
+        for version, name, path in discover_migrations():
+            checksum = _checksum(path)
+            if version in done:
+                if done[version] != checksum:
+                    logger.warning("Migration %s_%s changed after it was applied", version, name)
+                continue
+            logger.info("Applying migration %s_%s", version, name)
+            _run_migration(cursor, path)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (version, name, checksum),
+            )
+            conn.commit()
+            applied.append(version)
+    finally:
+        cursor.close()
+        conn.close()
+    return applied
+
+
+def status(db: Database = None) -> List[Tuple[str, str, bool]]:
+    """Return (version, name, applied) for every known migration."""
+    db = db or Database()
+    db.ensure_connected_or_raise()
+    conn, cursor = db._get_conn_cursor()
+    try:
+        done = applied_versions(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return [(version, name, version in done) for version, name, _ in discover_migrations()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply VMS database migrations")
+    parser.add_argument('--status', action='store_true', help="List migrations and whether they are applied")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    try:
+        if args.status:
+            for version, name, is_applied in status():
+                print(f"{'✓' if is_applied else ' '} {version}_{name}")
+            return
+
+        applied = migrate()
+    except Exception as e:
+        print(f"✗ Migration failed: {e}")
+        sys.exit(1)
+
+    if applied:
+        print(f"✓ Applied {len(applied)} migration(s): {', '.join(applied)}")
+    else:
+        print("✓ Database schema is up to date")
+
+
+if __name__ == '__main__':
+    main()
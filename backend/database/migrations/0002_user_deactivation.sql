@@ -0,0 +1,3 @@
+-- Deactivation flag and token generation counter for Users
+ALTER TABLE Users ADD COLUMN is_active BOOLEAN NOT NULL DEFAULT TRUE;
+ALTER TABLE Users ADD COLUMN token_version INT NOT NULL DEFAULT 0;
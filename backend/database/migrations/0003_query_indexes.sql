@@ -0,0 +1,18 @@
+-- Composite indexes for the hot queries
+
+-- Attendance: latest scan per badge, today's sign-ins, per-employee history
+CREATE INDEX idx_esl_qr_timestamp ON EmployeeScanLogs (emp_qr_id, timestamp);
+
+-- Access log viewer: date ranges and keyset pages, optionally filtered by action
+CREATE INDEX idx_accesslogs_timestamp ON AccessLogs (timestamp);
+CREATE INDEX idx_accesslogs_action_timestamp ON AccessLogs (action, timestamp);
+
+-- Visit lists by status and a visitor's open visits
+CREATE INDEX idx_visits_status_issue ON Visits (status, issue_date);
+CREATE INDEX idx_visits_visitor_status ON Visits (visitor_id, status);
+
+-- Active QR code for a visit
+CREATE INDEX idx_vqr_visit_status ON VisitorQRCodes (visit_id, status);
+
+-- Alerts per QR code, newest first
+CREATE INDEX idx_alerts_triggered_created ON Alerts (triggered_by, created_at);
@@ -0,0 +1,82 @@
+"""Partition AccessLogs, EmployeeScanLogs and VisitorScanLogs by month.
+
+MySQL requires every unique key of a partitioned table to include the partitioning
+column and does not allow foreign keys on partitioned tables, so for each table this:
+  1. drops its foreign keys (the referenced ids are still indexed),
+  2. makes the primary key (id, timestamp) with timestamp NOT NULL,
+  3. partitions by RANGE COLUMNS(timestamp): one partition per month from the oldest
+     row up to a few months ahead, plus a pmax catch-all.
+Later months are added by retention_service.ensure_future_partitions().
+Tables that are already partitioned are left alone.
+"""
+
+from datetime import date
+
+TABLES = (
+    ("AccessLogs", "log_id"),
+    ("EmployeeScanLogs", "scan_id"),
+    ("VisitorScanLogs", "scan_id"),
+)
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        """
+        SELECT COUNT(*) AS partitions FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        """,
+        (table,),
+    )
+    return cursor.fetchone()["partitions"] > 0
+
+
+def _foreign_keys(cursor, table: str):
+    cursor.execute(
+        """
+        SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_TYPE = 'FOREIGN KEY'
+        """,
+        (table,),
+    )
+    return [row["CONSTRAINT_NAME"] for row in cursor.fetchall()]
+
+
+def upgrade(cursor):
+    this_month = date.today().replace(day=1)
+
+    for table, id_column in TABLES:
+        if _is_partitioned(cursor, table):
+            continue
+
+        for constraint in _foreign_keys(cursor, table):
+            cursor.execute(f"ALTER TABLE {table} DROP FOREIGN KEY `{constraint}`")
+
+        cursor.execute(f"UPDATE {table} SET timestamp = CURRENT_TIMESTAMP WHERE timestamp IS NULL")
+        cursor.execute(
+            f"ALTER TABLE {table} "
+            f"MODIFY timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            f"DROP PRIMARY KEY, ADD PRIMARY KEY ({id_column}, timestamp)"
+        )
+
+        cursor.execute(f"SELECT MIN(timestamp) AS oldest FROM {table}")
+        oldest = cursor.fetchone()["oldest"]
+        month = oldest.date().replace(day=1) if oldest else this_month
+        last = _add_months(this_month, MONTHS_AHEAD)
+
+        partitions = []
+        while month <= last:
+            upper = _add_months(month, 1)
+            partitions.append(f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{upper:%Y-%m-%d}')")
+            month = upper
+        partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+
+        cursor.execute(
+            f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS(timestamp) ({', '.join(partitions)})"
+        )
@@ -0,0 +1,9 @@
+-- Structured entity references on audit rows
+-- entity_type/entity_id: the row's main subject, e.g. ('visit', 42)
+-- entity_refs: every entity the row touches as a JSON array of "<type>:<id>" strings,
+-- with a multi-valued index so "everything that happened to visit 42" is an index lookup
+ALTER TABLE AccessLogs ADD COLUMN entity_type VARCHAR(32) NULL;
+ALTER TABLE AccessLogs ADD COLUMN entity_id INT NULL;
+ALTER TABLE AccessLogs ADD COLUMN entity_refs JSON NULL;
+CREATE INDEX idx_accesslogs_entity ON AccessLogs (entity_type, entity_id, timestamp);
+CREATE INDEX idx_accesslogs_entity_refs ON AccessLogs ((CAST(entity_refs AS CHAR(48) ARRAY)));
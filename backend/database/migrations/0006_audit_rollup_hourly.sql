@@ -0,0 +1,16 @@
+-- Hourly AccessLogs counts per action and user, maintained by the audit writer
+CREATE TABLE AuditRollupHourly (
+    hour DATETIME NOT NULL,
+    action VARCHAR(255) NOT NULL,
+    user_id INT NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, action, user_id),
+    INDEX idx_rollup_action_hour (action, hour)
+);
+
+-- Backfill from existing history
+INSERT INTO AuditRollupHourly (hour, action, user_id, count)
+SELECT DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00'), action, user_id, COUNT(*)
+FROM AccessLogs
+GROUP BY DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00'), action, user_id
+ON DUPLICATE KEY UPDATE count = VALUES(count);
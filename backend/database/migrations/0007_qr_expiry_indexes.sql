@@ -0,0 +1,7 @@
+-- QR image GC: codes whose expiry has passed, in (expiry_date, id) order
+CREATE INDEX idx_vqr_expiry ON VisitorQRCodes (expiry_date);
+CREATE INDEX idx_eqr_expiry ON EmployeeQRCodes (expiry_date);
+
+-- QR image GC: revoked codes in id order (InnoDB appends the primary key)
+CREATE INDEX idx_vqr_status ON VisitorQRCodes (status);
+CREATE INDEX idx_eqr_status ON EmployeeQRCodes (status);
@@ -0,0 +1,5 @@
+-- Pre-minted visitor QR codes: 'pooled' rows have no visit or expiry until a visit claims them
+ALTER TABLE VisitorQRCodes
+    MODIFY visit_id INT NULL,
+    MODIFY expiry_date DATETIME NULL,
+    MODIFY status ENUM('active','expired','revoked','pooled') DEFAULT 'active';
@@ -0,0 +1,12 @@
+-- Pending visits that were never checked in are expired by the expiry sweep
+ALTER TABLE Visits
+    MODIFY status ENUM('pending','checked_in','checked_out','denied','expired') DEFAULT 'pending';
+
+-- Expiry sweep: active codes past their expiry_date, oldest first
+CREATE INDEX idx_vqr_status_expiry ON VisitorQRCodes (status, expiry_date);
+CREATE INDEX idx_eqr_status_expiry ON EmployeeQRCodes (status, expiry_date);
+
+-- (status) from 0007 is a leftmost prefix of (status, expiry_date); the GC's revoked-code
+-- scan uses the composite index, so the single-column ones only add write cost
+DROP INDEX idx_vqr_status ON VisitorQRCodes;
+DROP INDEX idx_eqr_status ON EmployeeQRCodes;
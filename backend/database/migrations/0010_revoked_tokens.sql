@@ -0,0 +1,8 @@
+-- Tokens revoked by logout, so every worker rejects them until they expire
+CREATE TABLE RevokedTokens (
+    revocation_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    token_digest CHAR(64) NOT NULL UNIQUE,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_revoked_expires (expires_at)
+);
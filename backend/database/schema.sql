@@ -27,16 +27,31 @@ CREATE TABLE Users (
     password_hash VARCHAR(255) NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     role_id INT NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    token_version INT NOT NULL DEFAULT 0,
     FOREIGN KEY (role_id) REFERENCES Roles(role_id)
 );
 
+-- AccessLogs, EmployeeScanLogs and VisitorScanLogs are partitioned by month, as
+-- migrations/0004_partition_append_only_logs.py leaves upgraded databases: no foreign
+-- keys (partitioned tables cannot have them), timestamp in the primary key, and one
+-- month partition plus pmax. Partition maintenance (retention_service) splits pmax into
+-- month partitions through [retention] future_partitions months ahead on startup.
 CREATE TABLE AccessLogs (
-    log_id INT AUTO_INCREMENT PRIMARY KEY,
+    log_id INT AUTO_INCREMENT,
     user_id INT NOT NULL,
     action VARCHAR(255) NOT NULL,
     details TEXT,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES Users(user_id)
+    timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    entity_type VARCHAR(32) NULL,
+    entity_id INT NULL,
+    entity_refs JSON NULL,
+    PRIMARY KEY (log_id, timestamp),
+    KEY user_id (user_id)
+)
+PARTITION BY RANGE COLUMNS(timestamp) (
+    PARTITION p202601 VALUES LESS THAN ('2026-02-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
 );
 
 CREATE TABLE Sites (
@@ -59,7 +74,7 @@ CREATE TABLE Visits (
     site_id INT NOT NULL,
     host_employee_id INT NULL,
     purpose_details TEXT,
-    status ENUM('pending','checked_in','checked_out','denied') DEFAULT 'pending',
+    status ENUM('pending','checked_in','checked_out','denied','expired') DEFAULT 'pending',
     checkin_time DATETIME NULL,
     checkout_time DATETIME NULL,
     issue_date DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -78,13 +93,14 @@ CREATE TABLE EmployeeQRCodes (
     FOREIGN KEY (employee_id) REFERENCES Employees(employee_id)
 );
 
+-- 'pooled' rows are pre-minted codes with no visit or expiry yet (migration 0008)
 CREATE TABLE VisitorQRCodes (
     visitor_qr_id INT AUTO_INCREMENT PRIMARY KEY,
     code_value VARCHAR(150) NOT NULL UNIQUE,
-    visit_id INT NOT NULL,
+    visit_id INT NULL,
     issue_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-    expiry_date DATETIME NOT NULL,
-    status ENUM('active','expired','revoked') DEFAULT 'active',
+    expiry_date DATETIME NULL,
+    status ENUM('active','expired','revoked','pooled') DEFAULT 'active',
     FOREIGN KEY (visit_id) REFERENCES Visits(visit_id)
 );
 
@@ -97,18 +113,60 @@ CREATE TABLE Alerts (
 );
 
 CREATE TABLE EmployeeScanLogs (
-    scan_id INT AUTO_INCREMENT PRIMARY KEY,
+    scan_id INT AUTO_INCREMENT,
     emp_qr_id INT NOT NULL,
     scan_status ENUM('signin','signout') DEFAULT 'signin',
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (emp_qr_id) REFERENCES EmployeeQRCodes(emp_qr_id)
+    timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (scan_id, timestamp),
+    KEY emp_qr_id (emp_qr_id)
+)
+PARTITION BY RANGE COLUMNS(timestamp) (
+    PARTITION p202601 VALUES LESS THAN ('2026-02-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
 );
 
 CREATE TABLE VisitorScanLogs (
-    scan_id INT AUTO_INCREMENT PRIMARY KEY,
+    scan_id INT AUTO_INCREMENT,
     visitor_qr_id INT NOT NULL,
     scan_status ENUM('signin','signout') DEFAULT 'signin',
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (visitor_qr_id) REFERENCES VisitorQRCodes(visitor_qr_id)
+    timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (scan_id, timestamp),
+    KEY visitor_qr_id (visitor_qr_id)
+)
+PARTITION BY RANGE COLUMNS(timestamp) (
+    PARTITION p202601 VALUES LESS THAN ('2026-02-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
 );
 
+
+-- Query indexes (see migrations/0003_query_indexes.sql, 0005_access_log_entities.sql, 0007_qr_expiry_indexes.sql and 0009_scheduled_expiry.sql)
+CREATE INDEX idx_esl_qr_timestamp ON EmployeeScanLogs (emp_qr_id, timestamp);
+CREATE INDEX idx_accesslogs_timestamp ON AccessLogs (timestamp);
+CREATE INDEX idx_accesslogs_action_timestamp ON AccessLogs (action, timestamp);
+CREATE INDEX idx_accesslogs_entity ON AccessLogs (entity_type, entity_id, timestamp);
+CREATE INDEX idx_accesslogs_entity_refs ON AccessLogs ((CAST(entity_refs AS CHAR(48) ARRAY)));
+CREATE INDEX idx_visits_status_issue ON Visits (status, issue_date);
+CREATE INDEX idx_visits_visitor_status ON Visits (visitor_id, status);
+CREATE INDEX idx_vqr_visit_status ON VisitorQRCodes (visit_id, status);
+CREATE INDEX idx_vqr_expiry ON VisitorQRCodes (expiry_date);
+CREATE INDEX idx_eqr_expiry ON EmployeeQRCodes (expiry_date);
+CREATE INDEX idx_vqr_status_expiry ON VisitorQRCodes (status, expiry_date);
+CREATE INDEX idx_eqr_status_expiry ON EmployeeQRCodes (status, expiry_date);
+CREATE INDEX idx_alerts_triggered_created ON Alerts (triggered_by, created_at);
+
+CREATE TABLE AuditRollupHourly (
+    hour DATETIME NOT NULL,
+    action VARCHAR(255) NOT NULL,
+    user_id INT NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, action, user_id),
+    INDEX idx_rollup_action_hour (action, hour)
+);
+
+CREATE TABLE RevokedTokens (
+    revocation_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    token_digest CHAR(64) NOT NULL UNIQUE,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_revoked_expires (expires_at)
+);
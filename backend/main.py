@@ -1,11 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse
 import os
 
 from backend.api import auth_api, visitor_api, visit_api, qr_api, scan_api, logs_api, site_api, email_api, attendance_api, user_management_api, alert_api, reports_api
-from backend.api import debug_api
+from backend.api import debug_api, admin_api, exports_api
+from backend.utils import timing
+from backend.utils.auth_state import start_denylist_sync, stop_denylist_sync
+from backend.utils.db_logger import stop_audit_writer
+from backend.services.retention_service import start_partition_maintenance, stop_partition_maintenance
+from backend.services.export_service import start_export_sweeper, stop_export_sweeper
+from backend.services.qr_gc_service import start_qr_image_gc, stop_qr_image_gc
+from backend.services.visitor_qr_pool_service import start_visitor_qr_pool, stop_visitor_qr_pool
+from backend.services.expiry_service import start_expiry_sweep, stop_expiry_sweep
+from backend.utils.mailer import stop_mailer
+from backend.utils.qr_images import shutdown_render_pool
+from backend.utils.settings import get_settings, install_reload_signal_handler
 
 app = FastAPI(title="Visitor Management System API", version="1.0.0")
 
@@ -16,8 +27,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+
+@app.on_event("startup")
+def install_signal_handlers():
+    # `kill -HUP <pid>` re-reads config.ini without a restart
+    install_reload_signal_handler()
+
+
+@app.on_event("startup")
+def start_background_tasks():
+    # Pull token revocations made by other workers every few seconds
+    start_denylist_sync()
+    # Keep month partitions ahead of today and archive expired ones
+    start_partition_maintenance()
+    # Delete background exports once their download window has passed
+    start_export_sweeper()
+    # Delete cached images of expired and revoked QR codes
+    start_qr_image_gc()
+    # Keep a pool of pre-minted visitor QR codes for reception peaks
+    start_visitor_qr_pool()
+    # Mark overdue QR codes and stale pending visits as expired
+    start_expiry_sweep()
+
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    stop_denylist_sync()
+    stop_partition_maintenance()
+    stop_export_sweeper()
+    stop_qr_image_gc()
+    stop_visitor_qr_pool()
+    stop_expiry_sweep()
+    shutdown_render_pool()
+    # Send queued email before the worker exits
+    stop_mailer()
+    # Write any buffered AccessLogs rows before the worker exits
+    stop_audit_writer()
+
+
+# Server-Timing header for kiosk diagnostics: always on when enabled in config,
+# otherwise only for requests that send "X-Server-Timing: 1"
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    token = timing.begin_request()
+    try:
+        response = await call_next(request)
+    finally:
+        spans = timing.end_request(token)
+    if spans and (get_settings().app.server_timing or request.headers.get("x-server-timing") == "1"):
+        response.headers["Server-Timing"] = timing.format_server_timing(spans)
+    return response
+
 # Routers before static/spa fallback
 app.include_router(auth_api.router)
 app.include_router(visitor_api.router)
@@ -32,6 +95,8 @@ app.include_router(user_management_api.router)
 app.include_router(alert_api.router)
 app.include_router(reports_api.router)
 app.include_router(debug_api.router)
+app.include_router(admin_api.router)
+app.include_router(exports_api.router)
 
 @app.get("/health")
 def health():
@@ -49,7 +114,7 @@ def serve_spa(full_path: str):
     api_prefixes = (
         "auth", "visitor", "visit", "qr", "scan", "logs", "site",
         "email", "attendance", "users", "alerts", "reports",
-        "health", "docs", "openapi.json", "redoc"
+        "health", "docs", "openapi.json", "redoc", "admin", "exports"
     )
 
     if full_path and any(full_path == p or full_path.startswith(p + "/") for p in api_prefixes):
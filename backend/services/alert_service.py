@@ -69,7 +69,9 @@ def flag_visitor(visitor_id: int, reason: str, flagged_by_user_id: int) -> Optio
     log_action(
         flagged_by_user_id,
         'flag_visitor',
-        f'Flagged visitor_id={visitor_id}: {reason}'
+        f'Flagged visitor_id={visitor_id}: {reason}',
+        entity=("visitor", visitor_id),
+        refs={"alert": alert["alert_id"] if alert else None, "visitor_qr": visitor_qr_id},
     )
     
     return alert
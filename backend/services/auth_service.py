@@ -1,26 +1,29 @@
-from hashlib import sha256
+import logging
 from typing import Optional, Dict
 
 from backend.database.connection import Database
 from backend.utils.db_logger import log_action
 from backend.utils.validator import validate_username, validate_password
 from backend.utils.jwt_utils import generate_jwt_token
+from backend.utils.auth_state import bump_auth_version, set_auth_version
+from backend.utils.password_hasher import hash_password, verify_password
 
-db = Database()
-
+logger = logging.getLogger(__name__)
 
-def hash_password(password: str) -> str:
-    """Return SHA256 hash of a password."""
-    return sha256(password.encode()).hexdigest()
+db = Database()
 
 
 def login(username: str, password: str) -> Optional[Dict]:
-    """Authenticate a user and return their id/role payload."""
+    """
+    Authenticate a user and return their id/role payload.
+    Legacy SHA-256 hashes are upgraded to the configured KDF on successful login.
+    Raises HasherBusyError if the password hashing pool is saturated.
+    """
     if not validate_username(username) or not validate_password(password):
         return None
 
     sql = """
-        SELECT u.user_id, u.username, u.password_hash, r.role_name
+        SELECT u.user_id, u.username, u.password_hash, u.is_active, u.token_version, r.role_name
         FROM Users u
         JOIN Roles r ON u.role_id = r.role_id
         WHERE u.username = %s
@@ -38,16 +41,26 @@ def login(username: str, password: str) -> Optional[Dict]:
     if not stored_hash:
         return None
 
-    if stored_hash != hash_password(password):
+    matches, needs_rehash = verify_password(password, stored_hash)
+    if not matches:
+        return None
+
+    # Deactivated accounts keep their records but can no longer sign in
+    if not user.get("is_active"):
         return None
 
-    log_action(user["user_id"], "login", f"User {username} logged in")
+    if needs_rehash:
+        _rehash_password(user["user_id"], password)
+
+    log_action(user["user_id"], "login", f"User {username} logged in", entity=("user", user["user_id"]))
     
-    # Generate JWT token
+    # Generate JWT token stamped with the user's current token generation
+    set_auth_version(user["user_id"], user["token_version"])
     token = generate_jwt_token(
         user["user_id"],
         user["username"],
-        user["role_name"]
+        user["role_name"],
+        user["token_version"]
     )
     
     return {
@@ -58,6 +71,17 @@ def login(username: str, password: str) -> Optional[Dict]:
     }
 
 
+def _rehash_password(user_id: int, password: str):
+    """Replace a user's stored hash with one from the current KDF settings."""
+    try:
+        new_hash = hash_password(password)
+    except Exception:
+        # Keep the old hash; the upgrade is retried on the next login
+        logger.warning("Skipped password rehash for user %s", user_id, exc_info=True)
+        return
+    db.execute("UPDATE Users SET password_hash = %s WHERE user_id = %s", (new_hash, user_id))
+
+
 def register_user(username: str, password: str, role_name: str, admin_user_id: int) -> bool:
     """Register a new user (admin only)."""
     if role_name not in ("admin", "security"):
@@ -80,7 +104,7 @@ def register_user(username: str, password: str, role_name: str, admin_user_id: i
     """
     success = db.execute(insert_sql, (username, hash_password(password), role["role_id"]))
     if success:
-        log_action(admin_user_id, "register_user", f"Registered user {username} ({role_name})")
+        log_action(admin_user_id, "register_user", f"Registered user {username} ({role_name})", sync=True)
     return success
 
 
@@ -88,6 +112,8 @@ def deactivate_user(user_id: int, admin_user_id: int) -> bool:
     """
     Deactivate a user (admin only). Prevents self-deactivation.
     This preserves all database records (Users and AccessLogs) for audit purposes.
+    The user can no longer log in, and their outstanding tokens are rejected by every
+    worker within one denylist sync interval (immediately on this worker).
     
     Note: EmployeeQRCodes revocation requires a Users->Employees relationship.
     Since the current schema doesn't have a direct FK between Users and Employees,
@@ -97,16 +123,23 @@ def deactivate_user(user_id: int, admin_user_id: int) -> bool:
     if user_id == admin_user_id:
         return False
 
-    user = db.fetchone("SELECT username FROM Users WHERE user_id = %s", (user_id,))
-    if not user:
+    user = db.fetchone("SELECT username, is_active FROM Users WHERE user_id = %s", (user_id,))
+    if not user or not user["is_active"]:
         return False
 
     # Note: EmployeeQRCodes revocation would require a Users->Employees relationship
     # which is not present in the current schema. This is intentional as Users and Employees
     # are separate entities in this system.
 
+    if not db.execute("UPDATE Users SET is_active = FALSE WHERE user_id = %s", (user_id,)):
+        return False
+
+    # Invalidate the user's outstanding tokens
+    bump_auth_version(user_id)
+
     # Log the deactivation action (user record remains in database for audit)
-    log_action(admin_user_id, "deactivate_user", f"Deactivated user {user['username']} (id={user_id})")
+    log_action(admin_user_id, "deactivate_user", f"Deactivated user {user['username']} (id={user_id})",
+               sync=True, entity=("user", user_id))
     return True
 
 
@@ -6,42 +6,47 @@ from email.mime.base import MIMEBase
 from email import encoders
 from datetime import datetime
 from typing import Optional, Dict, List
-import os
-import configparser
 
 from backend.database.connection import Database
 from backend.utils.db_logger import log_action
+from backend.utils.qr_images import DEFAULT_SCALE, render_qr
+from backend.utils.settings import get_settings
 
 db = Database()
 
-# Load email config
-config = configparser.ConfigParser()
-config.read(os.path.join(os.path.dirname(__file__), '../config/config.ini'))
-
 
 def _get_email_config() -> Optional[Dict]:
-    """Get email configuration from config.ini"""
-    try:
-        return {
-            'smtp_server': config.get('email', 'smtp_server', fallback=None),
-            'smtp_port': config.getint('email', 'smtp_port', fallback=587),
-            'sender_email': config.get('email', 'sender_email', fallback=None),
-            'sender_password': config.get('email', 'sender_password', fallback=None),
-            'admin_email': config.get('email', 'admin_email', fallback=None),
-        }
-    except:
-        return None
+    """Get email configuration from the cached settings"""
+    email_settings = get_settings().email
+    return {
+        'smtp_server': email_settings.smtp_server,
+        'smtp_port': email_settings.smtp_port,
+        'sender_email': email_settings.sender_email,
+        'sender_password': email_settings.sender_password,
+        'admin_email': email_settings.admin_email,
+    }
 
 
-def send_qr_code_email(recipient_email: str, visitor_id: int, qr_code_data: str, requested_by_user_id: int) -> Dict:
+def send_qr_code_email(
+    recipient_email: str,
+    visitor_id: int,
+    qr_code_data: str,
+    requested_by_user_id: int,
+    image_format: str = "png",
+    scale: int = DEFAULT_SCALE,
+) -> Dict:
     """
-    Generate QR code, convert to PNG, and email as attachment.
+    Render the QR code (1-bit PNG or SVG) and email it as an attachment.
+    qr_code_data comes from the client and need not be an issued code, so the image is
+    rendered directly rather than through the shared image cache.
     
     Args:
         recipient_email: Email address to send to
         visitor_id: Visitor ID for logging
         qr_code_data: QR code data string
         requested_by_user_id: User ID requesting the email
+        image_format: "png" or "svg"
+        scale: Pixels per QR module
     
     Returns:
         Dict with success status and message
@@ -54,19 +59,7 @@ def send_qr_code_email(recipient_email: str, visitor_id: int, qr_code_data: str,
         }
     
     try:
-        import qrcode
-        from io import BytesIO
-        
-        # Generate QR code image
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(qr_code_data)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to bytes
-        img_buffer = BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
+        image = render_qr(qr_code_data, image_format, scale)
         
         # Create email
         msg = MIMEMultipart()
@@ -91,12 +84,12 @@ def send_qr_code_email(recipient_email: str, visitor_id: int, qr_code_data: str,
         msg.attach(MIMEText(body, 'plain'))
         
         # Attach QR code image
-        attachment = MIMEBase('application', 'octet-stream')
-        attachment.set_payload(img_buffer.read())
+        attachment = MIMEBase('image', 'svg+xml' if image_format == 'svg' else 'png')
+        attachment.set_payload(image)
         encoders.encode_base64(attachment)
         attachment.add_header(
             'Content-Disposition',
-            f'attachment; filename=visitor_qr_{visitor_id}.png'
+            f'attachment; filename=visitor_qr_{visitor_id}.{image_format}'
         )
         msg.attach(attachment)
         
@@ -111,7 +104,8 @@ def send_qr_code_email(recipient_email: str, visitor_id: int, qr_code_data: str,
         log_action(
             requested_by_user_id,
             'send_qr_email',
-            f'Sent QR code email to {recipient_email} for visitor_id={visitor_id}'
+            f'Sent QR code email to {recipient_email} for visitor_id={visitor_id}',
+            entity=("visitor", visitor_id),
         )
         
         return {
@@ -208,7 +202,8 @@ def send_late_arrival_alert(employee_id: int, late_count: int, salary_estimate:
         log_action(
             requested_by_user_id,
             'send_late_alert',
-            f'Sent late arrival alert for employee_id={employee_id}, late_count={late_count}'
+            f'Sent late arrival alert for employee_id={employee_id}, late_count={late_count}',
+            entity=("employee", employee_id),
         )
         
         return {
@@ -248,7 +243,7 @@ def check_and_send_late_alerts(requested_by_user_id: int) -> Dict:
             INNER JOIN EmployeeScanLogs esl ON eqr.emp_qr_id = esl.emp_qr_id
             WHERE esl.scan_status = 'signin'
               AND TIME(esl.timestamp) > '09:00:00'
-              AND DATE(esl.timestamp) >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+              AND esl.timestamp >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
             GROUP BY e.employee_id, e.name
             HAVING late_count >= 3
         """)
@@ -263,12 +258,14 @@ def check_and_send_late_alerts(requested_by_user_id: int) -> Dict:
                         (SELECT timestamp FROM EmployeeScanLogs 
                          WHERE emp_qr_id = eqr.emp_qr_id 
                            AND scan_status = 'signin' 
-                           AND DATE(timestamp) = DATE(esl.timestamp)
+                           AND timestamp >= DATE(esl.timestamp)
+                           AND timestamp < DATE(esl.timestamp) + INTERVAL 1 DAY
                          ORDER BY timestamp ASC LIMIT 1),
                         (SELECT timestamp FROM EmployeeScanLogs 
                          WHERE emp_qr_id = eqr.emp_qr_id 
                            AND scan_status = 'signout' 
-                           AND DATE(timestamp) = DATE(esl.timestamp)
+                           AND timestamp >= DATE(esl.timestamp)
+                           AND timestamp < DATE(esl.timestamp) + INTERVAL 1 DAY
                          ORDER BY timestamp DESC LIMIT 1)
                     )) as total_hours
                 FROM Employees e
@@ -277,7 +274,7 @@ def check_and_send_late_alerts(requested_by_user_id: int) -> Dict:
                 WHERE e.employee_id = %s
                   AND esl.scan_status = 'signin'
                   AND TIME(esl.timestamp) > '09:00:00'
-                  AND DATE(esl.timestamp) >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+                  AND esl.timestamp >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
                 GROUP BY e.employee_id, e.hourly_rate
             """, (emp['employee_id'],))
             
@@ -0,0 +1,147 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from backend.database.connection import Database
+from backend.utils.background import PeriodicTask
+from backend.utils.events import QR_CODES_EXPIRED, VISITS_EXPIRED, publish
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+db = Database()
+
+# QR code tables swept for expiry: (kind used in events, primary key)
+QR_TABLES = {
+    "VisitorQRCodes": ("visitor", "visitor_qr_id"),
+    "EmployeeQRCodes": ("employee", "emp_qr_id"),
+}
+
+# Only one worker at a time runs the sweep
+_SWEEP_LOCK = "vms_expiry_sweep"
+
+_last_run: Optional[Dict] = None
+
+
+def _placeholders(values: List) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def expire_qr_codes(table: str, now: datetime, batch_size: int) -> int:
+    """
+    Flip active codes whose expiry_date has passed to 'expired', batch_size rows per
+    statement (through the (status, expiry_date) index), publishing QR_CODES_EXPIRED
+    for each batch. Returns the number of codes expired.
+    """
+    kind, key = QR_TABLES[table]
+    expired = 0
+    while True:
+        rows = db.fetchall(f"""
+            SELECT {key} AS qr_id, code_value
+            FROM {table}
+            WHERE status = 'active' AND expiry_date < %s
+            ORDER BY expiry_date
+            LIMIT %s
+        """, (now, batch_size))
+        if not rows:
+            return expired
+        ids = [row["qr_id"] for row in rows]
+        # Re-checking status keeps a concurrent revocation from being overwritten
+        if not db.execute(
+            f"UPDATE {table} SET status = 'expired' WHERE {key} IN ({_placeholders(ids)}) AND status = 'active'",
+            tuple(ids),
+        ):
+            logger.error("Failed to expire %d %s rows", len(ids), table)
+            return expired
+        expired += len(ids)
+        publish(QR_CODES_EXPIRED, {"kind": kind, "ids": ids, "code_values": [row["code_value"] for row in rows]})
+        if len(rows) < batch_size:
+            return expired
+
+
+def expire_pending_visits(cutoff: datetime, batch_size: int) -> int:
+    """
+    Mark visits that were issued before cutoff, never checked in and have no active QR
+    code as 'expired', batch_size rows per statement, publishing VISITS_EXPIRED per batch.
+    """
+    expired = 0
+    while True:
+        rows = db.fetchall("""
+            SELECT v.visit_id
+            FROM Visits v
+            WHERE v.status = 'pending' AND v.issue_date < %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM VisitorQRCodes q WHERE q.visit_id = v.visit_id AND q.status = 'active'
+              )
+            ORDER BY v.issue_date
+            LIMIT %s
+        """, (cutoff, batch_size))
+        if not rows:
+            return expired
+        ids = [row["visit_id"] for row in rows]
+        if not db.execute(
+            f"UPDATE Visits SET status = 'expired' WHERE visit_id IN ({_placeholders(ids)}) AND status = 'pending'",
+            tuple(ids),
+        ):
+            logger.error("Failed to expire %d visits", len(ids))
+            return expired
+        expired += len(ids)
+        publish(VISITS_EXPIRED, {"ids": ids})
+        if len(rows) < batch_size:
+            return expired
+
+
+def run_expiry_sweep() -> Optional[Dict]:
+    """
+    Expire overdue QR codes, then stale pending visits (whose codes were expired first).
+    Returns a summary, or None if another worker is already sweeping.
+    """
+    global _last_run
+    expiry = get_settings().expiry
+    with db.named_lock(_SWEEP_LOCK) as acquired:
+        if not acquired:
+            return None
+        started = datetime.now()
+        summary = {"qr_codes": {}, "visits": 0}
+        for table in QR_TABLES:
+            summary["qr_codes"][table] = expire_qr_codes(table, started, expiry.batch_size)
+        summary["visits"] = expire_pending_visits(
+            started - timedelta(hours=expiry.pending_visit_hours), expiry.batch_size
+        )
+        summary["started_at"] = started.isoformat()
+        summary["duration_ms"] = round((datetime.now() - started).total_seconds() * 1000, 1)
+        if any(summary["qr_codes"].values()) or summary["visits"]:
+            logger.info("Expiry sweep: %s", summary)
+        _last_run = summary
+        return summary
+
+
+def get_expiry_sweep_stats() -> Dict:
+    """Settings and the last sweep this worker ran."""
+    expiry = get_settings().expiry
+    return {
+        "enabled": expiry.enabled,
+        "interval_seconds": expiry.interval_seconds,
+        "batch_size": expiry.batch_size,
+        "running": bool(_sweep_task and _sweep_task.running),
+        "last_run": _last_run,
+    }
+
+
+_sweep_task: Optional[PeriodicTask] = None
+
+
+def start_expiry_sweep():
+    """Run the expiry sweep now and then every [expiry] interval_seconds (if enabled)."""
+    global _sweep_task
+    expiry = get_settings().expiry
+    if not expiry.enabled:
+        return
+    if _sweep_task is None:
+        _sweep_task = PeriodicTask("expiry-sweep", expiry.interval_seconds, run_expiry_sweep)
+    _sweep_task.start()
+
+
+def stop_expiry_sweep():
+    if _sweep_task is not None:
+        _sweep_task.stop()
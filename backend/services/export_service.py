@@ -0,0 +1,383 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from backend.services.logs_service import (
+    ACCESS_LOG_EXPORT_COLUMNS,
+    SCAN_HISTORY_EXPORT_COLUMNS,
+    SCAN_HISTORY_TYPES,
+    iter_access_logs,
+    iter_scan_history,
+)
+from backend.services.site_service import export_salary_report_to_excel
+from backend.utils.background import PeriodicTask
+from backend.utils.exporters import EXPORT_FORMATS, iter_csv, iter_ndjson, write_xlsx
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXPORT_KINDS = ("access_logs", "scan_history", "salary")
+
+# Jobs that still hold a worker or a queue slot
+ACTIVE_STATUSES = ("queued", "running")
+
+# Progress is written to the job's metadata file at most this often
+PROGRESS_SAVE_SECONDS = 2.0
+
+# Rows counted locally before the job's shared row count is updated under the lock
+PROGRESS_ROWS = 1000
+
+
+class ExportBusyError(Exception):
+    """Raised when max_pending export jobs are already queued or running."""
+
+
+def normalize_params(kind: str, params: Dict) -> Tuple[str, Dict]:
+    """
+    Validate export parameters and keep only those that apply to `kind`.
+    Returns (format, params). Raises ValueError with a user-facing message.
+    """
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"kind must be one of {', '.join(EXPORT_KINDS)}")
+
+    fmt = params.get("format") or ("csv" if kind == "scan_history" else "xlsx")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if kind == "salary" and fmt != "xlsx":
+        raise ValueError("Salary reports are only available as xlsx")
+
+    clean = {}
+    for name in ("start_date", "end_date"):
+        if params.get(name):
+            try:
+                datetime.strptime(params[name], '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f"Invalid {name} format. Use YYYY-MM-DD")
+            clean[name] = params[name]
+
+    if kind == "access_logs" and params.get("action"):
+        clean["action"] = params["action"]
+    elif kind == "scan_history":
+        scan_type = params.get("scan_type") or "employee"
+        if scan_type not in SCAN_HISTORY_TYPES:
+            raise ValueError("scan_type must be employee or visitor")
+        clean["scan_type"] = scan_type
+    elif kind == "salary":
+        if not params.get("employee_id"):
+            raise ValueError("employee_id is required for salary exports")
+        clean["employee_id"] = int(params["employee_id"])
+
+    return fmt, clean
+
+
+def _dedupe_key(kind: str, fmt: str, params: Dict) -> str:
+    return hashlib.sha256(json.dumps([kind, fmt, params], sort_keys=True).encode()).hexdigest()
+
+
+def _filename(kind: str, fmt: str, params: Dict) -> str:
+    if kind == "access_logs":
+        base = "access_logs"
+    elif kind == "scan_history":
+        base = f"{params['scan_type']}_scans"
+    else:
+        base = f"salary_report_employee_{params['employee_id']}"
+    start_date, end_date = params.get("start_date"), params.get("end_date")
+    if start_date and end_date:
+        base += f"_{start_date}_to_{end_date}"
+    elif start_date:
+        base += f"_from_{start_date}"
+    elif end_date:
+        base += f"_until_{end_date}"
+    return f"{base}.{fmt}"
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ExportJobManager:
+    """
+    Runs export jobs on a bounded thread pool and keeps their files in spool_dir.
+    Each job has <job_id>.json (status, progress, timestamps) next to its artifact, so
+    status and downloads work from any worker process sharing the spool directory.
+    Identical requests (same kind, format and parameters) made while a job is queued or
+    running in this process are attached to that job instead of starting another.
+    """
+
+    def __init__(self, workers: int, max_pending: int, spool_dir: str, ttl_hours: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.spool_dir = spool_dir
+        self.ttl = timedelta(hours=ttl_hours)
+        os.makedirs(spool_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export-job')
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._inflight: Dict[str, str] = {}
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    # Paths and persistence
+
+    def _meta_path(self, job_id: str) -> str:
+        return os.path.join(self.spool_dir, f"{job_id}.json")
+
+    def artifact_path(self, job: Dict) -> str:
+        return os.path.join(self.spool_dir, f"{job['job_id']}.{job['format']}")
+
+    def _save(self, job: Dict):
+        path = self._meta_path(job["job_id"])
+        with open(path + ".tmp", "w") as f:
+            json.dump(job, f)
+        os.replace(path + ".tmp", path)
+
+    def _load(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(self._meta_path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # Jobs
+
+    def submit(self, kind: str, fmt: str, params: Dict, user_id: int) -> Tuple[Dict, bool]:
+        """Queue an export, or join an identical one in flight. Returns (job, deduplicated)."""
+        key = _dedupe_key(kind, fmt, params)
+        with self._lock:
+            job_id = self._inflight.get(key)
+            if job_id:
+                job = self._jobs[job_id]
+                if user_id not in job["requested_by"]:
+                    job["requested_by"].append(user_id)
+                    self._save(job)
+                self.deduplicated += 1
+                return dict(job), True
+
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                raise ExportBusyError("Too many export jobs are queued")
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "kind": kind,
+                "format": fmt,
+                "params": params,
+                "filename": _filename(kind, fmt, params),
+                "status": "queued",
+                "rows": 0,
+                "bytes": None,
+                "error": None,
+                "requested_by": [user_id],
+                "created_at": datetime.now().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "expires_at": None,
+                "pid": os.getpid(),
+            }
+            self._save(job)
+            self._jobs[job["job_id"]] = job
+            self._inflight[key] = job["job_id"]
+            self.submitted += 1
+
+        self._executor.submit(self._run, job["job_id"], key)
+        return dict(job), False
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        return self._load(job_id)
+
+    def _count_rows(self, job: Dict, rows: Iterable) -> Iterator:
+        """
+        Count rows into job["rows"]. The count is kept locally and published under the
+        lock every PROGRESS_ROWS rows (and at the end), so readers see a consistent job.
+        """
+        last_save = time.monotonic()
+        counted = 0
+        try:
+            for row in rows:
+                counted += 1
+                yield row
+                if counted % PROGRESS_ROWS == 0:
+                    now = time.monotonic()
+                    with self._lock:
+                        job["rows"] = counted
+                        if now - last_save >= PROGRESS_SAVE_SECONDS:
+                            self._save(job)
+                            last_save = now
+        finally:
+            with self._lock:
+                job["rows"] = counted
+
+    def _build(self, job: Dict, fileobj):
+        params = job["params"]
+        if job["kind"] == "salary":
+            excel_file = export_salary_report_to_excel(
+                params["employee_id"], params.get("start_date"), params.get("end_date")
+            )
+            if excel_file is None:
+                raise ValueError("Employee not found or invalid date range")
+            shutil.copyfileobj(excel_file, fileobj)
+            return
+
+        if job["kind"] == "access_logs":
+            title, columns = "Access Logs", ACCESS_LOG_EXPORT_COLUMNS
+            # Background jobs wait for a streaming connection rather than fail
+            rows = iter_access_logs(
+                params.get("start_date"), params.get("end_date"), params.get("action"), wait_seconds=None
+            )
+        else:
+            scan_type = params["scan_type"]
+            title, columns = f"{scan_type.capitalize()} Scans", SCAN_HISTORY_EXPORT_COLUMNS[scan_type]
+            rows = iter_scan_history(scan_type, params.get("start_date"), params.get("end_date"), wait_seconds=None)
+        rows = self._count_rows(job, rows)
+
+        if job["format"] == "xlsx":
+            keys = [key for key, _ in columns]
+            write_xlsx(title, [header for _, header in columns], (tuple(row[key] for key in keys) for row in rows), fileobj)
+            return
+        encode = iter_csv if job["format"] == "csv" else iter_ndjson
+        for chunk in encode(columns, rows):
+            fileobj.write(chunk)
+
+    def _run(self, job_id: str, key: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["started_at"] = datetime.now().isoformat()
+            self._save(job)
+
+        path = self.artifact_path(job)
+        try:
+            with open(path + ".part", "wb") as f:
+                self._build(job, f)
+            os.replace(path + ".part", path)
+            status, error = "done", None
+        except Exception as e:
+            logger.exception("Export job %s (%s) failed", job_id, job["kind"])
+            if os.path.exists(path + ".part"):
+                os.remove(path + ".part")
+            status, error = "failed", str(e) if isinstance(e, ValueError) else "Export failed"
+
+        finished = datetime.now()
+        with self._lock:
+            job["status"] = status
+            job["error"] = error
+            job["bytes"] = os.path.getsize(path) if status == "done" else None
+            job["finished_at"] = finished.isoformat()
+            job["expires_at"] = (finished + self.ttl).isoformat()
+            self._save(job)
+            self._inflight.pop(key, None)
+            if status == "done":
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def sweep(self) -> int:
+        """
+        Delete finished jobs whose TTL has passed, and mark jobs left queued or running
+        by a process that no longer exists as failed. Returns the number of jobs deleted.
+        """
+        now = datetime.now()
+        removed = 0
+        for meta_path in glob.glob(os.path.join(self.spool_dir, "*.json")):
+            job = self._load(os.path.basename(meta_path)[:-5])
+            if job is None:
+                continue
+
+            if job["status"] in ACTIVE_STATUSES:
+                with self._lock:
+                    ours = job["job_id"] in self._jobs
+                # A matching pid without the job in memory means the pid was reused after a restart
+                stale = not ours and (job.get("pid") == os.getpid() or not _pid_alive(job.get("pid")))
+                if stale:
+                    job["status"] = "failed"
+                    job["error"] = "Interrupted by a restart; please request the export again"
+                    job["finished_at"] = now.isoformat()
+                    job["expires_at"] = (now + self.ttl).isoformat()
+                    self._save(job)
+                continue
+
+            if job.get("expires_at") and datetime.fromisoformat(job["expires_at"]) <= now:
+                for path in (self.artifact_path(job), self.artifact_path(job) + ".part", meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                with self._lock:
+                    self._jobs.pop(job["job_id"], None)
+                removed += 1
+
+        if removed:
+            logger.info("Removed %d expired export job(s)", removed)
+        return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_manager: Optional[ExportJobManager] = None
+_manager_lock = threading.Lock()
+_sweep_task: Optional[PeriodicTask] = None
+
+
+def get_export_manager() -> ExportJobManager:
+    """Create the job manager on first use, so its threads start in the worker process."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                exports = get_settings().exports
+                _manager = ExportJobManager(exports.workers, exports.max_pending, exports.spool_dir, exports.ttl_hours)
+    return _manager
+
+
+def start_export_sweeper():
+    """Remove expired exports every [exports] sweep_interval_minutes."""
+    global _sweep_task
+    if _sweep_task is None:
+        interval = get_settings().exports.sweep_interval_minutes * 60
+        _sweep_task = PeriodicTask("export-sweeper", interval, lambda: get_export_manager().sweep())
+    _sweep_task.start()
+
+
+def stop_export_sweeper():
+    if _sweep_task is not None:
+        _sweep_task.stop()
+    if _manager is not None:
+        _manager.shutdown()
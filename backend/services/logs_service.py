@@ -1,134 +1,316 @@
-from datetime import datetime
-from typing import List, Dict, Optional
-from io import BytesIO
-
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Iterator, List, Dict, Optional, Tuple
 
 from backend.database.connection import Database
+from backend.utils.db_logger import entity_ref
 
 db = Database()
 
 
-def get_access_logs(start_date: Optional[str] = None, end_date: Optional[str] = None, action: Optional[str] = None) -> List[Dict]:
-    """
-    Get access logs from AccessLogs table with optional filters.
-    
-    Args:
-        start_date: Start date filter (YYYY-MM-DD format)
-        end_date: End date filter (YYYY-MM-DD format)
-        action: Action type filter (e.g., 'login', 'visitor_checkin')
-    
-    Returns:
-        List of log records with user and action information
+def _access_log_filters(start_date: Optional[str], end_date: Optional[str], action: Optional[str]) -> Tuple[str, List]:
     """
-    base_sql = """
-        SELECT 
-            al.log_id,
-            al.user_id,
-            u.username,
-            al.action,
-            al.details,
-            al.timestamp
-        FROM AccessLogs al
-        JOIN Users u ON al.user_id = u.user_id
-        WHERE 1=1
+    WHERE clause for AccessLogs filters. Dates are applied as half-open timestamp ranges
+    (start_date <= timestamp < end_date + 1 day) so the timestamp index can be used.
     """
-    
+    clauses = []
     params = []
-    
+
     if start_date:
-        base_sql += " AND DATE(al.timestamp) >= %s"
-        params.append(start_date)
-    
+        clauses.append("al.timestamp >= %s")
+        params.append(datetime.strptime(start_date, '%Y-%m-%d'))
+
     if end_date:
-        base_sql += " AND DATE(al.timestamp) <= %s"
-        params.append(end_date)
-    
+        clauses.append("al.timestamp < %s")
+        params.append(datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+
     if action:
-        base_sql += " AND al.action = %s"
+        clauses.append("al.action = %s")
         params.append(action)
-    
-    base_sql += " ORDER BY al.timestamp DESC LIMIT 1000"
-    
-    logs = db.fetchall(base_sql, tuple(params))
-    return logs
 
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def encode_log_cursor(timestamp: datetime, log_id: int) -> str:
+    """Opaque cursor pointing just past a (timestamp, log_id) row."""
+    raw = json.dumps([timestamp.isoformat(), log_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_log_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_log_cursor. Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, log_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+_ACCESS_LOG_SELECT = """
+    SELECT 
+        al.log_id,
+        al.user_id,
+        u.username,
+        al.action,
+        al.details,
+        al.timestamp
+    FROM AccessLogs al
+    JOIN Users u ON al.user_id = u.user_id
+    WHERE 1=1
+"""
 
-def export_access_logs_to_excel(start_date: Optional[str] = None, end_date: Optional[str] = None, action: Optional[str] = None) -> BytesIO:
+
+def iter_access_logs(start_date: Optional[str] = None, end_date: Optional[str] = None, action: Optional[str] = None,
+                     wait_seconds: Optional[float] = 0.0) -> Iterator[Dict]:
     """
-    Export access logs to Excel format.
-    
+    Stream access logs matching the filters, newest first, from a server-side cursor.
+    There is no row cap; callers should consume rows incrementally. Raises
+    StreamsBusyError if no streaming connection frees up within wait_seconds.
+
     Args:
         start_date: Start date filter (YYYY-MM-DD format)
         end_date: End date filter (YYYY-MM-DD format)
         action: Action type filter (e.g., 'login', 'visitor_checkin')
-    
-    Returns:
-        BytesIO object containing the Excel file
+        wait_seconds: How long to wait for a streaming connection (None waits indefinitely)
     """
-    # Get logs using the same query logic
-    logs = get_access_logs(start_date, end_date, action)
-    
-    # Create workbook and worksheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Access Logs"
-    
-    # Define header row
-    headers = ["Log ID", "User ID", "Username", "Action", "Details", "Timestamp"]
-    
-    # Style for header row
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Write data rows
-    for row_num, log in enumerate(logs, 2):
-        ws.cell(row=row_num, column=1, value=log.get('log_id', ''))
-        ws.cell(row=row_num, column=2, value=log.get('user_id', ''))
-        ws.cell(row=row_num, column=3, value=log.get('username', ''))
-        ws.cell(row=row_num, column=4, value=log.get('action', ''))
-        ws.cell(row=row_num, column=5, value=log.get('details', ''))
-        
-        # Format timestamp
-        timestamp = log.get('timestamp')
-        if timestamp:
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            elif isinstance(timestamp, datetime):
-                pass
-            else:
-                timestamp = str(timestamp)
-            ws.cell(row=row_num, column=6, value=timestamp)
-        else:
-            ws.cell(row=row_num, column=6, value='')
-    
-    # Auto-adjust column widths
-    for col_num, header in enumerate(headers, 1):
-        column_letter = get_column_letter(col_num)
-        max_length = len(header)
-        
-        # Find max length in column
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=col_num, max_col=col_num):
-            if row[0].value:
-                max_length = max(max_length, len(str(row[0].value)))
-        
-        # Set column width (with some padding)
-        ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
-    
-    # Save to BytesIO
-    excel_file = BytesIO()
-    wb.save(excel_file)
-    excel_file.seek(0)
-    
-    return excel_file
+    where_sql, params = _access_log_filters(start_date, end_date, action)
+    sql = _ACCESS_LOG_SELECT + where_sql + " ORDER BY al.timestamp DESC, al.log_id DESC"
+    return db.iter_rows(sql, tuple(params), wait_seconds=wait_seconds)
+
+
+def _keyset_page(select_sql: str, where_sql: str, params: List, cursor: Optional[str], page_size: int) -> Dict:
+    """Run select_sql + where_sql newest first, one keyset page at a time."""
+    params = list(params)
+    if cursor:
+        after_timestamp, after_log_id = decode_log_cursor(cursor)
+        # Expanded form of (timestamp, log_id) < (%s, %s) so MySQL can range-scan on timestamp
+        where_sql += " AND al.timestamp <= %s AND (al.timestamp < %s OR al.log_id < %s)"
+        params.extend([after_timestamp, after_timestamp, after_log_id])
+
+    sql = select_sql + where_sql + " ORDER BY al.timestamp DESC, al.log_id DESC LIMIT %s"
+    params.append(page_size + 1)
+    rows = db.fetchall(sql, tuple(params))
+
+    has_more = len(rows) > page_size
+    logs = rows[:page_size]
+    next_cursor = None
+    if has_more:
+        last = logs[-1]
+        next_cursor = encode_log_cursor(last["timestamp"], last["log_id"])
+
+    return {"logs": logs, "has_more": has_more, "next_cursor": next_cursor}
+
 
+def get_access_logs_page(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    action: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 100,
+) -> Dict:
+    """
+    One page of access logs, newest first, using keyset pagination.
+    The cursor encodes the (timestamp, log_id) of the last row on the previous page, so
+    every page is a range scan on the timestamp index no matter how deep it is.
+    Returns {"logs", "has_more", "next_cursor"}. Raises ValueError for a malformed cursor.
+    """
+    where_sql, params = _access_log_filters(start_date, end_date, action)
+    return _keyset_page(_ACCESS_LOG_SELECT, where_sql, params, cursor, page_size)
+
+
+_ENTITY_LOG_SELECT = """
+    SELECT 
+        al.log_id,
+        al.user_id,
+        u.username,
+        al.action,
+        al.details,
+        al.timestamp,
+        al.entity_type,
+        al.entity_id,
+        al.entity_refs
+    FROM AccessLogs al
+    JOIN Users u ON al.user_id = u.user_id
+    WHERE 1=1
+"""
+
+
+def get_entity_history(
+    entity_type: str,
+    entity_id: int,
+    primary_only: bool = False,
+    cursor: Optional[str] = None,
+    page_size: int = 100,
+) -> Dict:
+    """
+    Audit history of one entity, newest first, paged like get_access_logs_page.
+    By default includes every row that references the entity (multi-valued index on
+    entity_refs); primary_only restricts to rows where it is the main subject.
+    """
+    if primary_only:
+        where_sql = " AND al.entity_type = %s AND al.entity_id = %s"
+        params = [entity_type, entity_id]
+    else:
+        where_sql = " AND %s MEMBER OF (al.entity_refs)"
+        params = [entity_ref(entity_type, entity_id)]
+
+    page = _keyset_page(_ENTITY_LOG_SELECT, where_sql, params, cursor, page_size)
+    for log in page["logs"]:
+        refs = log.get("entity_refs")
+        log["entity_refs"] = json.loads(refs) if isinstance(refs, (str, bytes)) else (refs or [])
+    return page
+
+
+def get_activity(
+    start: datetime,
+    end: datetime,
+    bucket: str = "hour",
+    action: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> Dict:
+    """
+    Time-bucketed audit counts for [start, end) from AuditRollupHourly, plus per-action facets.
+    Reads at most one rollup row per hour, action and user, regardless of AccessLogs volume.
+    """
+    where_sql = " WHERE hour >= %s AND hour < %s"
+    params: List = [start, end]
+    if action:
+        where_sql += " AND action = %s"
+        params.append(action)
+    if user_id is not None:
+        where_sql += " AND user_id = %s"
+        params.append(user_id)
+
+    bucket_expr = "hour" if bucket == "hour" else "CAST(DATE(hour) AS DATETIME)"
+    buckets = db.fetchall(
+        f"SELECT {bucket_expr} AS bucket, SUM(count) AS count FROM AuditRollupHourly"
+        f"{where_sql} GROUP BY bucket ORDER BY bucket",
+        tuple(params),
+    )
+    facets = db.fetchall(
+        f"SELECT action, SUM(count) AS count FROM AuditRollupHourly"
+        f"{where_sql} GROUP BY action ORDER BY count DESC",
+        tuple(params),
+    )
+    return {
+        "buckets": [{"bucket": row["bucket"], "count": int(row["count"])} for row in buckets],
+        "actions": [{"action": row["action"], "count": int(row["count"])} for row in facets],
+        "total": sum(int(row["count"]) for row in facets),
+    }
+
+
+# An hour's rollup is only rebuilt once the hour ended this long ago. The audit writer
+# inserts AccessLogs rows and their rollup increments in separate transactions a flush
+# interval after the action, so a rebuild of an hour still being written could count a
+# row twice (once from AccessLogs, once from its late increment).
+ROLLUP_SETTLE_SECONDS = 60
+
+
+def settled_rollup_end(now: Optional[datetime] = None) -> datetime:
+    """Start of the earliest hour that may still receive audit writes."""
+    now = now or datetime.now()
+    return (now - timedelta(seconds=ROLLUP_SETTLE_SECONDS)).replace(minute=0, second=0, microsecond=0)
+
+
+def rebuild_activity_rollups(start: datetime, end: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Recompute AuditRollupHourly for [start, end) from AccessLogs, e.g. after rollup write
+    failures. start and end are truncated to whole hours and end is clamped to
+    settled_rollup_end(), so hours still receiving writes are never rebuilt. The delete and
+    re-insert run in one transaction, so readers never see the range empty.
+    Returns the (start, end) actually rebuilt. Raises ValueError if no settled hour is in
+    the range; returns None if the rebuild failed.
+    """
+    start = start.replace(minute=0, second=0, microsecond=0)
+    end = min(end.replace(minute=0, second=0, microsecond=0), settled_rollup_end())
+    if start >= end:
+        raise ValueError("The range is still receiving audit writes; rebuild it after the hour has ended")
+    if not db.execute_transaction([
+        ("DELETE FROM AuditRollupHourly WHERE hour >= %s AND hour < %s", (start, end)),
+        ("""
+        INSERT INTO AuditRollupHourly (hour, action, user_id, count)
+        SELECT DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:00:00'), action, user_id, COUNT(*)
+        FROM AccessLogs
+        WHERE timestamp >= %s AND timestamp < %s
+        GROUP BY DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:00:00'), action, user_id
+        ON DUPLICATE KEY UPDATE count = VALUES(count)
+        """, (start, end)),
+    ]):
+        return None
+    return start, end
+
+
+# (row key, export header) for access log downloads
+ACCESS_LOG_EXPORT_COLUMNS = [
+    ("log_id", "Log ID"),
+    ("user_id", "User ID"),
+    ("username", "Username"),
+    ("action", "Action"),
+    ("details", "Details"),
+    ("timestamp", "Timestamp"),
+]
+
+SCAN_HISTORY_TYPES = ("employee", "visitor")
+
+SCAN_HISTORY_EXPORT_COLUMNS = {
+    "employee": [
+        ("scan_id", "Scan ID"),
+        ("timestamp", "Timestamp"),
+        ("scan_status", "Status"),
+        ("emp_qr_id", "QR ID"),
+        ("employee_id", "Employee ID"),
+        ("employee_name", "Employee"),
+        ("department_id", "Department ID"),
+    ],
+    "visitor": [
+        ("scan_id", "Scan ID"),
+        ("timestamp", "Timestamp"),
+        ("scan_status", "Status"),
+        ("visitor_qr_id", "QR ID"),
+        ("visit_id", "Visit ID"),
+        ("visitor_id", "Visitor ID"),
+        ("visitor_name", "Visitor"),
+        ("site_id", "Site ID"),
+    ],
+}
+
+_SCAN_HISTORY_SELECT = {
+    "employee": """
+        SELECT s.scan_id, s.timestamp, s.scan_status, s.emp_qr_id,
+               e.employee_id, e.name AS employee_name, e.department_id
+        FROM EmployeeScanLogs s
+        JOIN EmployeeQRCodes q ON s.emp_qr_id = q.emp_qr_id
+        JOIN Employees e ON q.employee_id = e.employee_id
+        WHERE 1=1
+    """,
+    "visitor": """
+        SELECT s.scan_id, s.timestamp, s.scan_status, s.visitor_qr_id,
+               v.visit_id, v.visitor_id, vi.full_name AS visitor_name, v.site_id
+        FROM VisitorScanLogs s
+        JOIN VisitorQRCodes q ON s.visitor_qr_id = q.visitor_qr_id
+        JOIN Visits v ON q.visit_id = v.visit_id
+        JOIN Visitors vi ON v.visitor_id = vi.visitor_id
+        WHERE 1=1
+    """,
+}
+
+
+def iter_scan_history(scan_type: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      wait_seconds: Optional[float] = 0.0) -> Iterator[Dict]:
+    """
+    Stream EmployeeScanLogs or VisitorScanLogs rows, oldest first, from a server-side cursor.
+    Dates are YYYY-MM-DD and inclusive; the range prunes the monthly partitions.
+    Raises StreamsBusyError if no streaming connection frees up within wait_seconds.
+    """
+    where_sql = ""
+    params: List = []
+    if start_date:
+        where_sql += " AND s.timestamp >= %s"
+        params.append(datetime.strptime(start_date, '%Y-%m-%d'))
+    if end_date:
+        where_sql += " AND s.timestamp < %s"
+        params.append(datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+    sql = _SCAN_HISTORY_SELECT[scan_type] + where_sql + " ORDER BY s.timestamp, s.scan_id"
+    return db.iter_rows(sql, tuple(params), wait_seconds=wait_seconds)
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional
+
+from backend.database.connection import Database
+from backend.utils.background import PeriodicTask
+from backend.utils.qr_images import discard_qr_images, migrate_qr_image_layout
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+db = Database()
+
+# QR code tables and their primary keys
+QR_TABLES = {
+    "VisitorQRCodes": "visitor_qr_id",
+    "EmployeeQRCodes": "emp_qr_id",
+}
+
+# Only one worker at a time sweeps the shared disk cache
+_GC_LOCK = "vms_qr_image_gc"
+
+# Progress kept next to the cache, so a restart resumes where the last sweep stopped
+STATE_FILE = ".gc_state.json"
+
+_EPOCH = "1000-01-01 00:00:00"
+
+
+def _load_state(disk_dir: str) -> Dict:
+    try:
+        with open(os.path.join(disk_dir, STATE_FILE)) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = {}
+    except (OSError, ValueError):
+        logger.warning("Unreadable QR image GC state, starting over", exc_info=True)
+        state = {}
+    state.setdefault("layout_migrated", False)
+    state.setdefault("expiry_watermarks", {})
+    return state
+
+
+def _save_state(disk_dir: str, state: Dict):
+    path = os.path.join(disk_dir, STATE_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def _iter_expired(table: str, key: str, watermark: List, batch_size: int) -> Iterator[List[Dict]]:
+    """Batches of codes that expired after the (expiry_date, id) watermark, oldest first."""
+    expiry, last_id = watermark
+    while True:
+        rows = db.fetchall(f"""
+            SELECT {key} AS qr_id, code_value, expiry_date
+            FROM {table}
+            WHERE expiry_date < NOW()
+              AND (expiry_date > %s OR (expiry_date = %s AND {key} > %s))
+            ORDER BY expiry_date, {key}
+            LIMIT %s
+        """, (expiry, expiry, last_id, batch_size))
+        if not rows:
+            return
+        yield rows
+        expiry, last_id = rows[-1]["expiry_date"], rows[-1]["qr_id"]
+
+
+def _iter_revoked(table: str, key: str, batch_size: int) -> Iterator[List[Dict]]:
+    """Batches of every revoked code. Revocation has no timestamp, so each sweep reads them all."""
+    last_id = 0
+    while True:
+        rows = db.fetchall(f"""
+            SELECT {key} AS qr_id, code_value
+            FROM {table}
+            WHERE status = 'revoked' AND {key} > %s
+            ORDER BY {key}
+            LIMIT %s
+        """, (last_id, batch_size))
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["qr_id"]
+
+
+def _collect(disk_dir: str, legacy_dir: str, batch_size: int) -> Dict:
+    state = _load_state(disk_dir)
+    summary = {"layout_migration": None, "expired_codes": 0, "revoked_codes": 0, "files_removed": 0}
+
+    if not state["layout_migrated"]:
+        summary["layout_migration"] = migrate_qr_image_layout(legacy_dir)
+        logger.info("Moved QR images into the sharded layout: %s", summary["layout_migration"])
+        state["layout_migrated"] = True
+        _save_state(disk_dir, state)
+
+    for table, key in QR_TABLES.items():
+        watermark = state["expiry_watermarks"].get(table, [_EPOCH, 0])
+        for rows in _iter_expired(table, key, watermark, batch_size):
+            summary["files_removed"] += discard_qr_images(row["code_value"] for row in rows)
+            summary["expired_codes"] += len(rows)
+            # Saved per batch so an interrupted sweep does not start over
+            state["expiry_watermarks"][table] = [str(rows[-1]["expiry_date"]), rows[-1]["qr_id"]]
+            _save_state(disk_dir, state)
+
+        for rows in _iter_revoked(table, key, batch_size):
+            summary["files_removed"] += discard_qr_images(row["code_value"] for row in rows)
+            summary["revoked_codes"] += len(rows)
+    return summary
+
+
+def run_qr_image_gc() -> Optional[Dict]:
+    """
+    Delete cached images of expired and revoked QR codes from the disk cache, in batches
+    of [qr] gc_batch_size. The first run also moves files from the old flat layout into
+    shards. Returns a summary, or None if another worker is already sweeping.
+    """
+    qr_settings = get_settings().qr
+    if not qr_settings.disk_cache_dir:
+        return {"layout_migration": None, "expired_codes": 0, "revoked_codes": 0, "files_removed": 0}
+
+    with db.named_lock(_GC_LOCK) as acquired:
+        if not acquired:
+            return None
+        summary = _collect(qr_settings.disk_cache_dir, qr_settings.legacy_dir, qr_settings.gc_batch_size)
+        if summary["files_removed"]:
+            logger.info("QR image GC removed %s files", summary["files_removed"])
+        return summary
+
+
+_gc_task: Optional[PeriodicTask] = None
+
+
+def start_qr_image_gc():
+    """Run the QR image GC now and then every [qr] gc_interval_minutes (0 disables it)."""
+    global _gc_task
+    interval = get_settings().qr.gc_interval_minutes
+    if interval <= 0:
+        return
+    if _gc_task is None:
+        _gc_task = PeriodicTask("qr-image-gc", interval * 60, run_qr_image_gc)
+    _gc_task.start()
+
+
+def stop_qr_image_gc():
+    if _gc_task is not None:
+        _gc_task.stop()
@@ -1,16 +1,16 @@
-import qrcode
-import os
 import uuid
-import configparser
 from datetime import datetime, timedelta
-from typing import Optional, Dict
-from pathlib import Path
-import smtplib
+from typing import Optional, Dict, List
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 from backend.database.connection import Database
+from backend.services.visitor_qr_pool_service import claim_visitor_qr
 from backend.utils.db_logger import log_action
+from backend.utils.mailer import get_mailer, send_now
+from backend.utils.qr_download_index import get_download_index, invalidate_qr_download
+from backend.utils.qr_images import prerender
+from backend.utils.settings import get_settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,61 +18,22 @@ logger = logging.getLogger(__name__)
 db = Database()
 
 
-def _get_config():
-    """Load configuration from config.ini"""
-    config = configparser.ConfigParser()
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.ini')
-    config.read(config_path)
-    return config
+def _build_download_url(download_path: str) -> str:
+    """Prefix a download path with the configured base URL, if any"""
+    base_url = get_settings().app.base_url
+    if base_url:
+        return f"{base_url.rstrip('/')}{download_path}"
+    return download_path
 
 
-def _ensure_qr_directory():
-    """Ensure the QR code storage directory exists"""
-    qr_dir = os.path.join(os.path.dirname(__file__), '..', 'generated_qr')
-    Path(qr_dir).mkdir(parents=True, exist_ok=True)
-    return qr_dir
-
-
-def _generate_qr_code_image(data: str, filepath: str) -> bool:
-    """Generate a QR code image and save it to filepath"""
-    try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        img.save(filepath)
-        return True
-    except Exception as e:
-        # Error generating QR code - return None
-        return False
-
-
-def _send_email_with_qr_link(recipient_email: str, visitor_name: str, download_url: str, expiry_date: datetime) -> bool:
-    """Send email with QR code download link"""
-    try:
-        config = _get_config()
-        smtp_server = config.get('email', 'smtp_server')
-        smtp_port = config.getint('email', 'smtp_port')
-        sender_email = config.get('email', 'sender_email')
-        sender_password = config.get('email', 'sender_password')
-        
-        # Skip email if credentials are not configured
-        if sender_email == 'your_email@gmail.com' or sender_password == 'your_password':
-            # Email not configured, skip silently
-            return False
-        
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = recipient_email
-        msg['Subject'] = "Visitor QR Code - Visitor Management System"
-        
-        body = f"""
+def _build_qr_link_email(recipient_email: str, visitor_name: str, download_url: str, expiry_date: datetime) -> MIMEMultipart:
+    """Email with the QR code download link"""
+    msg = MIMEMultipart()
+    msg['From'] = get_settings().email.sender_email
+    msg['To'] = recipient_email
+    msg['Subject'] = "Visitor QR Code - Visitor Management System"
+    
+    body = f"""
 Hello {visitor_name},
 
 Your visitor QR code has been generated and is ready for download.
@@ -88,19 +49,97 @@ Please download and present this QR code at the security checkpoint.
 Best regards,
 Visitor Management System
 """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.send_message(msg)
-        server.quit()
-        
-        return True
+    
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+# AccessLogs actions recording how a visitor QR link email ended
+EMAIL_OUTCOME_ACTIONS = {"sent": "visitor_qr_email_sent", "failed": "visitor_qr_email_failed"}
+
+
+def _email_delivery_id(visitor_qr_id: int) -> str:
+    return f"visitor_qr-{visitor_qr_id}"
+
+
+def _queue_qr_link_email(
+    visitor_qr_id: int,
+    recipient_email: str,
+    visitor_name: str,
+    download_url: str,
+    expiry_date: datetime,
+    requested_by_user_id: int,
+) -> str:
+    """
+    Hand the download link email to the background mailer and return "queued", or
+    "skipped" when SMTP credentials are not configured. If the mail queue is full the
+    email is sent here instead, returning "sent" or "failed".
+    The outcome is logged against the visitor_qr entity either way.
+    """
+    if not get_settings().email.has_credentials:
+        return "skipped"
+    msg = _build_qr_link_email(recipient_email, visitor_name, download_url, expiry_date)
+    
+    def _record_outcome(delivery: Dict):
+        details = f"QR link email to {recipient_email}: {delivery['status']} after {delivery['attempts']} attempt(s)"
+        if delivery["error"]:
+            details += f" ({delivery['error']})"
+        log_action(
+            requested_by_user_id,
+            EMAIL_OUTCOME_ACTIONS[delivery["status"]],
+            details,
+            entity=("visitor_qr", visitor_qr_id),
+        )
+    
+    if get_mailer().submit(msg, _email_delivery_id(visitor_qr_id), _record_outcome):
+        return "queued"
+    
+    try:
+        send_now(msg)
+        delivery = {"status": "sent", "attempts": 1, "error": None}
     except Exception as e:
-        # Error sending email - return False
-        return False
+        logger.warning("Email to %s failed: %s", recipient_email, e)
+        delivery = {"status": "failed", "attempts": 1, "error": str(e)}
+    _record_outcome(delivery)
+    return delivery["status"]
+
+
+def get_visitor_qr_email_status(visitor_qr_id: int) -> Optional[Dict]:
+    """
+    Delivery status of a visitor QR code's link email: live from this worker's mailer
+    while it is queued, sending or retrying, otherwise the outcome logged in AccessLogs.
+    "unknown" means no outcome is recorded yet (queued by another worker, or skipped
+    because email is not configured). Returns None if the QR code does not exist.
+    """
+    delivery = get_mailer().get(_email_delivery_id(visitor_qr_id))
+    if delivery:
+        return {
+            "visitor_qr_id": visitor_qr_id,
+            "status": delivery["status"],
+            "attempts": delivery["attempts"],
+            "error": delivery["error"],
+            "queued_at": delivery["queued_at"],
+            "finished_at": delivery["finished_at"],
+        }
+    
+    outcome = db.fetchone("""
+        SELECT action, details, timestamp
+        FROM AccessLogs
+        WHERE entity_type = 'visitor_qr' AND entity_id = %s AND action IN (%s, %s)
+        ORDER BY timestamp DESC
+        LIMIT 1
+    """, (visitor_qr_id, EMAIL_OUTCOME_ACTIONS["sent"], EMAIL_OUTCOME_ACTIONS["failed"]))
+    if outcome:
+        return {
+            "visitor_qr_id": visitor_qr_id,
+            "status": "sent" if outcome["action"] == EMAIL_OUTCOME_ACTIONS["sent"] else "failed",
+            "details": outcome["details"],
+            "finished_at": outcome["timestamp"].isoformat(),
+        }
+    
+    if not db.fetchone("SELECT visitor_qr_id FROM VisitorQRCodes WHERE visitor_qr_id = %s", (visitor_qr_id,)):
+        return None
+    return {"visitor_qr_id": visitor_qr_id, "status": "unknown"}
 
 
 def generate_employee_qr(employee_id: int, requested_by_user_id: int) -> Optional[Dict]:
@@ -132,14 +171,6 @@ def generate_employee_qr(employee_id: int, requested_by_user_id: int) -> Optiona
     if existing:
         return None  # Retry would be needed, but for now return None
     
-    # Generate QR code image
-    qr_dir = _ensure_qr_directory()
-    filename = f"emp_{employee_id}_{code_value}.png"
-    filepath = os.path.join(qr_dir, filename)
-    
-    if not _generate_qr_code_image(code_value, filepath):
-        return None
-    
     # Insert into EmployeeQRCodes (permanent, no expiry_date)
     insert_sql = """
         INSERT INTO EmployeeQRCodes (code_value, employee_id, issue_date, expiry_date, status)
@@ -153,11 +184,6 @@ def generate_employee_qr(employee_id: int, requested_by_user_id: int) -> Optiona
         success = False
     
     if not success:
-        # Clean up file if DB insert failed
-        try:
-            os.remove(filepath)
-        except:
-            pass
         return None
     
     # Get the inserted emp_qr_id
@@ -174,13 +200,14 @@ def generate_employee_qr(employee_id: int, requested_by_user_id: int) -> Optiona
     log_action(
         requested_by_user_id,
         "generate_employee_qr",
-        f"Generated employee QR code for employee_id={employee_id} (emp_qr_id={qr_record['emp_qr_id']})"
+        f"Generated employee QR code for employee_id={employee_id} (emp_qr_id={qr_record['emp_qr_id']})",
+        entity=("employee", employee_id),
+        refs={"emp_qr": qr_record["emp_qr_id"]},
     )
     
     return {
         "emp_qr_id": qr_record["emp_qr_id"],
         "code_value": code_value,
-        "file_path": filepath,
         "employee_id": employee_id,
         "employee_name": employee["name"],
         "issue_date": qr_record["issue_date"].isoformat() if qr_record.get("issue_date") else None,
@@ -189,11 +216,143 @@ def generate_employee_qr(employee_id: int, requested_by_user_id: int) -> Optiona
     }
 
 
+def generate_employee_qrs_bulk(
+    requested_by_user_id: int,
+    department_id: Optional[int] = None,
+    employee_ids: Optional[List[int]] = None,
+) -> Optional[List[Dict]]:
+    """
+    Issue a new permanent QR code to every employee in a department, or to each listed
+    employee, with one multi-row INSERT. Images are not rendered here; see
+    qr_images.render_many().
+    Returns [{emp_qr_id, code_value, employee_id, employee_name}] in employee_id order,
+    or None on a database error. Raises ValueError for listed employees that do not exist
+    or when more than [qr] bulk_max_employees would be issued.
+    """
+    if department_id is not None:
+        employees = db.fetchall(
+            "SELECT employee_id, name FROM Employees WHERE department_id = %s ORDER BY employee_id",
+            (department_id,),
+        )
+    else:
+        ids = sorted(set(employee_ids or []))
+        placeholders = ", ".join(["%s"] * len(ids))
+        employees = db.fetchall(
+            f"SELECT employee_id, name FROM Employees WHERE employee_id IN ({placeholders}) ORDER BY employee_id",
+            tuple(ids),
+        ) if ids else []
+        missing = set(ids) - {employee["employee_id"] for employee in employees}
+        if missing:
+            raise ValueError(f"Employees not found: {', '.join(str(i) for i in sorted(missing))}")
+
+    if not employees:
+        return []
+    max_employees = get_settings().qr.bulk_max_employees
+    if len(employees) > max_employees:
+        raise ValueError(f"At most {max_employees} employees can be issued QR codes at once")
+
+    issue_date = datetime.now()
+    rows = [
+        (f"EMP_{employee['employee_id']}_{uuid.uuid4().hex[:12]}", employee["employee_id"], issue_date)
+        for employee in employees
+    ]
+    insert_sql = """
+        INSERT INTO EmployeeQRCodes (code_value, employee_id, issue_date, expiry_date, status)
+        VALUES (%s, %s, %s, NULL, 'active')
+    """
+    if not db.executemany(insert_sql, rows):
+        return None
+
+    code_values = [code_value for code_value, _, _ in rows]
+    placeholders = ", ".join(["%s"] * len(code_values))
+    inserted = db.fetchall(
+        f"SELECT emp_qr_id, code_value FROM EmployeeQRCodes WHERE code_value IN ({placeholders})",
+        tuple(code_values),
+    )
+    qr_ids = {row["code_value"]: row["emp_qr_id"] for row in inserted}
+
+    issued = []
+    for employee, (code_value, _, _) in zip(employees, rows):
+        issued.append({
+            "emp_qr_id": qr_ids.get(code_value),
+            "code_value": code_value,
+            "employee_id": employee["employee_id"],
+            "employee_name": employee["name"],
+        })
+        log_action(
+            requested_by_user_id,
+            "generate_employee_qr",
+            f"Generated employee QR code for employee_id={employee['employee_id']} (emp_qr_id={qr_ids.get(code_value)}, bulk)",
+            entity=("employee", employee["employee_id"]),
+            refs={"emp_qr": qr_ids.get(code_value)},
+        )
+    return issued
+
+
+def _mint_visitor_qr(visit_id: int, issue_date: datetime, expiry_date: datetime, requested_by_user_id: int) -> Optional[Dict]:
+    """
+    Create a new visitor QR code row for a visit (used when the pre-minted pool is empty).
+    Returns {visitor_qr_id, code_value}, or None on failure.
+    """
+    # Generate unique code value
+    code_value = f"VIS_{visit_id}_{uuid.uuid4().hex[:12]}"
+    
+    # Check for duplicate code_value (retry if collision)
+    existing = db.fetchone("SELECT visitor_qr_id FROM VisitorQRCodes WHERE code_value = %s", (code_value,))
+    if existing:
+        # Retry with new UUID (very unlikely but handle it)
+        code_value = f"VIS_{visit_id}_{uuid.uuid4().hex[:12]}"
+        existing = db.fetchone("SELECT visitor_qr_id FROM VisitorQRCodes WHERE code_value = %s", (code_value,))
+        if existing:
+            log_action(
+                requested_by_user_id,
+                "generate_visitor_qr_failed",
+                f"Code value collision after retry for visit_id={visit_id}",
+                entity=("visit", visit_id),
+            )
+            return None
+    
+    # Insert into VisitorQRCodes (temporary, with expiry_date NOT NULL)
+    insert_sql = """
+        INSERT INTO VisitorQRCodes (code_value, visit_id, issue_date, expiry_date, status)
+        VALUES (%s, %s, %s, %s, 'active')
+    """
+    try:
+        success = db.execute(insert_sql, (code_value, visit_id, issue_date, expiry_date))
+    except Exception as e:
+        logger.exception("DB error inserting visitor QR code")
+        success = False
+    
+    if not success:
+        log_action(
+            requested_by_user_id,
+            "generate_visitor_qr_failed",
+            f"Failed to insert QR code into database for visit_id={visit_id}, code_value={code_value}",
+            entity=("visit", visit_id),
+        )
+        return None
+    
+    # Get the inserted visitor_qr_id
+    qr_record = db.fetchone("SELECT visitor_qr_id FROM VisitorQRCodes WHERE code_value = %s", (code_value,))
+    if not qr_record:
+        log_action(
+            requested_by_user_id,
+            "generate_visitor_qr_failed",
+            f"QR code inserted but could not retrieve visitor_qr_id for visit_id={visit_id}, code_value={code_value}",
+            entity=("visit", visit_id),
+        )
+        return None
+    
+    return {"visitor_qr_id": qr_record["visitor_qr_id"], "code_value": code_value}
+
+
 def generate_visitor_qr(visit_id: int, recipient_email: str, requested_by_user_id: int) -> Optional[Dict]:
     """
     Generate a temporary QR code for a visitor visit.
     Maps to VisitorQRCodes table.
-    Emails the QR code as a downloadable link.
+    Emails the QR code as a downloadable link. The email is queued on the background
+    mailer and the image is rendered on the render pool, so neither delays the response;
+    poll get_visitor_qr_email_status for delivery.
     Returns dict with visitor_qr_id, code_value, download_url, or None on failure.
     """
     # First, check if visit exists (without JOIN to get better error info)
@@ -203,7 +362,8 @@ def generate_visitor_qr(visit_id: int, recipient_email: str, requested_by_user_i
         log_action(
             requested_by_user_id,
             "generate_visitor_qr_failed",
-            f"Visit not found: visit_id={visit_id}"
+            f"Visit not found: visit_id={visit_id}",
+            entity=("visit", visit_id),
         )
         return None
     
@@ -212,7 +372,9 @@ def generate_visitor_qr(visit_id: int, recipient_email: str, requested_by_user_i
         log_action(
             requested_by_user_id,
             "generate_visitor_qr_failed",
-            f"Visit status does not allow QR generation: visit_id={visit_id}, status={visit_check['status']}"
+            f"Visit status does not allow QR generation: visit_id={visit_id}, status={visit_check['status']}",
+            entity=("visit", visit_id),
+            refs={"visitor": visit_check["visitor_id"]},
         )
         return None
     
@@ -228,7 +390,9 @@ def generate_visitor_qr(visit_id: int, recipient_email: str, requested_by_user_i
         log_action(
             requested_by_user_id,
             "generate_visitor_qr_failed",
-            f"Visitor not found for visit: visit_id={visit_id}, visitor_id={visit_check['visitor_id']}"
+            f"Visitor not found for visit: visit_id={visit_id}, visitor_id={visit_check['visitor_id']}",
+            entity=("visit", visit_id),
+            refs={"visitor": visit_check["visitor_id"]},
         )
         return None
     
@@ -253,25 +417,20 @@ def generate_visitor_qr(visit_id: int, recipient_email: str, requested_by_user_i
                 "UPDATE VisitorQRCodes SET status = 'expired' WHERE visitor_qr_id = %s",
                 (existing_qr["visitor_qr_id"],)
             )
+            invalidate_qr_download("visitor", existing_qr["visitor_qr_id"])
         else:
             # Return existing active QR code info instead of creating duplicate
             log_action(
                 requested_by_user_id,
                 "generate_visitor_qr_existing",
-                f"Using existing active QR code for visit_id={visit_id}, visitor_qr_id={existing_qr['visitor_qr_id']}"
+                f"Using existing active QR code for visit_id={visit_id}, visitor_qr_id={existing_qr['visitor_qr_id']}",
+                entity=("visit", visit_id),
+                refs={"visitor_qr": existing_qr["visitor_qr_id"], "visitor": visit_check["visitor_id"]},
             )
             
             # Construct download URL for existing QR
             download_path = f"/qr/download/{existing_qr['visitor_qr_id']}"
-            config = _get_config()
-            try:
-                base_url = config.get('app', 'base_url', fallback='')
-                if base_url:
-                    download_url = f"{base_url.rstrip('/')}{download_path}"
-                else:
-                    download_url = download_path
-            except:
-                download_url = download_path
+            download_url = _build_download_url(download_path)
             
             return {
                 "visitor_qr_id": existing_qr["visitor_qr_id"],
@@ -281,121 +440,67 @@ def generate_visitor_qr(visit_id: int, recipient_email: str, requested_by_user_i
                 "download_url": download_url,
                 "expiry_date": existing_qr["expiry_date"].isoformat() if existing_qr["expiry_date"] else None,
                 "email_sent": False,  # Email already sent for this QR
+                "email_status": "not_requested",
                 "existing": True,
             }
     
     # Get expiry hours from config
-    config = _get_config()
-    expiry_hours = config.getint('app', 'qr_code_expiry_hours', fallback=24)
+    expiry_hours = get_settings().app.qr_code_expiry_hours
     issue_date = datetime.now()
     expiry_date = issue_date + timedelta(hours=expiry_hours)
     
-    # Generate unique code value
-    code_value = f"VIS_{visit_id}_{uuid.uuid4().hex[:12]}"
-    
-    # Check for duplicate code_value (retry if collision)
-    existing = db.fetchone("SELECT visitor_qr_id FROM VisitorQRCodes WHERE code_value = %s", (code_value,))
-    if existing:
-        # Retry with new UUID (very unlikely but handle it)
-        code_value = f"VIS_{visit_id}_{uuid.uuid4().hex[:12]}"
-        existing = db.fetchone("SELECT visitor_qr_id FROM VisitorQRCodes WHERE code_value = %s", (code_value,))
-        if existing:
-            log_action(
-                requested_by_user_id,
-                "generate_visitor_qr_failed",
-                f"Code value collision after retry for visit_id={visit_id}"
-            )
+    # Claim a pre-minted, pre-rendered code with one UPDATE; mint one here only if the pool is empty
+    qr_record = claim_visitor_qr(visit_id, issue_date, expiry_date)
+    from_pool = qr_record is not None
+    if not from_pool:
+        qr_record = _mint_visitor_qr(visit_id, issue_date, expiry_date, requested_by_user_id)
+        if not qr_record:
             return None
-    
-    # Generate QR code image
-    qr_dir = _ensure_qr_directory()
-    filename = f"vis_{visit_id}_{code_value}.png"
-    filepath = os.path.join(qr_dir, filename)
-    
-    if not _generate_qr_code_image(code_value, filepath):
-        log_action(
-            requested_by_user_id,
-            "generate_visitor_qr_failed",
-            f"Failed to generate QR code image for visit_id={visit_id}"
-        )
-        return None
-    
-    # Insert into VisitorQRCodes (temporary, with expiry_date NOT NULL)
-    insert_sql = """
-        INSERT INTO VisitorQRCodes (code_value, visit_id, issue_date, expiry_date, status)
-        VALUES (%s, %s, %s, %s, 'active')
-    """
-    try:
-        success = db.execute(insert_sql, (code_value, visit_id, issue_date, expiry_date))
-    except Exception as e:
-        logger.exception("DB error inserting visitor QR code")
-        success = False
-    
-    if not success:
-        log_action(
-            requested_by_user_id,
-            "generate_visitor_qr_failed",
-            f"Failed to insert QR code into database for visit_id={visit_id}, code_value={code_value}"
-        )
-        # Clean up file if DB insert failed
-        try:
-            os.remove(filepath)
-        except:
-            pass
-        return None
-    
-    # Get the inserted visitor_qr_id
-    qr_record = db.fetchone("SELECT visitor_qr_id FROM VisitorQRCodes WHERE code_value = %s", (code_value,))
-    if not qr_record:
-        log_action(
-            requested_by_user_id,
-            "generate_visitor_qr_failed",
-            f"QR code inserted but could not retrieve visitor_qr_id for visit_id={visit_id}, code_value={code_value}"
-        )
-        return None
+    code_value = qr_record["code_value"]
     
     # Construct download URL
     # Note: This is a relative path. The client should prepend the base API URL.
     # Example: If API is at http://localhost:8000, full URL would be http://localhost:8000/qr/download/{visitor_qr_id}
     download_path = f"/qr/download/{qr_record['visitor_qr_id']}"
     
-    # Try to get base URL from config, otherwise use relative path
-    config = _get_config()
-    try:
-        base_url = config.get('app', 'base_url', fallback='')
-        if base_url:
-            download_url = f"{base_url.rstrip('/')}{download_path}"
-        else:
-            download_url = download_path
-    except:
-        download_url = download_path
+    # Use base URL from config if set, otherwise the relative path
+    download_url = _build_download_url(download_path)
+    
+    # Warm the image cache for the emailed link (pooled codes were rendered when minted)
+    if not from_pool and get_settings().qr.prerender_visitor_codes:
+        prerender(code_value)
     
-    # Send email with download link
-    email_sent = _send_email_with_qr_link(
+    # Queue email with download link
+    email_status = _queue_qr_link_email(
+        qr_record["visitor_qr_id"],
         recipient_email,
         visit["full_name"],
         download_url,
-        expiry_date
+        expiry_date,
+        requested_by_user_id,
     )
     
     # Log action
     log_action(
         requested_by_user_id,
         "generate_visitor_qr",
-        f"Generated visitor QR code for visit_id={visit_id} (visitor_qr_id={qr_record['visitor_qr_id']}), email_sent={email_sent}"
+        f"Generated visitor QR code for visit_id={visit_id} (visitor_qr_id={qr_record['visitor_qr_id']}, pooled={from_pool}), email_status={email_status}",
+        entity=("visit", visit_id),
+        refs={"visitor_qr": qr_record["visitor_qr_id"], "visitor": visit_check["visitor_id"]},
     )
     
     return {
         "visitor_qr_id": qr_record["visitor_qr_id"],
         "code_value": code_value,
-        "file_path": filepath,
         "visit_id": visit_id,
         "visitor_name": visit["full_name"],
         "download_url": download_url,
         "download_path": download_path,  # Relative path for API clients
         "issue_date": issue_date.isoformat(),
         "expiry_date": expiry_date.isoformat(),
-        "email_sent": email_sent,
+        # Only a delivered email counts as sent; poll the email-status endpoint while queued
+        "email_sent": email_status == "sent",
+        "email_status": email_status,
     }
 
 
@@ -441,14 +546,10 @@ def debug_visit_info(visit_id: int) -> Optional[Dict]:
     }
 
 
-def get_visitor_qr_file(visitor_qr_id: int) -> Optional[str]:
-    """
-    Get the file path for a visitor QR code by visitor_qr_id.
-    Validates that the QR code exists and is active.
-    Returns file path or None if not found/invalid.
-    """
+def _get_visitor_qr_record(visitor_qr_id: int) -> Optional[Dict]:
+    """Code value and expiry of an active, unexpired visitor QR code, or None."""
     qr_record = db.fetchone("""
-        SELECT vqr.code_value, vqr.visit_id, vqr.status, vqr.expiry_date
+        SELECT vqr.code_value, vqr.status, vqr.expiry_date
         FROM VisitorQRCodes vqr
         WHERE vqr.visitor_qr_id = %s
     """, (visitor_qr_id,))
@@ -464,26 +565,13 @@ def get_visitor_qr_file(visitor_qr_id: int) -> Optional[str]:
     if qr_record["status"] != "active":
         return None
     
-    # Construct file path
-    qr_dir = _ensure_qr_directory()
-    filename = f"vis_{qr_record['visit_id']}_{qr_record['code_value']}.png"
-    filepath = os.path.join(qr_dir, filename)
-    
-    # Check if file exists
-    if not os.path.exists(filepath):
-        return None
-    
-    return filepath
+    return {"kind": "visitor", "code_value": qr_record["code_value"], "expiry_date": qr_record["expiry_date"]}
 
 
-def get_employee_qr_file(emp_qr_id: int) -> Optional[str]:
-    """
-    Get the file path for an employee QR code by emp_qr_id.
-    Validates that the QR code exists and is active.
-    Returns file path or None if not found/invalid.
-    """
+def _get_employee_qr_record(emp_qr_id: int) -> Optional[Dict]:
+    """Code value of an active employee QR code, or None."""
     qr_record = db.fetchone("""
-        SELECT eqr.code_value, eqr.employee_id, eqr.status
+        SELECT eqr.code_value, eqr.status
         FROM EmployeeQRCodes eqr
         WHERE eqr.emp_qr_id = %s
     """, (emp_qr_id,))
@@ -495,13 +583,27 @@ def get_employee_qr_file(emp_qr_id: int) -> Optional[str]:
     if qr_record["status"] != "active":
         return None
     
-    # Construct file path
-    qr_dir = _ensure_qr_directory()
-    filename = f"emp_{qr_record['employee_id']}_{qr_record['code_value']}.png"
-    filepath = os.path.join(qr_dir, filename)
-    
-    # Check if file exists
-    if not os.path.exists(filepath):
-        return None
-    
-    return filepath
+    return {"kind": "employee", "code_value": qr_record["code_value"], "expiry_date": None}
+
+
+def resolve_qr_download(route: str, qr_id: int) -> Optional[Dict]:
+    """
+    Resolve a /qr/download request to {kind, code_value, expiry_date}, or None if the code
+    is missing, revoked or expired. route is "employee" for /qr/download/employee/{id} and
+    "visitor" for /qr/download/{id}, which falls back to employee codes for older links.
+    Recent results come from the in-memory download index without a database query.
+    """
+    index = get_download_index()
+    record = index.get(route, qr_id)
+    if record is not None:
+        return record
+    
+    if route == "employee":
+        record = _get_employee_qr_record(qr_id)
+    else:
+        # Try visitor QR code first, then employee QR code (backward compatibility)
+        record = _get_visitor_qr_record(qr_id) or _get_employee_qr_record(qr_id)
+    
+    if record:
+        index.put(route, qr_id, record["kind"], record["code_value"], record["expiry_date"])
+    return record
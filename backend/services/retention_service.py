@@ -0,0 +1,188 @@
+import csv
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from backend.database.connection import Database
+from backend.utils.background import PeriodicTask
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+db = Database()
+
+# Append-only tables partitioned by month (migration 0004), with their retention setting
+PARTITIONED_TABLES = {
+    "AccessLogs": "access_logs_months",
+    "EmployeeScanLogs": "employee_scan_logs_months",
+    "VisitorScanLogs": "visitor_scan_logs_months",
+}
+
+_MONTH_PARTITION = re.compile(r'^p(\d{4})(\d{2})$')
+
+# Only one worker at a time may run partition DDL
+_MAINTENANCE_LOCK = "vms_partition_maintenance"
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def list_partitions(table: str) -> List[Dict]:
+    """Month partitions of a table, oldest first, with approximate row counts."""
+    rows = db.fetchall(
+        """
+        SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS upper_bound, TABLE_ROWS AS approx_rows
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+        """,
+        (table,),
+    )
+    partitions = []
+    for row in rows:
+        match = _MONTH_PARTITION.match(row["name"])
+        partitions.append({
+            "name": row["name"],
+            "month": f"{match.group(1)}-{match.group(2)}" if match else None,
+            "upper_bound": row["upper_bound"].strip("'") if row["upper_bound"] else None,
+            "approx_rows": row["approx_rows"],
+        })
+    return partitions
+
+
+def ensure_future_partitions(table: str, months_ahead: int) -> List[str]:
+    """
+    Split pmax so that month partitions exist through `months_ahead` months from now.
+    pmax only ever holds rows dated beyond the last month partition, so the split is a
+    metadata change in normal operation. Returns the names of partitions created.
+    """
+    partitions = list_partitions(table)
+    months = [p for p in partitions if p["month"]]
+    if not months or not any(p["name"] == "pmax" for p in partitions):
+        logger.warning("%s is not partitioned by month; run `python -m backend.database.migrate`", table)
+        return []
+
+    last_month = datetime.strptime(months[-1]["month"], "%Y-%m").date()
+    target = _add_months(date.today().replace(day=1), months_ahead)
+
+    new_partitions = []
+    month = _add_months(last_month, 1)
+    while month <= target:
+        new_partitions.append((f"p{month:%Y%m}", _add_months(month, 1)))
+        month = _add_months(month, 1)
+    if not new_partitions:
+        return []
+
+    definitions = ", ".join(
+        f"PARTITION {name} VALUES LESS THAN ('{upper:%Y-%m-%d}')" for name, upper in new_partitions
+    )
+    sql = f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ({definitions}, PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+    if not db.execute(sql):
+        raise Exception(f"Failed to add partitions to {table}")
+    created = [name for name, _ in new_partitions]
+    logger.info("Added partitions %s to %s", ", ".join(created), table)
+    return created
+
+
+def archive_partition(table: str, partition: str, archive_dir: str) -> Dict:
+    """
+    Stream one partition to <archive_dir>/<table>/<table>_<partition>.csv.gz and drop it.
+    The partition is only dropped after the archive is fully written and its row count
+    matches the partition, so a failed export never loses data.
+    """
+    os.makedirs(os.path.join(archive_dir, table), exist_ok=True)
+    path = os.path.join(archive_dir, table, f"{table}_{partition}.csv.gz")
+    temp_path = path + ".part"
+
+    expected = db.fetchone(f"SELECT COUNT(*) AS row_count FROM {table} PARTITION ({partition})")
+    if expected is None:
+        raise Exception(f"Could not count rows in {table} partition {partition}")
+
+    written = 0
+    with gzip.open(temp_path, "wt", newline="") as f:
+        writer = None
+        for row in db.iter_rows(f"SELECT * FROM {table} PARTITION ({partition})", wait_seconds=None):
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+            written += 1
+        f.flush()
+        os.fsync(f.fileno())
+
+    if written != expected["row_count"]:
+        os.remove(temp_path)
+        raise Exception(
+            f"Archive of {table} partition {partition} wrote {written} rows, expected {expected['row_count']}"
+        )
+    os.replace(temp_path, path)
+
+    if not db.execute(f"ALTER TABLE {table} DROP PARTITION {partition}"):
+        raise Exception(f"Archived {table} partition {partition} to {path} but failed to drop it")
+
+    logger.info("Archived %d rows from %s partition %s to %s", written, table, partition, path)
+    return {"table": table, "partition": partition, "rows": written, "archive": path}
+
+
+def apply_retention(table: str, retention_months: int, archive_dir: str) -> List[Dict]:
+    """Archive and drop every month partition older than retention_months (0 keeps everything)."""
+    if retention_months <= 0:
+        return []
+    cutoff = _add_months(date.today().replace(day=1), -retention_months)
+    archived = []
+    for partition in list_partitions(table):
+        if not partition["month"]:
+            continue
+        month = datetime.strptime(partition["month"], "%Y-%m").date()
+        # Keep partitions that still contain any day inside the retention window
+        if _add_months(month, 1) > cutoff:
+            break
+        archived.append(archive_partition(table, partition["name"], archive_dir))
+    return archived
+
+
+def run_partition_maintenance() -> Optional[Dict]:
+    """
+    Create upcoming month partitions and archive expired ones for every partitioned table.
+    Returns a summary, or None if another worker is already running maintenance.
+    """
+    retention = get_settings().retention
+    with db.named_lock(_MAINTENANCE_LOCK) as acquired:
+        if not acquired:
+            return None
+        summary = {"created": {}, "archived": []}
+        for table, setting in PARTITIONED_TABLES.items():
+            try:
+                summary["created"][table] = ensure_future_partitions(table, retention.future_partitions)
+                summary["archived"].extend(
+                    apply_retention(table, getattr(retention, setting), retention.archive_dir)
+                )
+            except Exception:
+                logger.exception("Partition maintenance failed for %s", table)
+        return summary
+
+
+_maintenance_task: Optional[PeriodicTask] = None
+
+
+def start_partition_maintenance():
+    """Run partition maintenance now and then every [retention] interval_hours (if enabled)."""
+    global _maintenance_task
+    retention = get_settings().retention
+    if not retention.enabled:
+        return
+    if _maintenance_task is None:
+        _maintenance_task = PeriodicTask(
+            "partition-maintenance", retention.interval_hours * 3600, run_partition_maintenance
+        )
+    _maintenance_task.start()
+
+
+def stop_partition_maintenance():
+    if _maintenance_task is not None:
+        _maintenance_task.stop()
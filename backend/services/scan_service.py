@@ -1,13 +1,14 @@
 from datetime import datetime, timedelta, time
 from typing import Optional, Dict, List
-import configparser
-import os
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 from backend.database.connection import Database
 from backend.utils.db_logger import log_action
+from backend.utils.qr_download_index import invalidate_qr_download
+from backend.utils.settings import get_settings
+from backend.utils.timing import stage
 
 db = Database()
 
@@ -15,26 +16,18 @@ db = Database()
 LATE_THRESHOLD_TIME = time(9, 10)
 
 
-def _get_config():
-    """Load configuration from config.ini"""
-    config = configparser.ConfigParser()
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.ini')
-    config.read(config_path)
-    return config
-
-
 def _send_late_alert_email(employee_name: str, employee_email: str, times_late: int, salary_estimate: float) -> bool:
     """Send email alert to admin when employee is late 3 times in 30 days"""
     try:
-        config = _get_config()
-        smtp_server = config.get('email', 'smtp_server')
-        smtp_port = config.getint('email', 'smtp_port')
-        sender_email = config.get('email', 'sender_email')
-        sender_password = config.get('email', 'sender_password')
-        admin_email = config.get('email', 'admin_email', fallback=sender_email)
+        email_settings = get_settings().email
+        smtp_server = email_settings.smtp_server
+        smtp_port = email_settings.smtp_port
+        sender_email = email_settings.sender_email
+        sender_password = email_settings.sender_password
+        admin_email = email_settings.admin_email or sender_email
         
         # Skip email if credentials are not configured
-        if sender_email == 'your_email@gmail.com' or sender_password == 'your_password':
+        if not email_settings.has_credentials:
             # Email not configured, skip silently
             return False
         
@@ -167,12 +160,13 @@ def scan_employee_qr(emp_qr_id: int, scan_status: str, scanned_by_user_id: int)
         return None
     
     # Validate QR code exists and is active
-    qr_record = db.fetchone("""
-        SELECT eqr.emp_qr_id, eqr.employee_id, eqr.status, eqr.expiry_date, e.name as employee_name
-        FROM EmployeeQRCodes eqr
-        JOIN Employees e ON eqr.employee_id = e.employee_id
-        WHERE eqr.emp_qr_id = %s
-    """, (emp_qr_id,))
+    with stage("scan_employee.qr_lookup"):
+        qr_record = db.fetchone("""
+            SELECT eqr.emp_qr_id, eqr.employee_id, eqr.status, eqr.expiry_date, e.name as employee_name
+            FROM EmployeeQRCodes eqr
+            JOIN Employees e ON eqr.employee_id = e.employee_id
+            WHERE eqr.emp_qr_id = %s
+        """, (emp_qr_id,))
     
     if not qr_record:
         return None
@@ -185,7 +179,8 @@ def scan_employee_qr(emp_qr_id: int, scan_status: str, scanned_by_user_id: int)
         return None
     
     # Determine expected status based on last scan
-    current_status = _get_employee_current_status(emp_qr_id)
+    with stage("scan_employee.state_check"):
+        current_status = _get_employee_current_status(emp_qr_id)
     
     # Validate scan makes sense (can't sign in if already signed in, can't sign out if not signed in)
     if scan_status == "signin" and current_status == "signin":
@@ -199,7 +194,8 @@ def scan_employee_qr(emp_qr_id: int, scan_status: str, scanned_by_user_id: int)
         INSERT INTO EmployeeScanLogs (emp_qr_id, scan_status, timestamp)
         VALUES (%s, %s, %s)
     """
-    success = db.execute(insert_sql, (emp_qr_id, scan_status, scan_time))
+    with stage("scan_employee.insert"):
+        success = db.execute(insert_sql, (emp_qr_id, scan_status, scan_time))
     
     if not success:
         return None
@@ -212,29 +208,36 @@ def scan_employee_qr(emp_qr_id: int, scan_status: str, scanned_by_user_id: int)
         is_late = _is_late_checkin(scan_time)
         
         # Get late count and check if threshold reached
-        late_count = _get_late_count_last_30_days(employee_id)
+        with stage("scan_employee.late_count"):
+            late_count = _get_late_count_last_30_days(employee_id)
         
         # If this is the 3rd late arrival, send alert
         if late_count >= 3:
-            salary_estimate = _calculate_salary_estimate(employee_id)
+            with stage("scan_employee.salary_estimate"):
+                salary_estimate = _calculate_salary_estimate(employee_id)
             # Try to get employee email (if available in future schema)
             employee_email = "N/A"  # Placeholder - would need email field in Employees table
-            _send_late_alert_email(
-                qr_record["employee_name"],
-                employee_email,
-                late_count,
-                salary_estimate
-            )
+            with stage("scan_employee.smtp"):
+                _send_late_alert_email(
+                    qr_record["employee_name"],
+                    employee_email,
+                    late_count,
+                    salary_estimate
+                )
     
     # Log action
-    log_action(
-        scanned_by_user_id,
-        "scan_employee_qr",
-        f"Scanned employee QR (emp_qr_id={emp_qr_id}, employee_id={employee_id}, status={scan_status}, late={is_late})"
-    )
+    with stage("scan_employee.audit"):
+        log_action(
+            scanned_by_user_id,
+            "scan_employee_qr",
+            f"Scanned employee QR (emp_qr_id={emp_qr_id}, employee_id={employee_id}, status={scan_status}, late={is_late})",
+            entity=("employee", employee_id),
+            refs={"emp_qr": emp_qr_id},
+        )
     
     # Get the inserted scan_id
-    scan_record = db.fetchone("SELECT scan_id FROM EmployeeScanLogs WHERE emp_qr_id = %s AND timestamp = %s ORDER BY scan_id DESC LIMIT 1", (emp_qr_id, scan_time))
+    with stage("scan_employee.scan_id_lookup"):
+        scan_record = db.fetchone("SELECT scan_id FROM EmployeeScanLogs WHERE emp_qr_id = %s AND timestamp = %s ORDER BY scan_id DESC LIMIT 1", (emp_qr_id, scan_time))
     scan_id = scan_record["scan_id"] if scan_record else None
     
     return {
@@ -260,41 +263,45 @@ def scan_visitor_qr(visitor_qr_id: int, scan_status: str, scanned_by_user_id: in
         return None
     
     # Validate QR code exists and get visit info
-    qr_record = db.fetchone("""
-        SELECT vqr.visitor_qr_id, vqr.visit_id, vqr.status, vqr.expiry_date,
-               v.visit_id, v.status as visit_status, v.visitor_id,
-               vis.full_name as visitor_name
-        FROM VisitorQRCodes vqr
-        JOIN Visits v ON vqr.visit_id = v.visit_id
-        JOIN Visitors vis ON v.visitor_id = vis.visitor_id
-        WHERE vqr.visitor_qr_id = %s
-    """, (visitor_qr_id,))
+    with stage("scan_visitor.qr_lookup"):
+        qr_record = db.fetchone("""
+            SELECT vqr.visitor_qr_id, vqr.visit_id, vqr.status, vqr.expiry_date,
+                   v.visit_id, v.status as visit_status, v.visitor_id,
+                   vis.full_name as visitor_name
+            FROM VisitorQRCodes vqr
+            JOIN Visits v ON vqr.visit_id = v.visit_id
+            JOIN Visitors vis ON v.visitor_id = vis.visitor_id
+            WHERE vqr.visitor_qr_id = %s
+        """, (visitor_qr_id,))
     
     if not qr_record:
         # Create alert for invalid QR
         alert_desc = f"Invalid visitor QR code scanned (visitor_qr_id={visitor_qr_id} not found)"
-        db.execute("""
-            INSERT INTO Alerts (triggered_by, description, created_at)
-            VALUES (%s, %s, %s)
-        """, (visitor_qr_id, alert_desc, datetime.now()))
+        with stage("scan_visitor.alert_insert"):
+            db.execute("""
+                INSERT INTO Alerts (triggered_by, description, created_at)
+                VALUES (%s, %s, %s)
+            """, (visitor_qr_id, alert_desc, datetime.now()))
         return None
     
     # Check if expired
     if qr_record["expiry_date"] and datetime.now() > qr_record["expiry_date"]:
         alert_desc = f"Expired visitor QR code scanned (visitor_qr_id={visitor_qr_id}, expired={qr_record['expiry_date']})"
-        db.execute("""
-            INSERT INTO Alerts (triggered_by, description, created_at)
-            VALUES (%s, %s, %s)
-        """, (visitor_qr_id, alert_desc, datetime.now()))
+        with stage("scan_visitor.alert_insert"):
+            db.execute("""
+                INSERT INTO Alerts (triggered_by, description, created_at)
+                VALUES (%s, %s, %s)
+            """, (visitor_qr_id, alert_desc, datetime.now()))
         return None
     
     # Check if revoked
     if qr_record["status"] != "active":
         alert_desc = f"Revoked/inactive visitor QR code scanned (visitor_qr_id={visitor_qr_id}, status={qr_record['status']})"
-        db.execute("""
-            INSERT INTO Alerts (triggered_by, description, created_at)
-            VALUES (%s, %s, %s)
-        """, (visitor_qr_id, alert_desc, datetime.now()))
+        with stage("scan_visitor.alert_insert"):
+            db.execute("""
+                INSERT INTO Alerts (triggered_by, description, created_at)
+                VALUES (%s, %s, %s)
+            """, (visitor_qr_id, alert_desc, datetime.now()))
         return None
     
     # Insert scan log
@@ -303,7 +310,8 @@ def scan_visitor_qr(visitor_qr_id: int, scan_status: str, scanned_by_user_id: in
         INSERT INTO VisitorScanLogs (visitor_qr_id, scan_status, timestamp)
         VALUES (%s, %s, %s)
     """
-    success = db.execute(insert_sql, (visitor_qr_id, scan_status, scan_time))
+    with stage("scan_visitor.insert"):
+        success = db.execute(insert_sql, (visitor_qr_id, scan_status, scan_time))
     
     if not success:
         return None
@@ -321,21 +329,26 @@ def scan_visitor_qr(visitor_qr_id: int, scan_status: str, scanned_by_user_id: in
     if new_visit_status:
         # Update visit status and timestamps
         from backend.services.visit_service import update_visit_status
-        update_visit_status(
-            visit_id=visit_id,
-            new_status=new_visit_status,
-            requested_by_user_id=scanned_by_user_id
-        )
+        with stage("scan_visitor.visit_update"):
+            update_visit_status(
+                visit_id=visit_id,
+                new_status=new_visit_status,
+                requested_by_user_id=scanned_by_user_id
+            )
     
     # Log action
-    log_action(
-        scanned_by_user_id,
-        "scan_visitor_qr",
-        f"Scanned visitor QR (visitor_qr_id={visitor_qr_id}, visit_id={visit_id}, status={scan_status})"
-    )
+    with stage("scan_visitor.audit"):
+        log_action(
+            scanned_by_user_id,
+            "scan_visitor_qr",
+            f"Scanned visitor QR (visitor_qr_id={visitor_qr_id}, visit_id={visit_id}, status={scan_status})",
+            entity=("visit", visit_id),
+            refs={"visitor_qr": visitor_qr_id, "visitor": qr_record.get("visitor_id")},
+        )
     
     # Get the inserted scan_id
-    scan_record = db.fetchone("SELECT scan_id FROM VisitorScanLogs WHERE visitor_qr_id = %s AND timestamp = %s ORDER BY scan_id DESC LIMIT 1", (visitor_qr_id, scan_time))
+    with stage("scan_visitor.scan_id_lookup"):
+        scan_record = db.fetchone("SELECT scan_id FROM VisitorScanLogs WHERE visitor_qr_id = %s AND timestamp = %s ORDER BY scan_id DESC LIMIT 1", (visitor_qr_id, scan_time))
     scan_id = scan_record["scan_id"] if scan_record else None
     
     return {
@@ -382,6 +395,12 @@ def get_employee_late_count(employee_id: int) -> Dict:
     }
 
 
+def _audit_verify(scanned_by_user_id: int, details: str, entity=None, refs=None):
+    """Write the verify_qr audit row, timed as its own pipeline stage."""
+    with stage("verify_qr.audit"):
+        log_action(scanned_by_user_id, "verify_qr", details, entity=entity, refs=refs)
+
+
 def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
     """
     Verify a QR code and determine if it belongs to an employee or visitor.
@@ -414,7 +433,8 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
             WHERE BINARY TRIM(eqr.code_value) = BINARY %s
         """
         logger.debug("verify_qr_code executing SQL: %s params=%r", sql.strip(), (normalized,))
-        qr_record = db.fetchone(sql, (normalized,))
+        with stage("verify_qr.lookup"):
+            qr_record = db.fetchone(sql, (normalized,))
 
         # If a match is found but stored value contains surrounding whitespace or control chars,
         # normalize stored value to the trimmed normalized value to clean data (one-time fix)
@@ -422,13 +442,15 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
             if qr_record and qr_record.get('code_value') and qr_record['code_value'] != normalized:
                 update_sql = "UPDATE EmployeeQRCodes SET code_value = %s WHERE emp_qr_id = %s"
                 logger.info("Trimming stored EmployeeQRCodes.code_value for emp_qr_id=%s", qr_record['emp_qr_id'])
-                db.execute(update_sql, (normalized, qr_record['emp_qr_id']))
+                with stage("verify_qr.code_cleanup"):
+                    db.execute(update_sql, (normalized, qr_record['emp_qr_id']))
+                invalidate_qr_download("employee", qr_record['emp_qr_id'])
                 qr_record['code_value'] = normalized
         except Exception:
             logger.exception("Failed to trim stored EmployeeQRCodes.code_value")
         
         if not qr_record:
-            log_action(scanned_by_user_id, "verify_qr", f"Invalid employee QR code: {raw_value!r}")
+            _audit_verify(scanned_by_user_id, f"Invalid employee QR code: {raw_value!r}")
             return {
                 "type": "employee",
                 "status": "invalid",
@@ -438,7 +460,8 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
         
         # Check expiry for employee QR
         if qr_record.get("expiry_date") and datetime.now() > qr_record["expiry_date"]:
-            log_action(scanned_by_user_id, "verify_qr", f"Expired employee QR code: {raw_value!r}")
+            _audit_verify(scanned_by_user_id, f"Expired employee QR code: {raw_value!r}",
+                          entity=("employee", qr_record["employee_id"]), refs={"emp_qr": qr_record["emp_qr_id"]})
             return {
                 "type": "employee",
                 "status": "expired",
@@ -451,7 +474,8 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
             }
 
         if qr_record["status"] != "active":
-            log_action(scanned_by_user_id, "verify_qr", f"Revoked employee QR code: {raw_value!r}")
+            _audit_verify(scanned_by_user_id, f"Revoked employee QR code: {raw_value!r}",
+                          entity=("employee", qr_record["employee_id"]), refs={"emp_qr": qr_record["emp_qr_id"]})
             return {
                 "type": "employee",
                 "status": "revoked",
@@ -461,7 +485,8 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
                 "message": "QR code has been revoked"
             }
         
-        log_action(scanned_by_user_id, "verify_qr", f"Verified employee QR code: {raw_value!r} (employee_id={qr_record['employee_id']})")
+        _audit_verify(scanned_by_user_id, f"Verified employee QR code: {raw_value!r} (employee_id={qr_record['employee_id']})",
+                      entity=("employee", qr_record["employee_id"]), refs={"emp_qr": qr_record["emp_qr_id"]})
         return {
             "type": "employee",
             "status": "valid",
@@ -484,20 +509,23 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
             WHERE BINARY TRIM(vqr.code_value) = BINARY %s
         """
         logger.debug("verify_qr_code executing SQL: %s params=%r", sql.strip(), (normalized,))
-        qr_record = db.fetchone(sql, (normalized,))
+        with stage("verify_qr.lookup"):
+            qr_record = db.fetchone(sql, (normalized,))
 
         # Clean stored value if it contains surrounding whitespace/control chars
         try:
             if qr_record and qr_record.get('code_value') and qr_record['code_value'] != normalized:
                 update_sql = "UPDATE VisitorQRCodes SET code_value = %s WHERE visitor_qr_id = %s"
                 logger.info("Trimming stored VisitorQRCodes.code_value for visitor_qr_id=%s", qr_record['visitor_qr_id'])
-                db.execute(update_sql, (normalized, qr_record['visitor_qr_id']))
+                with stage("verify_qr.code_cleanup"):
+                    db.execute(update_sql, (normalized, qr_record['visitor_qr_id']))
+                invalidate_qr_download("visitor", qr_record['visitor_qr_id'])
                 qr_record['code_value'] = normalized
         except Exception:
             logger.exception("Failed to trim stored VisitorQRCodes.code_value")
         
         if not qr_record:
-            log_action(scanned_by_user_id, "verify_qr", f"Invalid visitor QR code: {raw_value!r}")
+            _audit_verify(scanned_by_user_id, f"Invalid visitor QR code: {raw_value!r}")
             return {
                 "type": "visitor",
                 "status": "invalid",
@@ -507,7 +535,9 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
         
         # Check if expired
         if qr_record["expiry_date"] and datetime.now() > qr_record["expiry_date"]:
-            log_action(scanned_by_user_id, "verify_qr", f"Expired visitor QR code: {raw_value!r}")
+            _audit_verify(scanned_by_user_id, f"Expired visitor QR code: {raw_value!r}",
+                          entity=("visit", qr_record["visit_id"]),
+                          refs={"visitor_qr": qr_record["visitor_qr_id"], "visitor": qr_record["visitor_id"]})
             return {
                 "type": "visitor",
                 "status": "expired",
@@ -522,7 +552,9 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
         
         # Check if revoked
         if qr_record["status"] != "active":
-            log_action(scanned_by_user_id, "verify_qr", f"Revoked visitor QR code: {raw_value!r}")
+            _audit_verify(scanned_by_user_id, f"Revoked visitor QR code: {raw_value!r}",
+                          entity=("visit", qr_record["visit_id"]),
+                          refs={"visitor_qr": qr_record["visitor_qr_id"], "visitor": qr_record["visitor_id"]})
             return {
                 "type": "visitor",
                 "status": "revoked",
@@ -534,7 +566,9 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
                 "message": "QR code has been revoked"
             }
         
-        log_action(scanned_by_user_id, "verify_qr", f"Verified visitor QR code: {raw_value!r} (visit_id={qr_record['visit_id']})")
+        _audit_verify(scanned_by_user_id, f"Verified visitor QR code: {raw_value!r} (visit_id={qr_record['visit_id']})",
+                      entity=("visit", qr_record["visit_id"]),
+                      refs={"visitor_qr": qr_record["visitor_qr_id"], "visitor": qr_record["visitor_id"]})
         return {
             "type": "visitor",
             "status": "valid",
@@ -548,7 +582,7 @@ def verify_qr_code(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
         }
     
     # Unknown QR code format
-    log_action(scanned_by_user_id, "verify_qr", f"Unknown QR code format: {raw_value!r}")
+    _audit_verify(scanned_by_user_id, f"Unknown QR code format: {raw_value!r}")
     return {
         "type": "unknown",
         "status": "invalid",
@@ -565,7 +599,8 @@ def visitor_checkin(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
     Checks for visitor flags/alerts.
     """
     # Verify QR code first
-    verification = verify_qr_code(qr_code, scanned_by_user_id)
+    with stage("visitor_checkin.verify"):
+        verification = verify_qr_code(qr_code, scanned_by_user_id)
     
     if not verification or verification["type"] != "visitor":
         return None
@@ -583,7 +618,8 @@ def visitor_checkin(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
     # Check for visitor flags
     if visitor_id:
         from backend.services.alert_service import check_visitor_flags
-        flags = check_visitor_flags(visitor_id)
+        with stage("visitor_checkin.flag_check"):
+            flags = check_visitor_flags(visitor_id)
         if flags:
             return {
                 "success": False,
@@ -594,16 +630,18 @@ def visitor_checkin(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
             }
     
     # Check current visit status
-    visit = db.fetchone("""
-        SELECT status, checkin_time FROM Visits WHERE visit_id = %s
-    """, (visit_id,))
+    with stage("visitor_checkin.state_check"):
+        visit = db.fetchone("""
+            SELECT status, checkin_time FROM Visits WHERE visit_id = %s
+        """, (visit_id,))
     
     if not visit:
         return None
     
     # Prevent double check-in
     if visit["status"] == "checked_in":
-        log_action(scanned_by_user_id, "visitor_checkin", f"Attempted double check-in for visit_id={visit_id}")
+        log_action(scanned_by_user_id, "visitor_checkin", f"Attempted double check-in for visit_id={visit_id}",
+                   entity=("visit", visit_id), refs={"visitor": visitor_id})
         return {
             "success": False,
             "error": "Visitor is already checked in",
@@ -613,7 +651,8 @@ def visitor_checkin(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
     
     # Only allow check-in from pending status
     if visit["status"] != "pending":
-        log_action(scanned_by_user_id, "visitor_checkin", f"Invalid status for check-in: visit_id={visit_id}, status={visit['status']}")
+        log_action(scanned_by_user_id, "visitor_checkin", f"Invalid status for check-in: visit_id={visit_id}, status={visit['status']}",
+                   entity=("visit", visit_id), refs={"visitor": visitor_id})
         return {
             "success": False,
             "error": f"Cannot check in visitor with status: {visit['status']}",
@@ -628,7 +667,8 @@ def visitor_checkin(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
         SET status = 'checked_in', checkin_time = %s
         WHERE visit_id = %s
     """
-    success = db.execute(update_sql, (checkin_time, visit_id))
+    with stage("visitor_checkin.visit_update"):
+        success = db.execute(update_sql, (checkin_time, visit_id))
     
     if not success:
         return None
@@ -639,14 +679,18 @@ def visitor_checkin(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
         INSERT INTO VisitorScanLogs (visitor_qr_id, scan_status, timestamp)
         VALUES (%s, 'signin', %s)
     """
-    db.execute(scan_sql, (visitor_qr_id, checkin_time))
+    with stage("visitor_checkin.insert"):
+        db.execute(scan_sql, (visitor_qr_id, checkin_time))
     
     # Log action
-    log_action(
-        scanned_by_user_id,
-        "visitor_checkin",
-        f"Checked in visitor (visit_id={visit_id}, visitor_name={verification['visitor_name']})"
-    )
+    with stage("visitor_checkin.audit"):
+        log_action(
+            scanned_by_user_id,
+            "visitor_checkin",
+            f"Checked in visitor (visit_id={visit_id}, visitor_name={verification['visitor_name']})",
+            entity=("visit", visit_id),
+            refs={"visitor": visitor_id},
+        )
     
     return {
         "success": True,
@@ -664,7 +708,8 @@ def visitor_checkout(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
     Prevents checkout before check-in.
     """
     # Verify QR code first
-    verification = verify_qr_code(qr_code, scanned_by_user_id)
+    with stage("visitor_checkout.verify"):
+        verification = verify_qr_code(qr_code, scanned_by_user_id)
     
     if not verification or verification["type"] != "visitor":
         return None
@@ -683,19 +728,22 @@ def visitor_checkout(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
     flags = []
     if visitor_id:
         from backend.services.alert_service import check_visitor_flags
-        flags = check_visitor_flags(visitor_id)
+        with stage("visitor_checkout.flag_check"):
+            flags = check_visitor_flags(visitor_id)
     
     # Check current visit status
-    visit = db.fetchone("""
-        SELECT status, checkin_time, checkout_time FROM Visits WHERE visit_id = %s
-    """, (visit_id,))
+    with stage("visitor_checkout.state_check"):
+        visit = db.fetchone("""
+            SELECT status, checkin_time, checkout_time FROM Visits WHERE visit_id = %s
+        """, (visit_id,))
     
     if not visit:
         return None
     
     # Prevent checkout before check-in
     if visit["status"] != "checked_in":
-        log_action(scanned_by_user_id, "visitor_checkout", f"Attempted checkout without check-in: visit_id={visit_id}, status={visit['status']}")
+        log_action(scanned_by_user_id, "visitor_checkout", f"Attempted checkout without check-in: visit_id={visit_id}, status={visit['status']}",
+                   entity=("visit", visit_id), refs={"visitor": visitor_id})
         return {
             "success": False,
             "error": f"Cannot check out visitor with status: {visit['status']}. Visitor must be checked in first.",
@@ -705,7 +753,8 @@ def visitor_checkout(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
     
     # Prevent double checkout
     if visit["status"] == "checked_out":
-        log_action(scanned_by_user_id, "visitor_checkout", f"Attempted double checkout for visit_id={visit_id}")
+        log_action(scanned_by_user_id, "visitor_checkout", f"Attempted double checkout for visit_id={visit_id}",
+                   entity=("visit", visit_id), refs={"visitor": visitor_id})
         return {
             "success": False,
             "error": "Visitor is already checked out",
@@ -720,7 +769,8 @@ def visitor_checkout(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
         SET status = 'checked_out', checkout_time = %s
         WHERE visit_id = %s
     """
-    success = db.execute(update_sql, (checkout_time, visit_id))
+    with stage("visitor_checkout.visit_update"):
+        success = db.execute(update_sql, (checkout_time, visit_id))
     
     if not success:
         return None
@@ -731,14 +781,18 @@ def visitor_checkout(qr_code: str, scanned_by_user_id: int) -> Optional[Dict]:
         INSERT INTO VisitorScanLogs (visitor_qr_id, scan_status, timestamp)
         VALUES (%s, 'signout', %s)
     """
-    db.execute(scan_sql, (visitor_qr_id, checkout_time))
+    with stage("visitor_checkout.insert"):
+        db.execute(scan_sql, (visitor_qr_id, checkout_time))
     
     # Log action
-    log_action(
-        scanned_by_user_id,
-        "visitor_checkout",
-        f"Checked out visitor (visit_id={visit_id}, visitor_name={verification['visitor_name']})"
-    )
+    with stage("visitor_checkout.audit"):
+        log_action(
+            scanned_by_user_id,
+            "visitor_checkout",
+            f"Checked out visitor (visit_id={visit_id}, visitor_name={verification['visitor_name']})",
+            entity=("visit", visit_id),
+            refs={"visitor": visitor_id, "visitor_qr": visitor_qr_id},
+        )
     
     return {
         "success": True,
@@ -46,7 +46,8 @@ def create_site(site_name: str, address: Optional[str] = None, created_by_user_i
         if site:
             site_id = site['site_id']
             if created_by_user_id:
-                log_action(created_by_user_id, "create_site", f"Created site {site_name} (ID: {site_id}, Address: {address})")
+                log_action(created_by_user_id, "create_site", f"Created site {site_name} (ID: {site_id}, Address: {address})",
+                           entity=("site", site_id))
             return site_id
     
     return None
@@ -159,7 +160,7 @@ def get_employee_logs(employee_id: int, days: int = 30) -> List[Dict]:
         FROM employeescanlogs esl
         INNER JOIN employeeqrcodes eqr ON esl.emp_qr_id = eqr.emp_qr_id
         WHERE eqr.employee_id = %s
-          AND DATE(esl.timestamp) >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+          AND esl.timestamp >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
         ORDER BY esl.timestamp DESC
     """, (employee_id, days))
     return rows if rows is not None else []
@@ -197,7 +198,8 @@ def create_employee(name: str, hourly_rate: float, department_id: int, created_b
         employee = db.fetchone("SELECT employee_id FROM employees WHERE name = %s AND department_id = %s ORDER BY employee_id DESC LIMIT 1", (name.strip(), department_id))
         if employee:
             employee_id = employee['employee_id']
-            log_action(created_by_user_id, "create_employee", f"Created employee {name} (ID: {employee_id}, Rate: {hourly_rate}, Dept: {department_id})")
+            log_action(created_by_user_id, "create_employee", f"Created employee {name} (ID: {employee_id}, Rate: {hourly_rate}, Dept: {department_id})",
+                       entity=("employee", employee_id))
             return employee_id
     
     return None
@@ -70,7 +70,8 @@ def create_visit(
         if visit:
             visit_id = visit['visit_id']
             if requested_by_user_id:
-                log_action(requested_by_user_id, "create_visit", f"Created visit {visit_id} for visitor {visitor_id} at site {site_id}")
+                log_action(requested_by_user_id, "create_visit", f"Created visit {visit_id} for visitor {visitor_id} at site {site_id}",
+                           entity=("visit", visit_id), refs={"visitor": visitor_id, "site": site_id})
             return visit_id
 
     raise ValueError("Failed to create visit")
@@ -106,7 +107,8 @@ def update_visit_status(
         'pending': ('checked_in', 'denied'),
         'checked_in': ('checked_out',),
         'checked_out': (),  # Terminal state
-        'denied': ()  # Terminal state
+        'denied': (),  # Terminal state
+        'expired': ()  # Terminal state, set by the expiry sweep
     }
     
     if new_status not in valid_transitions.get(current_status, ()):
@@ -137,7 +139,8 @@ def update_visit_status(
         success = db.execute(update_sql, (new_status, visit_id))
     
     if success and requested_by_user_id:
-        log_action(requested_by_user_id, "update_visit_status", f"Updated visit {visit_id} from {current_status} to {new_status}")
+        log_action(requested_by_user_id, "update_visit_status", f"Updated visit {visit_id} from {current_status} to {new_status}",
+                   entity=("visit", visit_id))
     
     return success
 
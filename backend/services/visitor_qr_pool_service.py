@@ -0,0 +1,142 @@
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from backend.database.connection import Database
+from backend.utils.background import PeriodicTask
+from backend.utils.qr_images import render_many
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+db = Database()
+
+# Only one worker at a time tops the pool up
+_REFILL_LOCK = "vms_visitor_qr_pool_refill"
+
+# Rows per multi-row INSERT when refilling
+_INSERT_CHUNK = 500
+
+# Pooled codes have no visit yet, so unlike issued codes they carry no visit id
+INSERT_POOLED_SQL = """
+    INSERT INTO VisitorQRCodes (code_value, visit_id, issue_date, expiry_date, status)
+    VALUES (%s, NULL, %s, NULL, 'pooled')
+"""
+
+# Bind the lowest pooled code to a visit. LAST_INSERT_ID(expr) hands the claimed id
+# back on this connection, so claiming is one statement with no read-then-write race.
+CLAIM_SQL = """
+    UPDATE VisitorQRCodes
+    SET visit_id = %s, issue_date = %s, expiry_date = %s, status = 'active',
+        visitor_qr_id = LAST_INSERT_ID(visitor_qr_id)
+    WHERE status = 'pooled'
+    ORDER BY visitor_qr_id
+    LIMIT 1
+"""
+
+_stats_lock = threading.Lock()
+_stats = {"claimed": 0, "empty": 0, "minted": 0, "refills": 0, "last_refill": None}
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def new_pooled_code_value() -> str:
+    """Code value for a pre-minted visitor pass (VIS_ prefix, no visit id)."""
+    return f"VIS_{uuid.uuid4().hex[:20]}"
+
+
+def claim_visitor_qr(visit_id: int, issue_date: datetime, expiry_date: datetime) -> Optional[Dict]:
+    """
+    Bind a pre-minted code to a visit. Returns {visitor_qr_id, code_value}, or None
+    when the pool is empty (or disabled) and the caller should mint a code itself.
+    """
+    if get_settings().qr.visitor_pool_size <= 0:
+        return None
+    visitor_qr_id = db.execute_lastrowid(CLAIM_SQL, (visit_id, issue_date, expiry_date))
+    if not visitor_qr_id:
+        _count("empty")
+        return None
+    row = db.fetchone("SELECT code_value FROM VisitorQRCodes WHERE visitor_qr_id = %s", (visitor_qr_id,))
+    if not row:
+        return None
+    _count("claimed")
+    return {"visitor_qr_id": visitor_qr_id, "code_value": row["code_value"]}
+
+
+def count_pooled() -> int:
+    row = db.fetchone("SELECT COUNT(*) AS available FROM VisitorQRCodes WHERE status = 'pooled'")
+    return row["available"] if row else 0
+
+
+def _refill(target: int) -> int:
+    missing = target - count_pooled()
+    minted = 0
+    while missing > 0:
+        now = datetime.now()
+        code_values = [new_pooled_code_value() for _ in range(min(missing, _INSERT_CHUNK))]
+        if not db.executemany(INSERT_POOLED_SQL, [(code_value, now) for code_value in code_values]):
+            break
+        # Render now, on the render pool, so a claimed code's first download is a disk hit
+        for _ in render_many(code_values):
+            pass
+        minted += len(code_values)
+        missing -= len(code_values)
+    return minted
+
+
+def refill_visitor_qr_pool() -> Optional[Dict]:
+    """
+    Top the pool of pre-minted visitor codes back up to [qr] visitor_pool_size and render
+    their images. Returns a summary, or None if another worker is already refilling.
+    """
+    target = get_settings().qr.visitor_pool_size
+    if target <= 0:
+        return {"minted": 0, "available": 0}
+
+    with db.named_lock(_REFILL_LOCK) as acquired:
+        if not acquired:
+            return None
+        minted = _refill(target)
+
+    with _stats_lock:
+        _stats["minted"] += minted
+        _stats["refills"] += 1
+        _stats["last_refill"] = datetime.now().isoformat()
+    if minted:
+        logger.info("Minted %d pooled visitor QR codes", minted)
+    return {"minted": minted, "available": count_pooled()}
+
+
+def get_visitor_qr_pool_stats() -> Dict:
+    """Pool size and this worker's claim/refill counters."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["target"] = get_settings().qr.visitor_pool_size
+    stats["available"] = count_pooled() if stats["target"] > 0 else 0
+    return stats
+
+
+_refill_task: Optional[PeriodicTask] = None
+
+
+def start_visitor_qr_pool():
+    """Refill the visitor QR pool now and then every [qr] visitor_pool_refill_seconds."""
+    global _refill_task
+    qr_settings = get_settings().qr
+    if qr_settings.visitor_pool_size <= 0:
+        return
+    if _refill_task is None:
+        _refill_task = PeriodicTask(
+            "visitor-qr-pool", qr_settings.visitor_pool_refill_seconds, refill_visitor_qr_pool
+        )
+    _refill_task.start()
+
+
+def stop_visitor_qr_pool():
+    if _refill_task is not None:
+        _refill_task.stop()
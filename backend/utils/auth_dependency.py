@@ -1,33 +1,49 @@
-from fastapi import Header, HTTPException
-from typing import Optional
+from fastapi import Depends, Header, HTTPException
+from typing import Optional, Callable
 
+from backend.utils.auth_state import is_token_current
 from backend.utils.jwt_utils import get_user_from_token
 
 
-def get_current_user_id(authorization: Optional[str] = Header(default=None)) -> int:
+def extract_bearer_token(authorization: Optional[str]) -> str:
     """
-    Extract the user_id from a JWT Bearer token.
+    Return the token from an Authorization header value.
     Accepts "Bearer <token>" (preferred) or a raw token value.
     """
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header required")
 
-    try:
-        token = authorization
-        if authorization.startswith("Bearer "):
-            token = authorization.replace("Bearer ", "").strip()
-        token = token.strip()
+    token = authorization
+    if authorization.startswith("Bearer "):
+        token = authorization.replace("Bearer ", "").strip()
+    return token.strip()
+
 
+def _authenticate(authorization: Optional[str]) -> dict:
+    """Resolve the Authorization header to token claims or raise 401."""
+    token = extract_bearer_token(authorization)
+
+    try:
         user_info = get_user_from_token(token)
-        if not user_info:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-        
-        return user_info["user_id"]
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Invalid authorization token: {str(e)}")
 
+    if not user_info:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    if not is_token_current(user_info["user_id"], user_info.get("auth_version", 0)):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+    return user_info
+
+
+def get_current_user_id(authorization: Optional[str] = Header(default=None)) -> int:
+    """
+    Extract the user_id from a JWT Bearer token.
+    Accepts "Bearer <token>" (preferred) or a raw token value.
+    """
+    return _authenticate(authorization)["user_id"]
+
 
 def get_current_user(authorization: Optional[str] = Header(default=None)) -> dict:
     """
@@ -35,22 +51,17 @@ def get_current_user(authorization: Optional[str] = Header(default=None)) -> dic
     Accepts "Bearer <token>" (preferred) or a raw token value.
     Returns dict with user_id, username, and role.
     """
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header required")
+    return _authenticate(authorization)
 
-    try:
-        token = authorization
-        if authorization.startswith("Bearer "):
-            token = authorization.replace("Bearer ", "").strip()
-        token = token.strip()
 
-        user_info = get_user_from_token(token)
-        
-        if not user_info:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-        
-        return user_info
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Invalid authorization token: {str(e)}")
+def require_role(*roles: str) -> Callable[..., dict]:
+    """
+    Dependency factory that authorizes from the token's role claim, without a DB lookup.
+    Usage: current_user: dict = Depends(require_role("admin"))
+    """
+    def dependency(current_user: dict = Depends(get_current_user)) -> dict:
+        if current_user.get("role") not in roles:
+            raise HTTPException(status_code=403, detail=f"{' or '.join(roles).capitalize()} role required")
+        return current_user
+
+    return dependency
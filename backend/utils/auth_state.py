@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.database.connection import Database
+from backend.utils.background import PeriodicTask
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+db = Database()
+
+# Token denylist: user_id -> oldest token generation still accepted ("av" claim).
+# Only users whose Users.token_version was ever bumped appear here, so the map stays
+# small and every request checks it with a single dict lookup and no query.
+# Users.token_version is the source of truth; sync_from_db() pulls bumps made by other
+# workers and versions only ever grow, so merging with max() is safe.
+_lock = threading.Lock()
+_auth_versions: Dict[int, int] = {}
+_sync_task: Optional[PeriodicTask] = None
+
+# Single tokens revoked by logout: token digest -> exp (epoch seconds). RevokedTokens is
+# the source of truth; sync_from_db() pulls rows added by other workers (by revocation_id)
+# and entries are dropped once the token would have expired anyway.
+_revoked_tokens: Dict[str, float] = {}
+_revocation_watermark = 0
+_revoked_rejections = 0
+
+
+def get_auth_version(user_id: int) -> int:
+    """Current auth version for a user as known to this worker (0 if never bumped)."""
+    return _auth_versions.get(user_id, 0)
+
+
+def set_auth_version(user_id: int, version: int):
+    """Record a user's token generation, ignoring stale values."""
+    with _lock:
+        if version > _auth_versions.get(user_id, 0):
+            _auth_versions[user_id] = version
+
+
+def bump_auth_version(user_id: int) -> Optional[int]:
+    """
+    Invalidate a user's existing tokens, e.g. after a role change or deactivation.
+    Persists the bump to Users.token_version so other workers pick it up on their next sync.
+    Returns the new version, or None if the database update failed.
+    """
+    if not db.execute("UPDATE Users SET token_version = token_version + 1 WHERE user_id = %s", (user_id,)):
+        return None
+    row = db.fetchone("SELECT token_version FROM Users WHERE user_id = %s", (user_id,))
+    if not row:
+        return None
+    set_auth_version(user_id, row["token_version"])
+    return row["token_version"]
+
+
+def is_token_current(user_id: int, token_auth_version: int) -> bool:
+    """True if a token issued at token_auth_version is still valid for the user."""
+    return token_auth_version >= _auth_versions.get(user_id, 0)
+
+
+def revoke_token_digest(digest: str, exp: float) -> bool:
+    """
+    Reject one token (by digest) until its exp, on this worker immediately and on the
+    others after their next sync. Returns False if the revocation could not be persisted.
+    """
+    with _lock:
+        _revoked_tokens[digest] = exp
+    return db.execute(
+        "INSERT IGNORE INTO RevokedTokens (token_digest, expires_at) VALUES (%s, FROM_UNIXTIME(%s))",
+        (digest, int(exp)),
+    )
+
+
+def is_token_revoked(digest: str) -> bool:
+    """True if the token with this digest was revoked by a logout on any worker."""
+    global _revoked_rejections
+    exp = _revoked_tokens.get(digest)
+    if exp is None:
+        return False
+    if exp <= time.time():
+        return False
+    with _lock:
+        _revoked_rejections += 1
+    return True
+
+
+def _sync_revoked_tokens():
+    global _revocation_watermark
+    rows = db.fetchall(
+        """
+        SELECT revocation_id, token_digest, UNIX_TIMESTAMP(expires_at) AS exp
+        FROM RevokedTokens
+        WHERE revocation_id > %s
+        ORDER BY revocation_id
+        """,
+        (_revocation_watermark,),
+    )
+    now = time.time()
+    with _lock:
+        for row in rows:
+            if float(row["exp"]) > now:
+                _revoked_tokens[row["token_digest"]] = float(row["exp"])
+        if rows:
+            _revocation_watermark = rows[-1]["revocation_id"]
+        for digest in [d for d, exp in _revoked_tokens.items() if exp <= now]:
+            del _revoked_tokens[digest]
+    if rows:
+        logger.info("Auth denylist sync picked up %d revoked token(s)", len(rows))
+    # Any worker may prune; rows for expired tokens are never needed again
+    db.execute("DELETE FROM RevokedTokens WHERE expires_at < NOW() LIMIT 1000")
+
+
+def sync_from_db():
+    """Merge token generations bumped and tokens revoked by any worker into the local denylist."""
+    rows = db.fetchall("SELECT user_id, token_version FROM Users WHERE token_version > 0")
+    changed = 0
+    with _lock:
+        for row in rows:
+            if row["token_version"] > _auth_versions.get(row["user_id"], 0):
+                _auth_versions[row["user_id"]] = row["token_version"]
+                changed += 1
+    if changed:
+        logger.info("Auth denylist sync picked up %d token version change(s)", changed)
+    _sync_revoked_tokens()
+
+
+def start_denylist_sync():
+    """Start the background denylist sync (idempotent)."""
+    global _sync_task
+    if _sync_task is None:
+        _sync_task = PeriodicTask("auth-denylist-sync", get_settings().auth.denylist_sync_seconds, sync_from_db)
+    _sync_task.start()
+
+
+def stop_denylist_sync():
+    if _sync_task is not None:
+        _sync_task.stop()
+
+
+def get_denylist_stats() -> Dict:
+    return {
+        "denylisted_users": len(_auth_versions),
+        "revoked_tokens": len(_revoked_tokens),
+        "revoked_rejections": _revoked_rejections,
+        "sync_interval_seconds": get_settings().auth.denylist_sync_seconds,
+        "sync_running": bool(_sync_task and _sync_task.running),
+    }
@@ -1,17 +1,228 @@
 from backend.database.connection import Database
+from backend.utils.settings import get_settings
+from collections import Counter, deque
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Tuple
+import atexit
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
 
 db = Database()
 
-def log_action(user_id: int, action: str, details: Optional[str] = None):
+INSERT_SQL = """
+    INSERT INTO AccessLogs (user_id, action, details, timestamp, entity_type, entity_id, entity_refs)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+ROLLUP_SQL = """
+    INSERT INTO AuditRollupHourly (hour, action, user_id, count)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+"""
+
+# Entity types that audit rows can reference (see /logs/entity/{type}/{id})
+ENTITY_TYPES = ("user", "employee", "emp_qr", "visitor", "visit", "visitor_qr", "site", "alert")
+
+
+def entity_ref(entity_type: str, entity_id: int) -> str:
+    """The "<type>:<id>" form stored in AccessLogs.entity_refs."""
+    return f"{entity_type}:{int(entity_id)}"
+
+
+def _entity_columns(entity: Optional[Tuple[str, int]], refs: Optional[Dict[str, int]]) -> tuple:
+    """(entity_type, entity_id, entity_refs JSON) for an audit row."""
+    entity_type, entity_id = (entity[0], int(entity[1])) if entity and entity[1] is not None else (None, None)
+    all_refs = [entity_ref(entity_type, entity_id)] if entity_type else []
+    for ref_type, ref_id in (refs or {}).items():
+        if ref_id is not None and entity_ref(ref_type, ref_id) not in all_refs:
+            all_refs.append(entity_ref(ref_type, ref_id))
+    return entity_type, entity_id, json.dumps(all_refs) if all_refs else None
+
+
+def _rollup_counts(rows) -> list:
+    """Collapse written audit rows into (hour, action, user_id, count) increments."""
+    counts = Counter(
+        (timestamp.replace(minute=0, second=0, microsecond=0), action, user_id)
+        for user_id, action, _, timestamp, *_ in rows
+    )
+    return [key + (count,) for key, count in counts.items()]
+
+
+_rollup_failures = 0
+
+
+def _update_rollups(rows):
     """
-    Inserts an action log into AccessLogs table.
+    Add written rows to AuditRollupHourly. Runs after the AccessLogs insert, so a failure
+    here never loses audit rows; it is counted and can be repaired with rebuild_activity_rollups().
+    """
+    global _rollup_failures
+    if not rows:
+        return
+    if not db.executemany(ROLLUP_SQL, _rollup_counts(rows)):
+        _rollup_failures += 1
+        logger.warning("Failed to update audit rollups for %d row(s)", len(rows))
+
+
+class AuditWriter:
     """
-    sql = """
-        INSERT INTO AccessLogs (user_id, action, details, timestamp)
-        VALUES (%s, %s, %s, %s)
+    Buffers AccessLogs rows in memory and writes them as multi-row INSERTs from a
+    background thread, every flush_interval_ms or as soon as batch_size rows are waiting.
+    When max_queue rows are already buffered, submit() refuses the row so the caller
+    writes it synchronously; that slows producers down instead of growing memory.
     """
-    timestamp = datetime.now()
-    return db.execute(sql, (user_id, action, details, timestamp))
 
+    def __init__(self, batch_size: int, flush_interval_ms: int, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_queue = max_queue
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.sync_fallbacks = 0
+
+    def start(self):
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, row: tuple) -> bool:
+        with self._cond:
+            if self._stopping or len(self._queue) >= self.max_queue:
+                self.sync_fallbacks += 1
+                return False
+            self._queue.append(row)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._queue) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def _take_batch(self):
+        with self._cond:
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def flush(self):
+        """Write everything currently buffered."""
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return
+                if db.executemany(INSERT_SQL, batch):
+                    self.written += len(batch)
+                    self.batches += 1
+                    _update_rollups(batch)
+                    continue
+                # Retry row by row so one bad row does not lose the whole batch
+                written = []
+                for row in batch:
+                    if db.execute(INSERT_SQL, row):
+                        written.append(row)
+                    else:
+                        self.failed += 1
+                        logger.error("Dropped audit entry after write failure: %s", row[:3])
+                self.written += len(written)
+                _update_rollups(written)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop accepting rows, flush what is buffered and stop the flusher thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread:
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 1) if self.batches else None,
+            "failed": self.failed,
+            "sync_fallbacks": self.sync_fallbacks,
+            "rollup_failures": _rollup_failures,
+            "running": bool(self._thread and self._thread.is_alive()),
+        }
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> AuditWriter:
+    """Create and start the writer on first use, so it starts in the worker process."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                audit = get_settings().audit
+                writer = AuditWriter(audit.batch_size, audit.flush_interval_ms, audit.max_queue)
+                writer.start()
+                atexit.register(writer.stop)
+                _writer = writer
+    return _writer
+
+
+def log_action(
+    user_id: int,
+    action: str,
+    details: Optional[str] = None,
+    sync: bool = False,
+    entity: Optional[Tuple[str, int]] = None,
+    refs: Optional[Dict[str, int]] = None,
+):
+    """
+    Inserts an action log into AccessLogs table.
+    By default the row is buffered and written by the background audit writer within
+    flush_interval_ms; pass sync=True for actions that must be durable before responding.
+    `entity` is the row's main subject, e.g. ("visit", 42); `refs` are other entities it
+    touches, e.g. {"visitor": 7, "visitor_qr": 19}. Both are indexed for entity history.
+    """
+    row = (user_id, action, details, datetime.now()) + _entity_columns(entity, refs)
+    if not sync and _get_writer().submit(row):
+        return True
+    if not db.execute(INSERT_SQL, row):
+        return False
+    _update_rollups([row])
+    return True
+
+
+def flush_audit_log():
+    """Write all buffered audit rows now."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def stop_audit_writer():
+    """Flush buffered rows and stop the background writer (application shutdown)."""
+    if _writer is not None:
+        _writer.stop()
+
+
+def get_audit_writer_stats() -> Dict:
+    return _get_writer().stats()
@@ -0,0 +1,43 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Payload: {"kind": "visitor" | "employee", "ids": [qr ids], "code_values": [...]}
+QR_CODES_EXPIRED = "qr_codes_expired"
+# Payload: {"ids": [visit ids]}
+VISITS_EXPIRED = "visits_expired"
+
+_subscribers: Dict[str, List[Callable[[Dict], None]]] = defaultdict(list)
+_lock = threading.Lock()
+
+
+def subscribe(topic: str, handler: Callable[[Dict], None]):
+    """Call handler(payload) for every event published on topic in this process."""
+    with _lock:
+        if handler not in _subscribers[topic]:
+            _subscribers[topic].append(handler)
+
+
+def unsubscribe(topic: str, handler: Callable[[Dict], None]):
+    with _lock:
+        if handler in _subscribers[topic]:
+            _subscribers[topic].remove(handler)
+
+
+def publish(topic: str, payload: Dict) -> int:
+    """
+    Deliver an event to this process's subscribers, synchronously and in subscription
+    order. A failing handler is logged and does not stop the others. Other workers do not
+    see the event; their caches rely on their own TTLs. Returns the number of handlers called.
+    """
+    with _lock:
+        handlers = list(_subscribers[topic])
+    for handler in handlers:
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("Event handler for %s failed", topic)
+    return len(handlers)
@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+import tempfile
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+# Rows looked at to size columns before streaming the rest
+WIDTH_SAMPLE_ROWS = 500
+MAX_COLUMN_WIDTH = 50
+
+CHUNK_SIZE = 64 * 1024
+
+# Rows encoded per chunk for CSV/NDJSON streams
+ROWS_PER_CHUNK = 1000
+
+EXPORT_FORMATS = ("xlsx", "csv", "ndjson")
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+_HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+_HEADER_FONT = Font(bold=True, color="FFFFFF")
+_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+
+
+def _cell_width(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, datetime):
+        return 19
+    return len(str(value))
+
+
+def write_xlsx(title: str, headers: Sequence[str], rows: Iterable[Sequence], fileobj=None):
+    """
+    Write rows into a single-sheet workbook using openpyxl's write-only mode, which
+    streams rows to disk instead of keeping a cell object per value.
+    Column widths must be set before the first row is written, so they are estimated
+    from the first WIDTH_SAMPLE_ROWS rows; longer values further down just overflow.
+    Returns a file object positioned at the start (a temporary file unless one is given).
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+
+    rows = iter(rows)
+    sample: List[Sequence] = list(islice(rows, WIDTH_SAMPLE_ROWS))
+    for col_num, header in enumerate(headers, 1):
+        width = max([len(header)] + [_cell_width(row[col_num - 1]) for row in sample])
+        ws.column_dimensions[get_column_letter(col_num)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = _HEADER_FONT
+        cell.fill = _HEADER_FILL
+        cell.alignment = _HEADER_ALIGNMENT
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in sample:
+        ws.append(row)
+    for row in rows:
+        ws.append(row)
+
+    fileobj = fileobj or tempfile.TemporaryFile()
+    wb.save(fileobj)
+    fileobj.seek(0)
+    return fileobj
+
+
+def iter_file(fileobj, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a file in chunks for a StreamingResponse, closing it (which deletes temporary files) at the end."""
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def iter_csv(columns: Sequence[Tuple[str, str]], rows: Iterable[dict]) -> Iterator[bytes]:
+    """Encode dict rows as CSV, ROWS_PER_CHUNK rows per yielded chunk. columns are (key, header)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in columns])
+    keys = [key for key, _ in columns]
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, ROWS_PER_CHUNK))
+        writer.writerows([row[key] for key in keys] for row in batch)
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if not batch:
+            return
+
+
+def iter_ndjson(columns: Sequence[Tuple[str, str]], rows: Iterable[dict]) -> Iterator[bytes]:
+    """Encode dict rows as one JSON object per line, ROWS_PER_CHUNK rows per yielded chunk."""
+    keys = [key for key, _ in columns]
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, ROWS_PER_CHUNK))
+        if not batch:
+            return
+        yield "".join(
+            json.dumps({key: row[key] for key in keys}, default=_json_default) + "\n" for row in batch
+        ).encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def accepts_gzip(request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def export_response(
+    fmt: str,
+    filename: str,
+    title: str,
+    columns: Sequence[Tuple[str, str]],
+    rows: Iterable[dict],
+    gzip: bool = False,
+) -> StreamingResponse:
+    """
+    Stream rows as an xlsx, csv or ndjson download named <filename>.<fmt>.
+    The first row is fetched before the response starts, so a failing query still
+    turns into an error status instead of a truncated file. gzip applies to csv and
+    ndjson only (xlsx is already compressed) and sets Content-Encoding.
+    """
+    headers = {"Content-Disposition": f"attachment; filename={filename}.{fmt}"}
+
+    if fmt == "xlsx":
+        keys = [key for key, _ in columns]
+        fileobj = write_xlsx(title, [header for _, header in columns], (tuple(row[key] for key in keys) for row in rows))
+        return StreamingResponse(iter_file(fileobj), media_type=MEDIA_TYPES[fmt], headers=headers)
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is not None:
+        rows = chain([first], rows)
+    encode = iter_csv if fmt == "csv" else iter_ndjson
+    body = encode(columns, rows)
+    if gzip:
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -1,32 +1,43 @@
 import jwt
-import configparser
-import os
+import threading
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 from fastapi import HTTPException
 
+from backend.utils.auth_state import is_token_revoked, revoke_token_digest
+from backend.utils.settings import get_settings
+from backend.utils.token_cache import TokenCache, token_digest
+
 # JWT token expiration: 24 hours
 TOKEN_EXPIRATION_HOURS = 24
 
+# Verified claims per token, so repeat requests skip the HS256 decode
+_token_cache: Optional[TokenCache] = None
+_token_cache_secret: Optional[str] = None
+_token_cache_lock = threading.Lock()
+
+
+def _get_token_cache() -> TokenCache:
+    """Return the token cache, starting a fresh one if the secret key was changed by a reload."""
+    global _token_cache, _token_cache_secret
+    secret_key = _get_secret_key()
+    if _token_cache is None or _token_cache_secret != secret_key:
+        with _token_cache_lock:
+            if _token_cache is None or _token_cache_secret != secret_key:
+                _token_cache = TokenCache(get_settings().auth.token_cache_size)
+                _token_cache_secret = secret_key
+    return _token_cache
+
 
 def _get_secret_key() -> str:
-    """Load JWT secret key from config.ini"""
-    config = configparser.ConfigParser()
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.ini')
-    config.read(config_path)
-    secret_key = config.get('app', 'secret_key', fallback='your-secret-key-here')
-    
-    if secret_key == 'your-secret-key-here':
-        # Use a default secret for development (should be changed in production)
-        secret_key = 'default-secret-key-change-in-production'
-    
-    return secret_key
+    """Return the JWT secret key from the cached settings."""
+    return get_settings().app.secret_key
 
 
-def generate_jwt_token(user_id: int, username: str, role: str) -> str:
+def generate_jwt_token(user_id: int, username: str, role: str, auth_version: int = 0) -> str:
     """
     Generate a JWT token for a user.
-    Token includes user_id, username, role, and expiration.
+    Token includes user_id, username, role, auth version, and expiration.
     """
     secret_key = _get_secret_key()
     expiration = datetime.utcnow() + timedelta(hours=TOKEN_EXPIRATION_HOURS)
@@ -35,6 +46,7 @@ def generate_jwt_token(user_id: int, username: str, role: str) -> str:
         "user_id": user_id,
         "username": username,
         "role": role,
+        "av": auth_version,
         "exp": expiration,
         "iat": datetime.utcnow(),
     }
@@ -46,12 +58,12 @@ def generate_jwt_token(user_id: int, username: str, role: str) -> str:
 def verify_jwt_token(token: str) -> Optional[Dict]:
     """
     Verify and decode a JWT token.
-    Returns payload dict if valid, None if invalid.
+    Returns payload dict if valid, None if invalid (including tokens without an exp claim).
     """
     secret_key = _get_secret_key()
     
     try:
-        payload = jwt.decode(token, secret_key, algorithms=["HS256"])
+        payload = jwt.decode(token, secret_key, algorithms=["HS256"], options={"require": ["exp"]})
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -62,16 +74,49 @@ def verify_jwt_token(token: str) -> Optional[Dict]:
 def get_user_from_token(token: str) -> Optional[Dict]:
     """
     Extract user information from JWT token.
-    Returns dict with user_id, username, role, or None if invalid.
+    Returns dict with user_id, username, role, auth_version, or None if invalid or revoked.
+    Verified claims are served from the token cache until the token expires.
     """
+    cache = _get_token_cache()
+    digest = token_digest(token)
+
+    if is_token_revoked(digest):
+        return None
+
+    user_info = cache.get(digest)
+    if user_info:
+        return user_info
+
     payload = verify_jwt_token(token)
     if not payload:
         return None
     
-    return {
+    user_info = {
         "user_id": payload.get("user_id"),
         "username": payload.get("username"),
         "role": payload.get("role"),
+        "auth_version": payload.get("av", 0),
     }
+    cache.put(digest, user_info, float(payload["exp"]))
+    return user_info
+
+
+def revoke_token(token: str) -> bool:
+    """
+    Reject a token on every worker for the rest of its lifetime (e.g. on logout).
+    Returns False if the token is not valid to begin with or the revocation could not
+    be persisted.
+    """
+    payload = verify_jwt_token(token)
+    if not payload:
+        return False
+    digest = token_digest(token)
+    _get_token_cache().discard(digest)
+    return revoke_token_digest(digest, float(payload["exp"]))
+
+
+def get_token_cache_stats() -> Dict:
+    """Hit/miss/eviction counters for the verified-token cache."""
+    return _get_token_cache().stats()
 
 
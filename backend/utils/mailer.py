@@ -0,0 +1,245 @@
+import atexit
+import heapq
+import itertools
+import logging
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from email.message import Message
+from typing import Callable, Dict, Optional
+
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+SMTP_TIMEOUT_SECONDS = 30
+
+
+def send_now(message: Message):
+    """Connect, STARTTLS, log in and send one message on the calling thread."""
+    email_settings = get_settings().email
+    server = smtplib.SMTP(email_settings.smtp_server, email_settings.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+    try:
+        server.starttls()
+        server.login(email_settings.sender_email, email_settings.sender_password)
+        server.send_message(message)
+    finally:
+        server.quit()
+
+
+class Mailer:
+    """
+    Sends queued email from a background thread over one SMTP connection, which is kept
+    open while messages keep arriving and closed after idle_seconds. A failed send is
+    retried up to max_attempts times, retry_delay_seconds apart (longer each attempt).
+    When max_queue messages are already waiting, submit() refuses the message so the
+    caller can send it synchronously. The status of the last status_entries deliveries
+    is kept for polling.
+    """
+
+    def __init__(self, max_queue: int, max_attempts: int, retry_delay_seconds: float, idle_seconds: float,
+                 status_entries: int = 5000):
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay_seconds
+        self.idle_seconds = idle_seconds
+        self.status_entries = status_entries
+        self._queue = deque()
+        self._retries = []
+        self._sequence = itertools.count()
+        self._deliveries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._stats = {"sent": 0, "failed": 0, "retried": 0, "rejected": 0, "connections": 0}
+
+    def start(self):
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="mailer", daemon=True)
+            self._thread.start()
+
+    def submit(self, message: Message, delivery_id: Optional[str] = None,
+               on_done: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
+        """
+        Queue a message and return its delivery record, or None if the queue is full.
+        on_done(delivery) is called from the mailer thread once it is sent or has failed.
+        """
+        delivery = {
+            "delivery_id": delivery_id or uuid.uuid4().hex,
+            "recipient": message["To"],
+            "status": "queued",
+            "attempts": 0,
+            "error": None,
+            "queued_at": datetime.now().isoformat(),
+            "finished_at": None,
+        }
+        with self._cond:
+            if self._stopping or len(self._queue) >= self.max_queue:
+                self._stats["rejected"] += 1
+                return None
+            self._deliveries[delivery["delivery_id"]] = delivery
+            self._deliveries.move_to_end(delivery["delivery_id"])
+            while len(self._deliveries) > self.status_entries:
+                self._deliveries.popitem(last=False)
+            self._queue.append((delivery, message, on_done))
+            self._cond.notify()
+            return dict(delivery)
+
+    def get(self, delivery_id: str) -> Optional[Dict]:
+        with self._cond:
+            delivery = self._deliveries.get(delivery_id)
+            return dict(delivery) if delivery else None
+
+    def _next(self):
+        """The next message to send, or None after idle_seconds without one (or when stopping)."""
+        with self._cond:
+            while True:
+                if self._queue:
+                    return self._queue.popleft()
+                now = time.monotonic()
+                if self._retries and self._retries[0][0] <= now and not self._stopping:
+                    return heapq.heappop(self._retries)[2]
+                if self._stopping:
+                    return None
+                timeout = self.idle_seconds
+                if self._retries:
+                    timeout = min(timeout, self._retries[0][0] - now)
+                if not self._cond.wait(timeout) and not self._queue and not self._retries:
+                    return None
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                self._disconnect()
+                with self._cond:
+                    if self._stopping:
+                        abandoned = [entry[2] for entry in self._retries]
+                        self._retries.clear()
+                        break
+                continue
+            self._send(*item)
+        for delivery, _, on_done in abandoned:
+            self._finish(delivery, on_done, "failed", "Mailer stopped before a retry")
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            email_settings = get_settings().email
+            smtp = smtplib.SMTP(email_settings.smtp_server, email_settings.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+            smtp.starttls()
+            smtp.login(email_settings.sender_email, email_settings.sender_password)
+            self._smtp = smtp
+            self._stats["connections"] += 1
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _deliver(self, message: Message):
+        reused = self._smtp is not None
+        try:
+            self._connection().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server may drop a connection we kept open; reconnect once
+            self._disconnect()
+            if not reused:
+                raise
+            self._connection().send_message(message)
+
+    def _send(self, delivery: Dict, message: Message, on_done: Optional[Callable[[Dict], None]]):
+        with self._cond:
+            delivery["status"] = "sending"
+            delivery["attempts"] += 1
+        try:
+            self._deliver(message)
+        except Exception as e:
+            self._disconnect()
+            logger.warning("Email to %s failed (attempt %d): %s", delivery["recipient"], delivery["attempts"], e)
+            retry = delivery["attempts"] < self.max_attempts and not isinstance(e, smtplib.SMTPRecipientsRefused)
+            with self._cond:
+                delivery["error"] = str(e)
+                if retry and not self._stopping:
+                    delivery["status"] = "retrying"
+                    ready_at = time.monotonic() + self.retry_delay * delivery["attempts"]
+                    heapq.heappush(self._retries, (ready_at, next(self._sequence), (delivery, message, on_done)))
+                    self._stats["retried"] += 1
+                    return
+            self._finish(delivery, on_done, "failed", str(e))
+            return
+        self._finish(delivery, on_done, "sent", None)
+
+    def _finish(self, delivery: Dict, on_done: Optional[Callable[[Dict], None]], status: str, error: Optional[str]):
+        with self._cond:
+            delivery["status"] = status
+            delivery["error"] = error
+            delivery["finished_at"] = datetime.now().isoformat()
+            self._stats[status] += 1
+            result = dict(delivery)
+        if on_done:
+            try:
+                on_done(result)
+            except Exception:
+                logger.exception("Email delivery callback failed")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop accepting messages, send what is queued (no further retries) and stop the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread:
+            thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._queue)
+            stats["waiting_retry"] = len(self._retries)
+        stats["connected"] = self._smtp is not None
+        stats["running"] = bool(self._thread and self._thread.is_alive())
+        return stats
+
+
+_mailer: Optional[Mailer] = None
+_mailer_lock = threading.Lock()
+
+
+def get_mailer() -> Mailer:
+    """Create and start the mailer on first use, so it starts in the worker process."""
+    global _mailer
+    if _mailer is None:
+        with _mailer_lock:
+            if _mailer is None:
+                email_settings = get_settings().email
+                mailer = Mailer(
+                    email_settings.queue_size,
+                    email_settings.max_attempts,
+                    email_settings.retry_delay_seconds,
+                    email_settings.idle_disconnect_seconds,
+                )
+                mailer.start()
+                atexit.register(mailer.stop)
+                _mailer = mailer
+    return _mailer
+
+
+def stop_mailer():
+    """Send queued email and stop the mailer thread (application shutdown)."""
+    if _mailer is not None:
+        _mailer.stop()
+
+
+def get_mailer_stats() -> Dict:
+    return get_mailer().stats()
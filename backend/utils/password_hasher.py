@@ -0,0 +1,191 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Unsalted SHA-256 hex digests written before the KDF was introduced
+_LEGACY_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+class HasherBusyError(Exception):
+    """Raised when the hashing pool already has its maximum number of pending jobs."""
+
+
+class ScryptHasher:
+    """
+    Memory-hard scrypt hashes stored as scrypt$<n>$<r>$<p>$<salt>$<hash> (base64 parts).
+    Cost parameters are stored with each hash, so raising them only affects new hashes;
+    older ones are upgraded on the user's next login.
+    """
+
+    scheme = 'scrypt'
+
+    def __init__(self, n: int, r: int, p: int, salt_bytes: int = 16, key_bytes: int = 32):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.salt_bytes = salt_bytes
+        self.key_bytes = key_bytes
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, n: int, r: int, p: int, key_bytes: int) -> bytes:
+        # scrypt needs 128 * n * r bytes per lane; leave headroom over OpenSSL's 32 MiB default
+        maxmem = 128 * n * r * (p + 1) + 1024 * 1024
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=key_bytes)
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(self.salt_bytes)
+        key = self._derive(password, salt, self.n, self.r, self.p, self.key_bytes)
+        return '$'.join((
+            self.scheme, str(self.n), str(self.r), str(self.p),
+            base64.b64encode(salt).decode(), base64.b64encode(key).decode(),
+        ))
+
+    def verify(self, password: str, stored_hash: str) -> bool:
+        try:
+            _, n, r, p, salt, key = stored_hash.split('$')
+            expected = base64.b64decode(key)
+            actual = self._derive(password, base64.b64decode(salt), int(n), int(r), int(p), len(expected))
+        except (ValueError, TypeError):
+            return False
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        try:
+            _, n, r, p, _, _ = stored_hash.split('$')
+        except ValueError:
+            return True
+        return (int(n), int(r), int(p)) != (self.n, self.r, self.p)
+
+
+def _build_hasher() -> ScryptHasher:
+    security = get_settings().security
+    return ScryptHasher(security.scrypt_n, security.scrypt_r, security.scrypt_p)
+
+
+def hash_password_sync(password: str) -> str:
+    """Hash a password on the calling thread (scripts and tools; the API uses hash_password)."""
+    return _build_hasher().hash(password)
+
+
+def _verify(password: str, stored_hash: str) -> Tuple[bool, bool]:
+    hasher = _build_hasher()
+    if _LEGACY_SHA256.match(stored_hash):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored_hash), True
+    if stored_hash.startswith(hasher.scheme + '$'):
+        return hasher.verify(password, stored_hash), hasher.needs_rehash(stored_hash)
+    logger.warning("Unrecognised password hash format")
+    return False, False
+
+
+# Sync routes run on anyio's request threadpool (40 threads by default), and every pending
+# hash holds one of those threads while it waits. Keep logins to a small share of them.
+MAX_PENDING_LIMIT = 10
+
+
+class HashingPool:
+    """
+    Dedicated, bounded executor for password hashing, kept apart from the request threadpool
+    so a burst of logins cannot starve scan requests of CPU. At most `workers` hashes run at
+    once; beyond `max_pending` queued jobs new work is refused with HasherBusyError.
+    Callers block a request thread while they wait, so max_pending is capped at
+    MAX_PENDING_LIMIT to leave the rest of the threadpool for scans and kiosks.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        if max_pending > MAX_PENDING_LIMIT:
+            logger.warning("hash_max_pending=%d exceeds %d; using %d", max_pending, MAX_PENDING_LIMIT, MAX_PENDING_LIMIT)
+            max_pending = MAX_PENDING_LIMIT
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._rejected = 0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+
+    def _timed(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            with self._lock:
+                self._completed += 1
+                self._total_ms += elapsed_ms
+                self._max_ms = max(self._max_ms, elapsed_ms)
+
+    def run(self, func, *args):
+        """Run func(*args) on the pool and wait for the result."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusyError("Password hashing pool is saturated")
+        try:
+            return self._executor.submit(self._timed, func, *args).result()
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_ms": round(self._total_ms / completed, 2) if completed else None,
+                "max_ms": round(self._max_ms, 2),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+_pool: Optional[HashingPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> HashingPool:
+    """Pool size is read once; changes to hash_workers/hash_max_pending apply on restart."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                security = get_settings().security
+                _pool = HashingPool(security.hash_workers, security.hash_max_pending)
+    return _pool
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with the configured KDF on the hashing pool."""
+    return _get_pool().run(hash_password_sync, password)
+
+
+def verify_password(password: str, stored_hash: str) -> Tuple[bool, bool]:
+    """
+    Check a password against a stored hash on the hashing pool.
+    Returns (matches, needs_rehash); needs_rehash is True for legacy SHA-256 hashes and
+    for scrypt hashes made with different cost parameters than currently configured.
+    """
+    return _get_pool().run(_verify, password, stored_hash)
+
+
+def get_hasher_stats() -> Dict:
+    security = get_settings().security
+    stats = _get_pool().stats()
+    stats["scheme"] = f"scrypt(n={security.scrypt_n}, r={security.scrypt_r}, p={security.scrypt_p})"
+    return stats
@@ -0,0 +1,113 @@
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+from PIL import Image, ImageDraw
+
+# Printable sheet layout: A4 at 150 dpi, 3 x 4 badges per page
+PAGE_SIZE = (1240, 1754)
+PAGE_DPI = 150
+GRID_COLUMNS = 3
+GRID_ROWS = 4
+PAGE_MARGIN = 60
+LABEL_HEIGHT = 40
+# Pages held in memory between PDF writes. Each append re-reads the file written so
+# far, so writing pages one at a time is quadratic in the page count.
+PAGES_PER_WRITE = 20
+
+
+class _ChunkSink:
+    """Write-only file object that collects bytes for a streaming ZipFile."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_qr_zip(
+    entries: Iterable[Tuple[str, bytes]],
+    manifest_header: List[str],
+    manifest_rows: List[List],
+) -> Iterator[bytes]:
+    """
+    Stream a ZIP of (filename, png) entries plus manifest.csv, yielding bytes as each
+    image is added. PNGs are already compressed, so entries are stored as-is.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        manifest = io.StringIO()
+        writer = csv.writer(manifest)
+        writer.writerow(manifest_header)
+        writer.writerows(manifest_rows)
+        zf.writestr("manifest.csv", manifest.getvalue())
+        for filename, png in entries:
+            zf.writestr(filename, png)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _new_page() -> Image.Image:
+    # 1-bit pages are stored with CCITT fax compression: a few KB per page
+    return Image.new("1", PAGE_SIZE, 1)
+
+
+def _write_pages(path: str, pages: List[Image.Image], append: bool):
+    pages[0].save(path, "PDF", resolution=PAGE_DPI, save_all=True, append_images=pages[1:], append=append)
+
+
+def write_qr_sheet_pdf(entries: Iterable[Tuple[str, bytes]]):
+    """
+    Lay (label, png) badges out on A4 pages and write them to a temporary PDF,
+    PAGES_PER_WRITE pages at a time, so memory use does not grow with the badge count.
+    Returns the open file positioned at the start; closing it deletes it.
+    """
+    cell_width = (PAGE_SIZE[0] - 2 * PAGE_MARGIN) // GRID_COLUMNS
+    cell_height = (PAGE_SIZE[1] - 2 * PAGE_MARGIN) // GRID_ROWS
+    qr_size = min(cell_width, cell_height - LABEL_HEIGHT) - 20
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        page, slot, pending, written = _new_page(), 0, [], False
+        for label, png in entries:
+            column, row = slot % GRID_COLUMNS, slot // GRID_COLUMNS
+            left = PAGE_MARGIN + column * cell_width
+            top = PAGE_MARGIN + row * cell_height
+
+            qr = Image.open(io.BytesIO(png)).convert("1").resize((qr_size, qr_size), Image.NEAREST)
+            page.paste(qr, (left + (cell_width - qr_size) // 2, top))
+            draw = ImageDraw.Draw(page)
+            text_width = draw.textlength(label)
+            draw.text((left + (cell_width - text_width) / 2, top + qr_size + 10), label, fill=0)
+
+            slot += 1
+            if slot == GRID_COLUMNS * GRID_ROWS:
+                pending.append(page)
+                page, slot = _new_page(), 0
+                if len(pending) == PAGES_PER_WRITE:
+                    _write_pages(path, pending, written)
+                    pending, written = [], True
+        if slot or not (pending or written):
+            pending.append(page)
+        if pending:
+            _write_pages(path, pending, written)
+
+        fileobj = open(path, "rb")
+    finally:
+        # The open handle keeps the data readable; the name is no longer needed
+        os.remove(path)
+    return fileobj
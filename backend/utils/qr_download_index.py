@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from backend.utils.events import QR_CODES_EXPIRED, subscribe
+from backend.utils.settings import get_settings
+
+
+class QRDownloadIndex:
+    """
+    Bounded LRU of recently validated QR downloads, keyed by (route, qr_id) where route is
+    "visitor" or "employee" (the /qr/download/{id} route also resolves employee codes).
+    Each entry records the code's kind, code value and expiry, so repeat downloads and
+    conditional requests are answered without a database query. Entries are trusted for
+    at most ttl_seconds, which bounds how long a revocation made outside this process can
+    go unnoticed; changes made here call invalidate() directly.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], Dict]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, route: str, qr_id: int) -> Optional[Dict]:
+        key = (route, qr_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expiry = entry["expiry_date"]
+            if time.monotonic() - entry["checked_at"] > self.ttl_seconds or (expiry and datetime.now() > expiry):
+                del self._entries[key]
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return dict(entry)
+
+    def put(self, route: str, qr_id: int, kind: str, code_value: str, expiry_date: Optional[datetime]):
+        with self._lock:
+            self._entries[(route, qr_id)] = {
+                "kind": kind,
+                "code_value": code_value,
+                "expiry_date": expiry_date,
+                "checked_at": time.monotonic(),
+            }
+            self._entries.move_to_end((route, qr_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, kind: str, qr_id: int):
+        """Forget a QR code whose status or code value changed, under either route."""
+        with self._lock:
+            for route in ("visitor", "employee"):
+                entry = self._entries.get((route, qr_id))
+                if entry is not None and entry["kind"] == kind:
+                    del self._entries[(route, qr_id)]
+                    self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+
+_index: Optional[QRDownloadIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_download_index() -> QRDownloadIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                qr_settings = get_settings().qr
+                _index = QRDownloadIndex(qr_settings.download_index_entries, qr_settings.download_index_ttl_seconds)
+    return _index
+
+
+def invalidate_qr_download(kind: str, qr_id: int):
+    """Call after changing a QR code's status or code value ("visitor" or "employee")."""
+    get_download_index().invalidate(kind, qr_id)
+
+
+def _on_qr_codes_expired(event: Dict):
+    index = get_download_index()
+    for qr_id in event["ids"]:
+        index.invalidate(event["kind"], qr_id)
+
+
+subscribe(QR_CODES_EXPIRED, _on_qr_codes_expired)
@@ -0,0 +1,383 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import qrcode
+from PIL import Image
+
+from backend.utils.events import QR_CODES_EXPIRED, subscribe
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+QR_FORMATS = ("png", "svg")
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Pixels per module; 10 matches the images issued before formats were configurable
+DEFAULT_SCALE = 10
+MAX_SCALE = 40
+# Quiet zone in modules (the QR spec minimum)
+BORDER = 4
+
+
+def _qr_matrix(code_value: str) -> List[List[bool]]:
+    """Module matrix of a code value, including the quiet zone."""
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, border=BORDER)
+    qr.add_data(code_value)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def _render_png(matrix: List[List[bool]], scale: int) -> bytes:
+    # Draw one pixel per module in a 1-bit image and scale it up, rather than
+    # filling a rectangle per module; the PNG stays 1-bit (a few hundred bytes)
+    size = len(matrix)
+    img = Image.new("1", (size, size))
+    img.putdata([0 if dark else 1 for row in matrix for dark in row])
+    if scale != 1:
+        img = img.resize((size * scale, size * scale), Image.NEAREST)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _render_svg(matrix: List[List[bool]], scale: int) -> bytes:
+    # One path of horizontal runs of dark modules, in module units
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < len(row):
+            if row[x]:
+                start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                runs.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+            else:
+                x += 1
+    size = len(matrix)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size * scale}" height="{size * scale}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{"".join(runs)}" fill="#000"/></svg>'
+    ).encode()
+
+
+def render_qr(code_value: str, fmt: str = "png", scale: int = DEFAULT_SCALE) -> bytes:
+    """Render a code value as a PNG or SVG. The image depends only on these arguments."""
+    matrix = _qr_matrix(code_value)
+    if fmt == "svg":
+        return _render_svg(matrix, scale)
+    return _render_png(matrix, scale)
+
+
+def render_qr_png(code_value: str) -> bytes:
+    """Default PNG for a code value (used by the bulk render pool)."""
+    return render_qr(code_value)
+
+
+def qr_digest(code_value: str) -> str:
+    """Content address of a code's image; also used as its disk cache filename."""
+    return hashlib.sha256(code_value.encode()).hexdigest()
+
+
+# Disk cache filenames: <digest>.png for the default image, <digest>_<scale>.<fmt> otherwise
+_CACHE_FILE = re.compile(r'^([0-9a-f]{64})(?:_\d+)?\.(?:png|svg)$')
+# Files written to backend/generated_qr before images were cached by digest
+_LEGACY_FILE = re.compile(r'^(?:vis|emp)_\d+_(.+)\.png$')
+
+
+def shard_dir(disk_dir: str, digest: str) -> str:
+    """Two-level directory for a digest (ab/cd/), so no directory grows past a few hundred files."""
+    return os.path.join(disk_dir, digest[:2], digest[2:4])
+
+
+class QRImageCache:
+    """
+    Rendered QR images keyed by (code value, format, scale): a bounded in-memory LRU in
+    front of an optional disk directory of files named by sha256(code_value), sharded
+    two levels deep. Because images are a pure function of those keys, any worker can
+    render any code and entries never go stale; revocation and expiry are checked before
+    the cache is asked, and the QR image GC deletes files of codes that can no longer
+    be downloaded.
+    """
+
+    def __init__(self, max_entries: int, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir or None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, int], bytes]" = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0, "evictions": 0, "disk_errors": 0, "disk_removed": 0}
+
+    def _disk_path(self, key: Tuple[str, str, int]) -> str:
+        code_value, fmt, scale = key
+        digest = qr_digest(code_value)
+        if (fmt, scale) == ("png", DEFAULT_SCALE):
+            return os.path.join(shard_dir(self.disk_dir, digest), f"{digest}.png")
+        return os.path.join(shard_dir(self.disk_dir, digest), f"{digest}_{scale}.{fmt}")
+
+    def _read_disk(self, key: Tuple[str, str, int]) -> Optional[bytes]:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            self._count("disk_errors")
+            logger.warning("Failed to read cached QR image", exc_info=True)
+            return None
+
+    def _write_disk(self, key: Tuple[str, str, int], image: bytes):
+        path = self._disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(image)
+            os.replace(temp_path, path)
+        except OSError:
+            self._count("disk_errors")
+            logger.warning("Failed to write cached QR image", exc_info=True)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, key: Tuple[str, str, int], image: bytes):
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_image(self, code_value: str, fmt: str = "png", scale: int = DEFAULT_SCALE) -> bytes:
+        """Image bytes for a code value, from memory, then disk, then a fresh render."""
+        key = (code_value, fmt, scale)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return image
+
+        if self.disk_dir:
+            image = self._read_disk(key)
+            if image is not None:
+                self._count("disk_hits")
+                self._remember(key, image)
+                return image
+
+        image = render_qr(code_value, fmt, scale)
+        self._count("renders")
+        if self.disk_dir:
+            self._write_disk(key, image)
+        self._remember(key, image)
+        return image
+
+    def store(self, code_value: str, png: bytes, remember: bool = False):
+        """
+        Save a default PNG rendered elsewhere to the disk tier, if enabled, and to memory
+        if remember is set (bulk issuance leaves memory alone).
+        """
+        key = (code_value, "png", DEFAULT_SCALE)
+        if self.disk_dir:
+            self._write_disk(key, png)
+        if remember:
+            self._remember(key, png)
+
+    def discard(self, code_values: Iterable[str]) -> int:
+        """
+        Delete every cached variant of these codes (expired or revoked) from memory and
+        disk. Returns the number of disk files removed.
+        """
+        code_values = set(code_values)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in code_values]:
+                del self._entries[key]
+        if not self.disk_dir:
+            return 0
+
+        removed = 0
+        for code_value in code_values:
+            digest = qr_digest(code_value)
+            directory = shard_dir(self.disk_dir, digest)
+            try:
+                names = [name for name in os.listdir(directory) if name.startswith(digest)]
+            except FileNotFoundError:
+                continue
+            for name in names:
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    self._count("disk_errors")
+                    logger.warning("Failed to delete cached QR image %s", name, exc_info=True)
+        with self._lock:
+            self._stats["disk_removed"] += removed
+        return removed
+
+    def migrate_flat_files(self, legacy_dir: Optional[str] = None) -> Dict:
+        """
+        One-time move of files from the old flat layout into shard directories: cache files
+        at the top of disk_dir, and <kind>_<id>_<code>.png files from legacy_dir (the old
+        generated_qr directory), which are renamed by digest. The emptied legacy_dir is removed.
+        """
+        summary = {"moved": 0, "legacy_moved": 0, "skipped": 0}
+        if not self.disk_dir:
+            return summary
+
+        moves = []
+        for name in os.listdir(self.disk_dir):
+            match = _CACHE_FILE.match(name)
+            if match:
+                moves.append((os.path.join(self.disk_dir, name), match.group(1), name, "moved"))
+        if legacy_dir and os.path.isdir(legacy_dir):
+            for name in os.listdir(legacy_dir):
+                match = _LEGACY_FILE.match(name)
+                if match:
+                    digest = qr_digest(match.group(1))
+                    moves.append((os.path.join(legacy_dir, name), digest, f"{digest}.png", "legacy_moved"))
+                else:
+                    summary["skipped"] += 1
+
+        for source, digest, name, counter in moves:
+            directory = shard_dir(self.disk_dir, digest)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                os.replace(source, os.path.join(directory, name))
+                summary[counter] += 1
+            except OSError:
+                summary["skipped"] += 1
+                logger.warning("Failed to move QR image %s", source, exc_info=True)
+
+        if legacy_dir and os.path.isdir(legacy_dir) and not os.listdir(legacy_dir):
+            os.rmdir(legacy_dir)
+        return summary
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._entries)
+            stats["memory_bytes"] = sum(len(image) for image in self._entries.values())
+        stats["max_entries"] = self.max_entries
+        stats["disk_dir"] = self.disk_dir
+        return stats
+
+
+_cache: Optional[QRImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache() -> QRImageCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                qr_settings = get_settings().qr
+                _cache = QRImageCache(qr_settings.memory_cache_entries, qr_settings.disk_cache_dir)
+    return _cache
+
+
+def get_qr_image(code_value: str, fmt: str = "png", scale: int = DEFAULT_SCALE) -> bytes:
+    """PNG or SVG image for a QR code value, rendered on first use and cached."""
+    return _get_cache().get_image(code_value, fmt, scale)
+
+
+def get_qr_image_cache_stats() -> Dict:
+    return _get_cache().stats()
+
+
+def discard_qr_images(code_values: Iterable[str]) -> int:
+    """Delete cached images of expired or revoked codes; returns disk files removed."""
+    return _get_cache().discard(code_values)
+
+
+def _on_qr_codes_expired(event: Dict):
+    discard_qr_images(event["code_values"])
+
+
+subscribe(QR_CODES_EXPIRED, _on_qr_codes_expired)
+
+
+def migrate_qr_image_layout(legacy_dir: Optional[str] = None) -> Dict:
+    return _get_cache().migrate_flat_files(legacy_dir)
+
+
+# Below this many codes, rendering in-process is faster than shipping work to the pool
+_POOL_THRESHOLD = 32
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """
+    The pool is first used from request and background threads, and forking a process
+    that already runs threads can leave a child stuck on a copied lock. Workers are
+    started by a forkserver (spawn where that is unavailable); they only need render_qr_png.
+    """
+    global _render_pool
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                processes = get_settings().qr.bulk_render_processes or os.cpu_count() or 1
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                _render_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(method))
+    return _render_pool
+
+
+def render_many(code_values: Iterable[str]) -> Iterator[bytes]:
+    """
+    Render many codes across the bulk render process pool, yielding PNGs in input order.
+    Results are also written to the disk tier so later single downloads are cache hits.
+    """
+    code_values = list(code_values)
+    if len(code_values) < _POOL_THRESHOLD:
+        pngs = map(render_qr_png, code_values)
+    else:
+        pngs = _get_render_pool().map(render_qr_png, code_values, chunksize=32)
+    cache = _get_cache()
+    for code_value, png in zip(code_values, pngs):
+        cache.store(code_value, png)
+        yield png
+
+
+def prerender(code_value: str):
+    """
+    Render a newly issued code's default PNG on the render pool and cache it, without
+    waiting, so its first download is a cache hit. Failures only cost that first hit.
+    """
+    cache = _get_cache()
+
+    def _store(future):
+        try:
+            cache.store(code_value, future.result(), remember=True)
+        except Exception:
+            logger.warning("Failed to prerender QR image", exc_info=True)
+
+    try:
+        _get_render_pool().submit(render_qr_png, code_value).add_done_callback(_store)
+    except RuntimeError:
+        # Pool already shut down (application stopping)
+        pass
+
+
+def shutdown_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
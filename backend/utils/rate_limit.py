@@ -0,0 +1,225 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from backend.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # optional: only needed for [rate_limit] backend = redis
+    redis = None
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets keyed by string, e.g. "ip:10.0.0.5" or "user:guard1".
+    Each bucket holds up to `capacity` tokens and refills at `refill_per_second`.
+    At most `max_keys` buckets are kept; the least recently used is dropped first,
+    which only ever forgives a client, never blocks one wrongly.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, max_keys: int):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take `cost` tokens from a bucket. Returns (allowed, seconds until allowed)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        if allowed:
+            return True, 0.0
+        return False, (cost - tokens) / self.refill_per_second if self.refill_per_second else 60.0
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Refill and take in one round trip so concurrent workers see a consistent bucket.
+# KEYS[1] = bucket key; ARGV = capacity, refill_per_second, now (seconds), cost, ttl_ms
+_REDIS_TOKEN_BUCKET = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ARGV[5])
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisTokenBucketLimiter:
+    """
+    Token buckets shared by all workers through Redis. Keys expire once a bucket would
+    be full again, so memory stays bounded by the number of recently active clients.
+    Fails open (allows the attempt) if Redis is unreachable.
+    """
+
+    def __init__(self, client, capacity: float, refill_per_second: float, namespace: str):
+        self.client = client
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.namespace = namespace
+        self._script = client.register_script(_REDIS_TOKEN_BUCKET)
+        self.errors = 0
+        self.evictions = 0
+
+    def hit(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        ttl_ms = int(self.capacity / self.refill_per_second * 1000) + 1000 if self.refill_per_second else 3600000
+        try:
+            allowed, tokens = self._script(
+                keys=[f"{self.namespace}:{key}"],
+                args=[self.capacity, self.refill_per_second, time.time(), cost, ttl_ms],
+            )
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis rate limit check failed; allowing request", exc_info=True)
+            return True, 0.0
+        if int(allowed):
+            return True, 0.0
+        return False, (cost - float(tokens)) / self.refill_per_second if self.refill_per_second else 60.0
+
+    def size(self) -> Optional[int]:
+        return None
+
+    def clear(self):
+        pass
+
+
+class LoginThrottle:
+    """
+    Per-IP and per-username buckets checked before a login attempt touches the database.
+    With enabled=False every attempt is allowed (and counted), for load tests.
+    """
+
+    def __init__(self, ip_limiter, user_limiter, backend: str, enabled: bool = True):
+        self.ip_limiter = ip_limiter
+        self.user_limiter = user_limiter
+        self.backend = backend
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected_ip = 0
+        self.rejected_user = 0
+
+    def check(self, client_ip: Optional[str], username: str) -> Tuple[bool, int]:
+        """Returns (allowed, retry_after_seconds)."""
+        if not self.enabled:
+            with self._lock:
+                self.allowed += 1
+            return True, 0
+
+        allowed, wait = self.ip_limiter.hit(f"ip:{client_ip or 'unknown'}")
+        if not allowed:
+            with self._lock:
+                self.rejected_ip += 1
+            return False, max(1, math.ceil(wait))
+
+        allowed, wait = self.user_limiter.hit(f"user:{username.strip().lower()}")
+        if not allowed:
+            with self._lock:
+                self.rejected_user += 1
+            return False, max(1, math.ceil(wait))
+
+        with self._lock:
+            self.allowed += 1
+        return True, 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                "enabled": self.enabled,
+                "backend": self.backend,
+                "allowed": self.allowed,
+                "rejected_ip": self.rejected_ip,
+                "rejected_user": self.rejected_user,
+            }
+        stats["tracked_ip_buckets"] = self.ip_limiter.size()
+        stats["tracked_user_buckets"] = self.user_limiter.size()
+        stats["evictions"] = self.ip_limiter.evictions + self.user_limiter.evictions
+        if self.backend == "redis":
+            stats["redis_errors"] = self.ip_limiter.errors + self.user_limiter.errors
+        return stats
+
+
+def _build_login_throttle() -> LoginThrottle:
+    limits = get_settings().rate_limit
+    if not limits.login_throttle:
+        logger.warning("[rate_limit] login_throttle = false: login attempts are not throttled")
+    ip_rate = limits.login_ip_per_minute / 60.0
+    user_rate = limits.login_user_per_minute / 60.0
+
+    if limits.backend == "redis":
+        if redis is None:
+            logger.warning("[rate_limit] backend = redis but the redis package is not installed; using memory")
+        else:
+            client = redis.Redis.from_url(limits.redis_url)
+            return LoginThrottle(
+                RedisTokenBucketLimiter(client, limits.login_ip_burst, ip_rate, "vms:login"),
+                RedisTokenBucketLimiter(client, limits.login_user_burst, user_rate, "vms:login"),
+                "redis",
+                limits.login_throttle,
+            )
+
+    return LoginThrottle(
+        TokenBucketLimiter(limits.login_ip_burst, ip_rate, limits.max_tracked_keys),
+        TokenBucketLimiter(limits.login_user_burst, user_rate, limits.max_tracked_keys),
+        "memory",
+        limits.login_throttle,
+    )
+
+
+_login_throttle: Optional[LoginThrottle] = None
+_login_throttle_limits = None
+_login_throttle_lock = threading.Lock()
+
+
+def get_login_throttle() -> LoginThrottle:
+    """Return the login throttle, rebuilding it (and dropping buckets) if a reload changed the limits."""
+    global _login_throttle, _login_throttle_limits
+    limits = get_settings().rate_limit
+    if _login_throttle is None or _login_throttle_limits != limits:
+        with _login_throttle_lock:
+            if _login_throttle is None or _login_throttle_limits != limits:
+                _login_throttle = _build_login_throttle()
+                _login_throttle_limits = limits
+    return _login_throttle
+
+
+def get_client_ip(request) -> Optional[str]:
+    """Client address of a request, honouring X-Forwarded-For only when configured to."""
+    if get_settings().rate_limit.trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
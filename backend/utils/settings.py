@@ -0,0 +1,305 @@
+import configparser
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config', 'config.ini'))
+
+# Placeholder values shipped in config.ini
+_PLACEHOLDER_SECRET_KEY = 'your-secret-key-here'
+_DEVELOPMENT_SECRET_KEY = 'default-secret-key-change-in-production'
+_PLACEHOLDER_SENDER_EMAIL = 'your_email@gmail.com'
+_PLACEHOLDER_SENDER_PASSWORD = 'your_password'
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    host: str
+    port: int
+    user: str
+    password: str
+    database: str
+    max_streams: int
+
+
+@dataclass(frozen=True)
+class EmailSettings:
+    smtp_server: Optional[str]
+    smtp_port: int
+    sender_email: Optional[str]
+    sender_password: Optional[str]
+    admin_email: Optional[str]
+    queue_size: int
+    max_attempts: int
+    retry_delay_seconds: float
+    idle_disconnect_seconds: float
+
+    @property
+    def has_credentials(self) -> bool:
+        """False while the sender credentials are still the config.ini placeholders."""
+        return bool(
+            self.sender_email and self.sender_password
+            and self.sender_email != _PLACEHOLDER_SENDER_EMAIL
+            and self.sender_password != _PLACEHOLDER_SENDER_PASSWORD
+        )
+
+
+@dataclass(frozen=True)
+class AppSettings:
+    secret_key: str
+    qr_code_expiry_hours: int
+    base_url: str
+    server_timing: bool
+
+
+@dataclass(frozen=True)
+class AuthSettings:
+    token_cache_size: int
+    denylist_sync_seconds: int
+
+
+@dataclass(frozen=True)
+class SecuritySettings:
+    scrypt_n: int
+    scrypt_r: int
+    scrypt_p: int
+    hash_workers: int
+    hash_max_pending: int
+
+
+@dataclass(frozen=True)
+class RateLimitSettings:
+    login_throttle: bool
+    backend: str
+    redis_url: str
+    login_ip_burst: int
+    login_ip_per_minute: float
+    login_user_burst: int
+    login_user_per_minute: float
+    max_tracked_keys: int
+    trust_forwarded_for: bool
+
+
+@dataclass(frozen=True)
+class AuditSettings:
+    batch_size: int
+    flush_interval_ms: int
+    max_queue: int
+
+
+@dataclass(frozen=True)
+class RetentionSettings:
+    enabled: bool
+    interval_hours: float
+    future_partitions: int
+    access_logs_months: int
+    employee_scan_logs_months: int
+    visitor_scan_logs_months: int
+    archive_dir: str
+
+
+@dataclass(frozen=True)
+class ExportSettings:
+    workers: int
+    max_pending: int
+    spool_dir: str
+    ttl_hours: float
+    sweep_interval_minutes: float
+
+
+@dataclass(frozen=True)
+class QRSettings:
+    memory_cache_entries: int
+    disk_cache_dir: str
+    bulk_render_processes: int
+    bulk_max_employees: int
+    download_index_entries: int
+    download_index_ttl_seconds: float
+    employee_max_age_seconds: int
+    gc_interval_minutes: int
+    gc_batch_size: int
+    legacy_dir: str
+    prerender_visitor_codes: bool
+    visitor_pool_size: int
+    visitor_pool_refill_seconds: float
+
+
+@dataclass(frozen=True)
+class ExpirySettings:
+    enabled: bool
+    interval_seconds: float
+    batch_size: int
+    pending_visit_hours: float
+
+
+@dataclass(frozen=True)
+class Settings:
+    database: DatabaseSettings
+    email: EmailSettings
+    app: AppSettings
+    auth: AuthSettings
+    security: SecuritySettings
+    rate_limit: RateLimitSettings
+    audit: AuditSettings
+    retention: RetentionSettings
+    exports: ExportSettings
+    qr: QRSettings
+    expiry: ExpirySettings
+    config_path: str
+
+
+def _resolve_path(path: str, config_path: str) -> str:
+    """Relative paths in config.ini are relative to the backend directory."""
+    if os.path.isabs(path):
+        return path
+    return os.path.abspath(os.path.join(os.path.dirname(config_path), '..', path))
+
+
+def load_settings(config_path: str = CONFIG_PATH) -> Settings:
+    """Parse config.ini into a Settings object."""
+    config = configparser.ConfigParser()
+    config.read(config_path)
+
+    secret_key = config.get('app', 'secret_key', fallback=_PLACEHOLDER_SECRET_KEY)
+    if secret_key == _PLACEHOLDER_SECRET_KEY:
+        # Use a default secret for development (should be changed in production)
+        secret_key = _DEVELOPMENT_SECRET_KEY
+
+    qr_disk_cache_dir = config.get('qr', 'disk_cache_dir', fallback='qr_cache').strip()
+
+    return Settings(
+        database=DatabaseSettings(
+            host=config.get('database', 'host', fallback='localhost'),
+            port=config.getint('database', 'port', fallback=3306),
+            user=config.get('database', 'user', fallback='root'),
+            password=config.get('database', 'password', fallback=''),
+            database=config.get('database', 'database', fallback='Visitor_Management_System'),
+            max_streams=config.getint('database', 'max_streams', fallback=4),
+        ),
+        email=EmailSettings(
+            smtp_server=config.get('email', 'smtp_server', fallback=None),
+            smtp_port=config.getint('email', 'smtp_port', fallback=587),
+            sender_email=config.get('email', 'sender_email', fallback=None),
+            sender_password=config.get('email', 'sender_password', fallback=None),
+            admin_email=config.get('email', 'admin_email', fallback=None),
+            queue_size=config.getint('email', 'queue_size', fallback=500),
+            max_attempts=config.getint('email', 'max_attempts', fallback=3),
+            retry_delay_seconds=config.getfloat('email', 'retry_delay_seconds', fallback=30),
+            idle_disconnect_seconds=config.getfloat('email', 'idle_disconnect_seconds', fallback=10),
+        ),
+        app=AppSettings(
+            secret_key=secret_key,
+            qr_code_expiry_hours=config.getint('app', 'qr_code_expiry_hours', fallback=24),
+            base_url=config.get('app', 'base_url', fallback=''),
+            server_timing=config.getboolean('app', 'server_timing', fallback=False),
+        ),
+        auth=AuthSettings(
+            token_cache_size=config.getint('auth', 'token_cache_size', fallback=10000),
+            denylist_sync_seconds=config.getint('auth', 'denylist_sync_seconds', fallback=5),
+        ),
+        security=SecuritySettings(
+            scrypt_n=config.getint('security', 'scrypt_n', fallback=16384),
+            scrypt_r=config.getint('security', 'scrypt_r', fallback=8),
+            scrypt_p=config.getint('security', 'scrypt_p', fallback=1),
+            hash_workers=config.getint('security', 'hash_workers', fallback=2),
+            hash_max_pending=config.getint('security', 'hash_max_pending', fallback=8),
+        ),
+        rate_limit=RateLimitSettings(
+            login_throttle=config.getboolean('rate_limit', 'login_throttle', fallback=True),
+            backend=config.get('rate_limit', 'backend', fallback='memory'),
+            redis_url=config.get('rate_limit', 'redis_url', fallback='redis://localhost:6379/0'),
+            login_ip_burst=config.getint('rate_limit', 'login_ip_burst', fallback=60),
+            login_ip_per_minute=config.getfloat('rate_limit', 'login_ip_per_minute', fallback=300),
+            login_user_burst=config.getint('rate_limit', 'login_user_burst', fallback=5),
+            login_user_per_minute=config.getfloat('rate_limit', 'login_user_per_minute', fallback=5),
+            max_tracked_keys=config.getint('rate_limit', 'max_tracked_keys', fallback=100000),
+            trust_forwarded_for=config.getboolean('rate_limit', 'trust_forwarded_for', fallback=False),
+        ),
+        audit=AuditSettings(
+            batch_size=config.getint('audit', 'batch_size', fallback=200),
+            flush_interval_ms=config.getint('audit', 'flush_interval_ms', fallback=200),
+            max_queue=config.getint('audit', 'max_queue', fallback=10000),
+        ),
+        retention=RetentionSettings(
+            enabled=config.getboolean('retention', 'enabled', fallback=True),
+            interval_hours=config.getfloat('retention', 'interval_hours', fallback=24),
+            future_partitions=config.getint('retention', 'future_partitions', fallback=3),
+            access_logs_months=config.getint('retention', 'access_logs_months', fallback=0),
+            employee_scan_logs_months=config.getint('retention', 'employee_scan_logs_months', fallback=0),
+            visitor_scan_logs_months=config.getint('retention', 'visitor_scan_logs_months', fallback=0),
+            archive_dir=_resolve_path(config.get('retention', 'archive_dir', fallback='archive'), config_path),
+        ),
+        exports=ExportSettings(
+            workers=config.getint('exports', 'workers', fallback=2),
+            max_pending=config.getint('exports', 'max_pending', fallback=20),
+            spool_dir=_resolve_path(config.get('exports', 'spool_dir', fallback='exports'), config_path),
+            ttl_hours=config.getfloat('exports', 'ttl_hours', fallback=24),
+            sweep_interval_minutes=config.getfloat('exports', 'sweep_interval_minutes', fallback=10),
+        ),
+        qr=QRSettings(
+            memory_cache_entries=config.getint('qr', 'memory_cache_entries', fallback=2048),
+            disk_cache_dir=_resolve_path(qr_disk_cache_dir, config_path) if qr_disk_cache_dir else '',
+            bulk_render_processes=config.getint('qr', 'bulk_render_processes', fallback=0),
+            bulk_max_employees=config.getint('qr', 'bulk_max_employees', fallback=5000),
+            download_index_entries=config.getint('qr', 'download_index_entries', fallback=10000),
+            download_index_ttl_seconds=config.getfloat('qr', 'download_index_ttl_seconds', fallback=60),
+            employee_max_age_seconds=config.getint('qr', 'employee_max_age_seconds', fallback=3600),
+            gc_interval_minutes=config.getint('qr', 'gc_interval_minutes', fallback=60),
+            gc_batch_size=config.getint('qr', 'gc_batch_size', fallback=500),
+            legacy_dir=_resolve_path(config.get('qr', 'legacy_dir', fallback='generated_qr'), config_path),
+            prerender_visitor_codes=config.getboolean('qr', 'prerender_visitor_codes', fallback=True),
+            visitor_pool_size=config.getint('qr', 'visitor_pool_size', fallback=200),
+            visitor_pool_refill_seconds=config.getfloat('qr', 'visitor_pool_refill_seconds', fallback=15),
+        ),
+        expiry=ExpirySettings(
+            enabled=config.getboolean('expiry', 'enabled', fallback=True),
+            interval_seconds=config.getfloat('expiry', 'interval_seconds', fallback=60),
+            batch_size=config.getint('expiry', 'batch_size', fallback=500),
+            pending_visit_hours=config.getfloat('expiry', 'pending_visit_hours', fallback=24),
+        ),
+        config_path=config_path,
+    )
+
+
+_lock = threading.Lock()
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Return the current settings, loading config.ini on first use only."""
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                _settings = load_settings()
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """
+    Re-read config.ini and swap in the new settings.
+    Database pools keep their existing connections; connection settings apply on restart.
+    """
+    global _settings
+    new_settings = load_settings()
+    with _lock:
+        _settings = new_settings
+    logger.info("Settings reloaded from %s", new_settings.config_path)
+    return new_settings
+
+
+def install_reload_signal_handler():
+    """Reload settings on SIGHUP where the platform supports it."""
+    import signal
+
+    if not hasattr(signal, 'SIGHUP'):
+        return
+    try:
+        signal.signal(signal.SIGHUP, lambda signum, frame: reload_settings())
+    except ValueError:
+        # Not running in the main thread; admin endpoint reload still works
+        logger.warning("Could not install SIGHUP handler for settings reload")
@@ -0,0 +1,129 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Tuple
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Spans recorded during the current request (None outside a request)
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+_lock = threading.Lock()
+_histograms: Dict[str, Dict] = {}
+
+
+def _new_histogram() -> Dict:
+    return {
+        "count": 0,
+        "sum_ms": 0.0,
+        "max_ms": 0.0,
+        "buckets": [0] * (len(BUCKET_BOUNDS_MS) + 1),
+    }
+
+
+def record(name: str, duration_ms: float):
+    """Add a single stage duration to its histogram and to the current request's spans."""
+    index = len(BUCKET_BOUNDS_MS)
+    for i, bound in enumerate(BUCKET_BOUNDS_MS):
+        if duration_ms <= bound:
+            index = i
+            break
+
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = _new_histogram()
+        hist["count"] += 1
+        hist["sum_ms"] += duration_ms
+        if duration_ms > hist["max_ms"]:
+            hist["max_ms"] = duration_ms
+        hist["buckets"][index] += 1
+
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((name, duration_ms))
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block of code as a named pipeline stage.
+    Example: with stage("scan_employee.insert"): db.execute(...)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000.0)
+
+
+def begin_request():
+    """Start collecting spans for the current request. Returns a token for end_request()."""
+    return _request_spans.set([])
+
+
+def end_request(token) -> List[Tuple[str, float]]:
+    """Stop collecting spans and return the ones recorded for the request."""
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return spans
+
+
+def format_server_timing(spans: List[Tuple[str, float]]) -> str:
+    """Build a Server-Timing header value, summing repeated stages."""
+    totals: Dict[str, float] = {}
+    for name, duration_ms in spans:
+        totals[name] = totals.get(name, 0.0) + duration_ms
+    return ", ".join(f"{name};dur={duration_ms:.2f}" for name, duration_ms in totals.items())
+
+
+def _percentile(hist: Dict, fraction: float) -> Optional[float]:
+    """Approximate a percentile as the upper bound of the bucket it falls into."""
+    if not hist["count"]:
+        return None
+    target = hist["count"] * fraction
+    seen = 0
+    for i, bucket_count in enumerate(hist["buckets"]):
+        seen += bucket_count
+        if seen >= target:
+            if i < len(BUCKET_BOUNDS_MS):
+                return round(min(BUCKET_BOUNDS_MS[i], hist["max_ms"]), 2)
+            return round(hist["max_ms"], 2)
+    return round(hist["max_ms"], 2)
+
+
+def get_stage_stats(prefix: Optional[str] = None) -> Dict[str, Dict]:
+    """Return a summary of every stage histogram, optionally filtered by name prefix."""
+    with _lock:
+        snapshot = {
+            name: {
+                "count": hist["count"],
+                "sum_ms": hist["sum_ms"],
+                "max_ms": hist["max_ms"],
+                "buckets": list(hist["buckets"]),
+            }
+            for name, hist in _histograms.items()
+            if not prefix or name.startswith(prefix)
+        }
+
+    stats = {}
+    for name, hist in sorted(snapshot.items()):
+        bucket_labels = [f"le_{bound}ms" for bound in BUCKET_BOUNDS_MS] + ["gt_5000ms"]
+        stats[name] = {
+            "count": hist["count"],
+            "avg_ms": round(hist["sum_ms"] / hist["count"], 2) if hist["count"] else None,
+            "max_ms": round(hist["max_ms"], 2),
+            "p50_ms": _percentile(hist, 0.50),
+            "p95_ms": _percentile(hist, 0.95),
+            "p99_ms": _percentile(hist, 0.99),
+            "buckets": dict(zip(bucket_labels, hist["buckets"])),
+        }
+    return stats
+
+
+def reset_stage_stats():
+    """Clear all stage histograms."""
+    with _lock:
+        _histograms.clear()
@@ -4,10 +4,10 @@ Uses backend.database.connection.Database to read credentials from
 `backend/config/config.ini`. Exits gracefully on connection failure.
 """
 
-from hashlib import sha256
 import sys
 
 from backend.database.connection import Database
+from backend.utils.password_hasher import hash_password_sync
 
 
 def main():
@@ -37,7 +37,7 @@ def main():
             return
 
         # Insert admin user
-        admin_password = sha256("admin123".encode()).hexdigest()
+        admin_password = hash_password_sync("admin123")
         success = db.execute(
             "INSERT INTO Users (username, password_hash, role_id) VALUES (%s, %s, (SELECT role_id FROM Roles WHERE role_name = 'admin'))",
             ("admin", admin_password),
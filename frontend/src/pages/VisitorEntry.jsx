@@ -5,6 +5,21 @@ import { useAuth } from '../contexts/AuthContext'
 import { useData } from '../contexts/DataContext'
 import { Link } from 'react-router-dom'
 
+// Link email states that can still change, and how long to keep checking (3s apart)
+const PENDING_EMAIL_STATUSES = ['queued', 'sending', 'retrying', 'unknown']
+const EMAIL_STATUS_MAX_POLLS = 60
+
+const EMAIL_STATUS_LABELS = {
+  queued: 'Queued',
+  sending: 'Sending...',
+  retrying: 'Retrying...',
+  sent: 'Sent',
+  failed: 'Failed',
+  skipped: 'Not sent (email is not configured)',
+  not_requested: 'Not sent (QR code was already issued)',
+  unknown: 'Pending'
+}
+
 const VisitorEntry = () => {
   const { user } = useAuth()
   const { sites, employees } = useData()
@@ -19,6 +34,7 @@ const VisitorEntry = () => {
   })
   const [loading, setLoading] = useState(false)
   const [qrData, setQrData] = useState(null)
+  const [emailStatus, setEmailStatus] = useState(null)
 
   useEffect(() => {
     // Update site_id when sites are loaded
@@ -30,6 +46,23 @@ const VisitorEntry = () => {
     }
   }, [sites])
 
+  useEffect(() => {
+    // The QR link email is sent in the background; poll until it is sent or has failed
+    if (!qrData?.visitor_qr_id || !PENDING_EMAIL_STATUSES.includes(emailStatus)) return
+    let polls = 0
+    const interval = setInterval(async () => {
+      polls += 1
+      try {
+        const response = await api.get(`/qr/email-status/${qrData.visitor_qr_id}`)
+        setEmailStatus(response.data.status)
+      } catch (error) {
+        console.error('Email status error:', error)
+      }
+      if (polls >= EMAIL_STATUS_MAX_POLLS) clearInterval(interval)
+    }, 3000) // Check every 3 seconds
+    return () => clearInterval(interval)
+  }, [qrData, emailStatus])
+
   const handleChange = (e) => {
     setFormData({
       ...formData,
@@ -100,6 +133,7 @@ const VisitorEntry = () => {
           recipient_email: formData.email
         })
         setQrData(qrResponse.data)
+        setEmailStatus(qrResponse.data.email_status || null)
         
         // Step 4: Send QR code via email if email provided
         if (qrResponse.data.code_value) {
@@ -269,7 +303,7 @@ const VisitorEntry = () => {
             <p><strong>Visit ID:</strong> {qrData.visit_id}</p>
             <p><strong>QR Code Value:</strong> {qrData.code_value}</p>
             <p><strong>Expiry Date:</strong> {qrData.expiry_date ? new Date(qrData.expiry_date).toLocaleString() : 'N/A'}</p>
-            <p><strong>Email Sent:</strong> {qrData.email_sent ? 'Yes' : 'No'}</p>
+            <p><strong>Email Status:</strong> {EMAIL_STATUS_LABELS[emailStatus] || (qrData.email_sent ? 'Sent' : 'Not sent')}</p>
             {qrData.download_url && (
               <a
                 href={qrData.download_url}
@@ -0,0 +1,2 @@
+# Load-test harness package
+
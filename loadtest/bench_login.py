@@ -0,0 +1,221 @@
+"""Benchmark login throughput and its effect on scan latency.
+
+Runs the kiosk scan mix alone, then again while login threads hammer
+/auth/login (a shift change), and compares scan tail latency between the two
+phases. Login clients cycle through the security users created by
+`loadtest.seed`, so each attempt hashes and checks a different account. Run the
+server with `[rate_limit] login_throttle = false`: every client shares one IP,
+and the throttle would otherwise turn most logins into 429s. With --offline it instead measures raw password hashing throughput in
+this process, which is handy when tuning the [security] scrypt cost.
+
+Usage:
+    python -m loadtest.bench_login --kiosks 4 --logins 16 --duration 30
+    python -m loadtest.bench_login --offline --threads 4 --count 200
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from typing import List
+from urllib.parse import urlparse
+
+from loadtest.driver import Kiosk, Results, _login, _percentile, _split, build_report
+from loadtest.seed import DEFAULT_MANIFEST
+
+
+class LoginClient(threading.Thread):
+    def __init__(self, client_id: int, base_url: str, usernames: List[str], password: str, results: Results,
+                 deadline: float, timeout: float):
+        super().__init__(name=f"login-{client_id}", daemon=True)
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.bodies = [json.dumps({"username": username, "password": password}) for username in usernames]
+        self.results = results
+        self.deadline = deadline
+        self.timeout = timeout
+
+    def run(self):
+        conn = None
+        attempt = 0
+        while time.time() < self.deadline:
+            body = self.bodies[attempt % len(self.bodies)]
+            attempt += 1
+            start = time.perf_counter()
+            error_class = None
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                conn.request("POST", "/auth/login", body=body, headers={"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    error_class = f"http_{response.status}"
+            except (ConnectionError, http.client.HTTPException, OSError) as e:
+                error_class = f"connection_error: {type(e).__name__}"
+                conn = None
+            self.results.add("/auth/login", (time.perf_counter() - start) * 1000.0, error_class)
+
+
+def _login_users(args, manifest) -> List[str]:
+    """Seeded usernames from the manifest, or just --username for an older manifest."""
+    usernames = manifest.get("login_users") or []
+    if not usernames:
+        print(f"! Manifest has no login users; every client logs in as {args.username}, "
+              f"which the per-username throttle limits. Re-run `python -m loadtest.seed`.")
+        return [args.username]
+    return usernames
+
+
+def _run_phase(args, manifest, token: str, logins: int) -> Results:
+    results = Results()
+    deadline = time.time() + args.duration
+    employee_slices = _split(manifest["employee_codes"], args.kiosks)
+    # Visitors are consumed by check-in/out, so give each phase its own half
+    visitor_slices = _split(manifest["visitor_codes"][(1 if logins else 0)::2], args.kiosks)
+    threads: List[threading.Thread] = [
+        Kiosk(i, args.base_url, token, employee_slices[i], visitor_slices[i], results, deadline, 0.0, args.timeout)
+        for i in range(args.kiosks)
+    ]
+    if logins:
+        usernames = _login_users(args, manifest)
+        password = manifest.get("login_password", args.password)
+        # Clients take interleaved slices so no two of them log in as the same user
+        user_slices = _split(usernames, logins) if len(usernames) >= logins else [usernames] * logins
+        threads += [
+            LoginClient(i, args.base_url, user_slices[i], password, results, deadline, args.timeout)
+            for i in range(logins)
+        ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _scan_tail(results: Results) -> dict:
+    latencies = sorted(
+        latency
+        for endpoint, values in results.latencies.items() if endpoint != "/auth/login"
+        for latency in values
+    )
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(_percentile(latencies, 0.50), 2),
+        "p95_ms": round(_percentile(latencies, 0.95), 2),
+        "p99_ms": round(_percentile(latencies, 0.99), 2),
+    }
+
+
+def run_online(args):
+    try:
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read manifest {args.manifest}: {e}. Run `python -m loadtest.seed` first.")
+        sys.exit(1)
+
+    try:
+        token = _login(args.base_url, args.username, args.password)
+    except Exception as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    baseline = _run_phase(args, manifest, token, logins=0)
+    under_load = _run_phase(args, manifest, token, logins=args.logins)
+
+    login_latencies = sorted(under_load.latencies.get("/auth/login", []))
+    login_errors = dict(under_load.errors.get("/auth/login", {}))
+    report = {
+        "duration_seconds": args.duration,
+        "scan_baseline": _scan_tail(baseline),
+        "scan_under_login_load": _scan_tail(under_load),
+        "login": {
+            "clients": args.logins,
+            "requests": len(login_latencies),
+            "ok": under_load.ok.get("/auth/login", 0),
+            "throughput_rps": round(under_load.ok.get("/auth/login", 0) / args.duration, 2),
+            "p50_ms": round(_percentile(login_latencies, 0.50), 2),
+            "p95_ms": round(_percentile(login_latencies, 0.95), 2),
+            "p99_ms": round(_percentile(login_latencies, 0.99), 2),
+            "errors": login_errors,
+        },
+        "under_load_detail": build_report(under_load, args.duration),
+    }
+
+    print("=" * 60)
+    print(f"LOGIN BENCHMARK ({args.kiosks} kiosks, {args.logins} login clients, {args.duration}s per phase)")
+    print("=" * 60)
+    print(f"{'scans':<24}{'reqs':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, key in (("baseline", "scan_baseline"), ("during logins", "scan_under_login_load")):
+        stats = report[key]
+        print(f"{label:<24}{stats['requests']:>8}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}")
+    login = report["login"]
+    print(f"\nlogins: {login['ok']} ok / {login['requests']} sent, {login['throughput_rps']} logins/s, "
+          f"p50 {login['p50_ms']}ms p95 {login['p95_ms']}ms p99 {login['p99_ms']}ms")
+    for error_class, count in sorted(login_errors.items(), key=lambda item: -item[1]):
+        print(f"  {count:>8}  {error_class}")
+    if login_errors.get("http_429"):
+        print("  (429s come from the login throttle; start the server with [rate_limit] login_throttle = false)")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def run_offline(args):
+    """Hash throughput of the configured KDF across threads, without the API."""
+    from backend.utils.password_hasher import hash_password_sync
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+    per_thread = max(1, args.count // args.threads)
+
+    def worker():
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            hash_password_sync("benchmark-password-1")
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{len(latencies)} hashes on {args.threads} thread(s) in {elapsed:.2f}s: "
+          f"{len(latencies) / elapsed:.1f} hashes/s, p50 {_percentile(latencies, 0.5):.1f}ms, "
+          f"p99 {_percentile(latencies, 0.99):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput under concurrent scan load")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="admin", help="Account the kiosks scan as")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Manifest written by loadtest.seed")
+    parser.add_argument("--kiosks", type=int, default=4, help="Concurrent scanning kiosks")
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent login clients in the second phase")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per phase")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    parser.add_argument("--offline", action="store_true", help="Measure raw hashing throughput instead")
+    parser.add_argument("--threads", type=int, default=2, help="Hashing threads for --offline")
+    parser.add_argument("--count", type=int, default=100, help="Total hashes for --offline")
+    args = parser.parse_args()
+
+    if args.offline:
+        run_offline(args)
+    else:
+        run_online(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark QR image rendering: time and size per output format.
+
+Renders a batch of code values shaped like the ones the service issues with
+the previous renderer (qrcode's PIL image factory, one rectangle per module)
+and with the current 1-bit PNG and SVG renderers at several scales, and
+reports milliseconds and bytes per code. Runs in-process; no server or
+database is needed.
+
+Usage:
+    python -m loadtest.bench_qr --count 500
+    python -m loadtest.bench_qr --count 500 --scales 4 10 20 --json qr_report.json
+"""
+
+import argparse
+import io
+import json
+import time
+import uuid
+from typing import Callable, Dict, List
+
+import qrcode
+
+from backend.utils.qr_images import BORDER, DEFAULT_SCALE, render_qr
+
+
+def _legacy_png(code_value: str, scale: int) -> bytes:
+    """The renderer used before formats were configurable."""
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=scale, border=BORDER)
+    qr.add_data(code_value)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _measure(render: Callable[[str], bytes], code_values: List[str]) -> Dict:
+    total_bytes = 0
+    start = time.perf_counter()
+    for code_value in code_values:
+        total_bytes += len(render(code_value))
+    elapsed = time.perf_counter() - start
+    return {
+        "ms_per_code": round(elapsed * 1000.0 / len(code_values), 3),
+        "bytes_per_code": round(total_bytes / len(code_values)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare QR render time and size per output format")
+    parser.add_argument("--count", type=int, default=300, help="Code values to render per variant")
+    parser.add_argument("--scales", type=int, nargs="+", default=[4, DEFAULT_SCALE, 20], help="Pixels per module")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    # Same shape as issued codes: "VIS_<visit_id>_<12 hex>" / "EMP_<employee_id>_<12 hex>"
+    code_values = [f"{'VIS' if i % 2 else 'EMP'}_{i + 1}_{uuid.uuid4().hex[:12]}" for i in range(args.count)]
+
+    results = []
+    for scale in args.scales:
+        variants = [
+            ("legacy png", lambda code, s=scale: _legacy_png(code, s)),
+            ("1-bit png", lambda code, s=scale: render_qr(code, "png", s)),
+            ("svg", lambda code, s=scale: render_qr(code, "svg", s)),
+        ]
+        for label, render in variants:
+            results.append({"format": label, "scale": scale, **_measure(render, code_values)})
+
+    print("=" * 52)
+    print(f"QR RENDER BENCHMARK ({args.count} codes per variant)")
+    print("=" * 52)
+    print(f"{'format':<14}{'scale':>7}{'ms/code':>12}{'bytes/code':>14}")
+    for row in results:
+        print(f"{row['format']:<14}{row['scale']:>7}{row['ms_per_code']:>12}{row['bytes_per_code']:>14}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"count": args.count, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Drive simulated scanner kiosks against a running API and report throughput and tail latency.
+
+Each kiosk is a thread with its own keep-alive HTTP connection and its own
+slice of the seeded employees and visitors, so sign-in/sign-out and
+check-in/check-out sequences stay realistic per badge. Kiosks occasionally
+send the same code twice in a row, the way door readers double-read a badge.
+
+Usage:
+    uvicorn backend.main:app --host 127.0.0.1 --port 8000 --workers 1
+    python -m loadtest.seed --employees 500 --visitors 200
+    python -m loadtest.driver --kiosks 8 --duration 60
+"""
+
+import argparse
+import http.client
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from loadtest.seed import DEFAULT_MANIFEST
+
+ENDPOINTS = ("/attendance/scan", "/scan/verify", "/visitor/checkin", "/visitor/checkout")
+
+
+class Results:
+    """Thread-safe collector of per-endpoint latencies and error classes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.ok: Dict[str, int] = defaultdict(int)
+
+    def add(self, endpoint: str, latency_ms: float, error_class: Optional[str]):
+        with self._lock:
+            self.latencies[endpoint].append(latency_ms)
+            if error_class:
+                self.errors[endpoint][error_class] += 1
+            else:
+                self.ok[endpoint] += 1
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _classify(status: int, body: bytes) -> Optional[str]:
+    """Map a response to an error class, or None on success."""
+    if 200 <= status < 300:
+        return None
+    detail = ""
+    try:
+        detail = json.loads(body).get("detail", "")
+        if not isinstance(detail, str):
+            detail = "validation error"
+    except Exception:
+        pass
+    return f"http_{status}: {detail}" if detail else f"http_{status}"
+
+
+class Kiosk(threading.Thread):
+    def __init__(self, kiosk_id: int, base_url: str, token: str, employee_codes: List[str],
+                 visitor_codes: List[str], results: Results, deadline: float, duplicate_rate: float,
+                 timeout: float):
+        super().__init__(name=f"kiosk-{kiosk_id}", daemon=True)
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.token = token
+        self.employee_codes = employee_codes
+        # Visitors move pending -> checked_in -> checked_out; track where each one is
+        self.pending_visitors = list(visitor_codes)
+        self.checked_in_visitors: List[str] = []
+        self.results = results
+        self.deadline = deadline
+        self.duplicate_rate = duplicate_rate
+        self.timeout = timeout
+        self.conn = None
+        self.rng = random.Random(kiosk_id)
+
+    def _connect(self):
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _post(self, path: str, qr_code: str) -> Tuple[int, bytes]:
+        body = json.dumps({"qr_code": qr_code})
+        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {self.token}"}
+        start = time.perf_counter()
+        error_class = None
+        status = 0
+        data = b""
+        try:
+            if self.conn is None:
+                self._connect()
+            self.conn.request("POST", path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+            error_class = _classify(status, data)
+        except TimeoutError:
+            error_class = "timeout"
+            self.conn = None
+        except (ConnectionError, http.client.HTTPException, OSError) as e:
+            error_class = f"connection_error: {type(e).__name__}"
+            self.conn = None
+        self.results.add(path, (time.perf_counter() - start) * 1000.0, error_class)
+        return status, data
+
+    def _scan(self, path: str, qr_code: str):
+        self._post(path, qr_code)
+        # Door readers often report the same badge twice within a second
+        if self.rng.random() < self.duplicate_rate:
+            self._post(path, qr_code)
+
+    def run(self):
+        while time.time() < self.deadline:
+            roll = self.rng.random()
+            if roll < 0.6 and self.employee_codes:
+                self._scan("/attendance/scan", self.rng.choice(self.employee_codes))
+            elif roll < 0.75 and (self.employee_codes or self.pending_visitors):
+                # Guards verify both badge types; visitors more rarely than staff
+                if self.pending_visitors and (not self.employee_codes or self.rng.random() < 0.3):
+                    self._scan("/scan/verify", self.rng.choice(self.pending_visitors))
+                else:
+                    self._scan("/scan/verify", self.rng.choice(self.employee_codes))
+            elif roll < 0.9 and self.pending_visitors:
+                code = self.pending_visitors.pop()
+                self._scan("/visitor/checkin", code)
+                self.checked_in_visitors.append(code)
+            elif self.checked_in_visitors:
+                code = self.checked_in_visitors.pop(0)
+                self._scan("/visitor/checkout", code)
+            elif self.employee_codes:
+                self._scan("/attendance/scan", self.rng.choice(self.employee_codes))
+            else:
+                break
+
+
+def _login(base_url: str, username: str, password: str) -> str:
+    parsed = urlparse(base_url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    conn.request(
+        "POST", "/auth/login",
+        body=json.dumps({"username": username, "password": password}),
+        headers={"Content-Type": "application/json"},
+    )
+    response = conn.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"Login failed ({response.status}): {data[:200]!r}")
+    return json.loads(data)["token"]
+
+
+def _split(items: List[str], parts: int) -> List[List[str]]:
+    return [items[i::parts] for i in range(parts)]
+
+
+def build_report(results: Results, elapsed: float) -> Dict:
+    """Summarise throughput, latency percentiles and error classes per endpoint."""
+    report = {"elapsed_seconds": round(elapsed, 2), "endpoints": {}}
+    all_latencies: List[float] = []
+    total_errors = 0
+    for endpoint in ENDPOINTS:
+        latencies = sorted(results.latencies.get(endpoint, []))
+        if not latencies:
+            continue
+        all_latencies.extend(latencies)
+        errors = dict(results.errors.get(endpoint, {}))
+        total_errors += sum(errors.values())
+        report["endpoints"][endpoint] = {
+            "requests": len(latencies),
+            "ok": results.ok.get(endpoint, 0),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(_percentile(latencies, 0.50), 2),
+            "p95_ms": round(_percentile(latencies, 0.95), 2),
+            "p99_ms": round(_percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "errors": errors,
+        }
+    all_latencies.sort()
+    report["total"] = {
+        "requests": len(all_latencies),
+        "errors": total_errors,
+        "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(all_latencies, 0.50), 2),
+        "p95_ms": round(_percentile(all_latencies, 0.95), 2),
+        "p99_ms": round(_percentile(all_latencies, 0.99), 2),
+    }
+    return report
+
+
+def print_report(report: Dict):
+    print("=" * 78)
+    print(f"LOAD TEST REPORT ({report['elapsed_seconds']}s, latencies in ms)")
+    print("=" * 78)
+    print(f"{'endpoint':<20}{'reqs':>8}{'ok':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<20}{stats['requests']:>8}{stats['ok']:>8}{stats['throughput_rps']:>9}"
+            f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['max_ms']:>9}"
+        )
+    total = report["total"]
+    print("-" * 78)
+    print(
+        f"{'total':<20}{total['requests']:>8}{total['requests'] - total['errors']:>8}{total['throughput_rps']:>9}"
+        f"{total['p50_ms']:>9}{total['p95_ms']:>9}{total['p99_ms']:>9}"
+    )
+    print("\nError classes:")
+    for endpoint, stats in report["endpoints"].items():
+        for error_class, count in sorted(stats["errors"].items(), key=lambda item: -item[1]):
+            print(f"  {endpoint:<20}{count:>8}  {error_class}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate scanner kiosks against the VMS API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Manifest written by loadtest.seed")
+    parser.add_argument("--kiosks", type=int, default=4, help="Number of concurrent kiosks")
+    parser.add_argument("--duration", type=float, default=30.0, help="Test duration in seconds")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05, help="Probability a scan is read twice")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    try:
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read manifest {args.manifest}: {e}. Run `python -m loadtest.seed` first.")
+        sys.exit(1)
+
+    try:
+        token = _login(args.base_url, args.username, args.password)
+    except Exception as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    results = Results()
+    deadline = time.time() + args.duration
+    employee_slices = _split(manifest["employee_codes"], args.kiosks)
+    visitor_slices = _split(manifest["visitor_codes"], args.kiosks)
+    kiosks = [
+        Kiosk(i, args.base_url, token, employee_slices[i], visitor_slices[i], results, deadline,
+              args.duplicate_rate, args.timeout)
+        for i in range(args.kiosks)
+    ]
+
+    start = time.perf_counter()
+    for kiosk in kiosks:
+        kiosk.start()
+    for kiosk in kiosks:
+        kiosk.join()
+    elapsed = time.perf_counter() - start
+
+    report = build_report(results, elapsed)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
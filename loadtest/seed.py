@@ -0,0 +1,188 @@
+"""Seed load-test data: N employees and M visitors with active QR codes, plus
+security users for the login benchmark.
+
+Writes directly through backend.database.connection.Database (configured by
+`backend/config/config.ini`) and skips QR image rendering, since the scan
+endpoints only ever look at code values. The generated code values and
+login usernames are written to a JSON manifest that `loadtest.driver` and
+`loadtest.bench_login` read.
+
+Usage:
+    python -m loadtest.seed --employees 500 --visitors 200 --login-users 64
+"""
+
+import argparse
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from backend.database.connection import Database
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(__file__), "manifest.json")
+CHUNK_SIZE = 500
+# Shared by every seeded login user, so the password is hashed once per seed run
+LOGIN_PASSWORD = "loadtest-login"
+
+
+def _insert_rows(db, table_sql: str, placeholders: str, rows: list) -> bool:
+    """Insert rows in multi-row INSERT statements of CHUNK_SIZE rows each."""
+    for i in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[i:i + CHUNK_SIZE]
+        sql = f"{table_sql} VALUES " + ", ".join([placeholders] * len(chunk))
+        params = tuple(value for row in chunk for value in row)
+        if not db.execute(sql, params):
+            return False
+    return True
+
+
+def _ensure_department(db) -> int:
+    dept = db.fetchone("SELECT department_id FROM Departments WHERE name = %s", ("Load Test",))
+    if not dept:
+        db.execute("INSERT INTO Departments (name) VALUES (%s)", ("Load Test",))
+        dept = db.fetchone("SELECT department_id FROM Departments WHERE name = %s", ("Load Test",))
+    return dept["department_id"]
+
+
+def _ensure_site(db) -> int:
+    site = db.fetchone("SELECT site_id FROM Sites WHERE site_name = %s", ("Load Test Site",))
+    if not site:
+        db.execute("INSERT INTO Sites (site_name, address) VALUES (%s, %s)", ("Load Test Site", "Load test"))
+        site = db.fetchone("SELECT site_id FROM Sites WHERE site_name = %s", ("Load Test Site",))
+    return site["site_id"]
+
+
+def _ensure_role(db, role_name: str) -> int:
+    role = db.fetchone("SELECT role_id FROM Roles WHERE role_name = %s", (role_name,))
+    if not role:
+        db.execute("INSERT INTO Roles (role_name) VALUES (%s)", (role_name,))
+        role = db.fetchone("SELECT role_id FROM Roles WHERE role_name = %s", (role_name,))
+    return role["role_id"]
+
+
+def seed_login_users(db, run_id: str, count: int, role_id: int) -> list:
+    """Create security users that all log in with LOGIN_PASSWORD. Returns the usernames."""
+    from backend.utils.password_hasher import hash_password_sync
+
+    password_hash = hash_password_sync(LOGIN_PASSWORD)
+    usernames = [f"lt_{run_id}_u{i:05d}" for i in range(count)]
+    rows = [(username, password_hash, role_id) for username in usernames]
+    if not _insert_rows(db, "INSERT INTO Users (username, password_hash, role_id)", "(%s, %s, %s)", rows):
+        raise RuntimeError("Failed to insert login users")
+    return usernames
+
+
+def seed_employees(db, run_id: str, count: int, department_id: int) -> list:
+    """Create employees with one active QR code each. Returns the code values."""
+    name_prefix = f"LT-{run_id}-E"
+    rows = [(f"{name_prefix}{i:06d}", 20.00, department_id) for i in range(count)]
+    if not _insert_rows(db, "INSERT INTO Employees (name, hourly_rate, department_id)", "(%s, %s, %s)", rows):
+        raise RuntimeError("Failed to insert employees")
+
+    employees = db.fetchall(
+        "SELECT employee_id FROM Employees WHERE name LIKE %s ORDER BY employee_id",
+        (f"{name_prefix}%",)
+    )
+    now = datetime.now()
+    codes = [(f"EMP_{e['employee_id']}_{uuid.uuid4().hex[:12]}", e["employee_id"], now) for e in employees]
+    if not _insert_rows(
+        db,
+        "INSERT INTO EmployeeQRCodes (code_value, employee_id, issue_date, expiry_date, status)",
+        "(%s, %s, %s, NULL, 'active')",
+        codes,
+    ):
+        raise RuntimeError("Failed to insert employee QR codes")
+    return [code[0] for code in codes]
+
+
+def seed_visitors(db, run_id: str, count: int, site_id: int, expiry_hours: int) -> list:
+    """Create visitors with a pending visit and an active QR code each. Returns the code values."""
+    name_prefix = f"LT-{run_id}-V"
+    # CNICs must be unique; derive them from the run id and the visitor index
+    run_number = int(run_id, 16) % 100000
+    rows = [
+        (f"{name_prefix}{i:06d}", f"{run_number:05d}-{i:07d}-{i % 10}", None)
+        for i in range(count)
+    ]
+    if not _insert_rows(db, "INSERT INTO Visitors (full_name, cnic, contact_number)", "(%s, %s, %s)", rows):
+        raise RuntimeError("Failed to insert visitors")
+
+    visitors = db.fetchall(
+        "SELECT visitor_id FROM Visitors WHERE full_name LIKE %s ORDER BY visitor_id",
+        (f"{name_prefix}%",)
+    )
+    visit_rows = [(v["visitor_id"], site_id, "Load test visit") for v in visitors]
+    if not _insert_rows(
+        db,
+        "INSERT INTO Visits (visitor_id, site_id, purpose_details, status)",
+        "(%s, %s, %s, 'pending')",
+        visit_rows,
+    ):
+        raise RuntimeError("Failed to insert visits")
+
+    visits = db.fetchall("""
+        SELECT v.visit_id
+        FROM Visits v
+        JOIN Visitors vis ON v.visitor_id = vis.visitor_id
+        WHERE vis.full_name LIKE %s
+        ORDER BY v.visit_id
+    """, (f"{name_prefix}%",))
+    issue_date = datetime.now()
+    expiry_date = issue_date + timedelta(hours=expiry_hours)
+    codes = [(f"VIS_{v['visit_id']}_{uuid.uuid4().hex[:12]}", v["visit_id"], issue_date, expiry_date) for v in visits]
+    if not _insert_rows(
+        db,
+        "INSERT INTO VisitorQRCodes (code_value, visit_id, issue_date, expiry_date, status)",
+        "(%s, %s, %s, %s, 'active')",
+        codes,
+    ):
+        raise RuntimeError("Failed to insert visitor QR codes")
+    return [code[0] for code in codes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed employees and visitors with active QR codes for load testing")
+    parser.add_argument("--employees", type=int, default=200, help="Number of employees to create")
+    parser.add_argument("--visitors", type=int, default=100, help="Number of visitors (each with a pending visit)")
+    parser.add_argument("--login-users", type=int, default=64,
+                        help="Security users for loadtest.bench_login (password: %s)" % LOGIN_PASSWORD)
+    parser.add_argument("--expiry-hours", type=int, default=24, help="Visitor QR validity in hours")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Where to write the code manifest")
+    args = parser.parse_args()
+
+    try:
+        db = Database()
+        db.ensure_connected_or_raise()
+    except Exception as e:
+        print(f"✗ Database connection failed: {e}")
+        sys.exit(1)
+
+    run_id = uuid.uuid4().hex[:8]
+    try:
+        department_id = _ensure_department(db)
+        site_id = _ensure_site(db)
+        employee_codes = seed_employees(db, run_id, args.employees, department_id)
+        visitor_codes = seed_visitors(db, run_id, args.visitors, site_id, args.expiry_hours)
+        login_users = seed_login_users(db, run_id, args.login_users, _ensure_role(db, "security"))
+    except Exception as e:
+        print(f"✗ Error while seeding: {e}")
+        sys.exit(1)
+
+    with open(args.manifest, "w") as f:
+        json.dump({
+            "run_id": run_id,
+            "created_at": datetime.now().isoformat(),
+            "employee_codes": employee_codes,
+            "visitor_codes": visitor_codes,
+            "login_users": login_users,
+            "login_password": LOGIN_PASSWORD,
+        }, f)
+
+    print(f"✓ Seeded run {run_id}: {len(employee_codes)} employee QR codes, {len(visitor_codes)} visitor QR codes, "
+          f"{len(login_users)} login users")
+    print(f"  Manifest written to {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ INSERT INTO Roles (role_name, description) VALUES
 ('security', 'Security personnel with scanning and visitor viewing access');
 
 -- Insert default admin user (password: admin123)
--- Password hash is SHA256 of 'admin123'
+-- Password hash is SHA256 of 'admin123'; it is upgraded to scrypt on first login
 INSERT INTO Users (username, password_hash, role_id) VALUES 
 ('admin', '240be518fabd2724ddb6f04eeb1da5967448d7e831c08c8fa822809f74c720a9', 1);
 